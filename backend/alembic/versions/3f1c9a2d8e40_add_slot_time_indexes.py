@@ -0,0 +1,25 @@
+"""
+Revision ID: 3f1c9a2d8e40
+Revises: 7bd4e6df3b2a
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1c9a2d8e40'
+down_revision = '7bd4e6df3b2a'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_availability_offers_end_start', 'availability_offers', ['end_at', 'start_at'], unique=False)
+    op.create_index('ix_availability_requests_start_end', 'availability_requests', ['start_at', 'end_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_availability_requests_start_end', table_name='availability_requests')
+    op.drop_index('ix_availability_offers_end_start', table_name='availability_offers')
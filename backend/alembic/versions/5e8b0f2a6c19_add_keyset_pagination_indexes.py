@@ -0,0 +1,27 @@
+"""
+Revision ID: 5e8b0f2a6c19
+Revises: d41a6c83f7b2
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e8b0f2a6c19'
+down_revision = 'd41a6c83f7b2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_availability_offers_user_start', 'availability_offers', ['user_id', 'start_at', 'id'], unique=False)
+    op.create_index('ix_availability_requests_user_start', 'availability_requests', ['user_id', 'start_at', 'id'], unique=False)
+    op.create_index('ix_notifications_user_created', 'notifications', ['user_id', 'created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_notifications_user_created', table_name='notifications')
+    op.drop_index('ix_availability_requests_user_start', table_name='availability_requests')
+    op.drop_index('ix_availability_offers_user_start', table_name='availability_offers')
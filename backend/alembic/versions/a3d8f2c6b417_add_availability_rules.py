@@ -0,0 +1,42 @@
+"""
+Revision ID: a3d8f2c6b417
+Revises: f4a9c1e7d285
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3d8f2c6b417'
+down_revision = 'f4a9c1e7d285'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('availability_rules',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('user_id', sa.String(length=8), nullable=False),
+    sa.Column('kind', sa.String(length=10), nullable=False),
+    sa.Column('start_at', sa.DateTime(), nullable=False),
+    sa.Column('end_at', sa.DateTime(), nullable=False),
+    sa.Column('freq', sa.String(length=10), nullable=False),
+    sa.Column('interval', sa.Integer(), nullable=False),
+    sa.Column('weekdays', sa.String(length=20), nullable=False),
+    sa.Column('until', sa.DateTime(), nullable=True),
+    sa.Column('count', sa.Integer(), nullable=True),
+    sa.Column('ends_at', sa.DateTime(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_availability_rules_kind_start_ends', 'availability_rules', ['kind', 'start_at', 'ends_at'], unique=False)
+    op.create_index(op.f('ix_availability_rules_user_id'), 'availability_rules', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_availability_rules_user_id'), table_name='availability_rules')
+    op.drop_index('ix_availability_rules_kind_start_ends', table_name='availability_rules')
+    op.drop_table('availability_rules')
@@ -0,0 +1,47 @@
+"""
+Revision ID: b4f7d2a9c5e1
+Revises: c8e1b5d9f326
+Create Date: 2026-10-17 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b4f7d2a9c5e1'
+down_revision = 'c8e1b5d9f326'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    for kind in ('offers', 'requests'):
+        table = f'availability_{kind}_archive'
+        op.create_table(table,
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('slot_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.String(length=8), nullable=False),
+        sa.Column('start_at', sa.DateTime(), nullable=False),
+        sa.Column('end_at', sa.DateTime(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.Column('archived_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f(f'ix_{table}_slot_id'), table, ['slot_id'], unique=False)
+        op.create_index(op.f(f'ix_{table}_user_id'), table, ['user_id'], unique=False)
+    op.create_index('ix_availability_offers_user_end', 'availability_offers', ['user_id', 'end_at', 'start_at'], unique=False)
+    op.create_index('ix_availability_requests_user_end', 'availability_requests', ['user_id', 'end_at', 'start_at'], unique=False)
+    op.create_index('ix_availability_requests_end', 'availability_requests', ['end_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_availability_requests_end', table_name='availability_requests')
+    op.drop_index('ix_availability_requests_user_end', table_name='availability_requests')
+    op.drop_index('ix_availability_offers_user_end', table_name='availability_offers')
+    for kind in ('requests', 'offers'):
+        table = f'availability_{kind}_archive'
+        op.drop_index(op.f(f'ix_{table}_user_id'), table_name=table)
+        op.drop_index(op.f(f'ix_{table}_slot_id'), table_name=table)
+        op.drop_table(table)
@@ -0,0 +1,34 @@
+"""
+Revision ID: b7d3e9f14a62
+Revises: 5e8b0f2a6c19
+Create Date: 2026-10-17 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7d3e9f14a62'
+down_revision = '5e8b0f2a6c19'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.add_column(sa.Column('unread_count', sa.Integer(), server_default='0', nullable=False))
+
+    users = sa.table('users', sa.column('id'), sa.column('unread_count'))
+    notifications = sa.table('notifications', sa.column('user_id'), sa.column('is_read'))
+    unread = (
+        sa.select(sa.func.count())
+        .where(notifications.c.user_id == users.c.id, notifications.c.is_read == sa.false())
+        .scalar_subquery()
+    )
+    op.execute(users.update().values(unread_count=unread))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.drop_column('unread_count')
@@ -0,0 +1,49 @@
+"""
+Revision ID: c8e1b5d9f326
+Revises: a3d8f2c6b417
+Create Date: 2026-10-17 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c8e1b5d9f326'
+down_revision = 'a3d8f2c6b417'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Pairs matched before this revision aren't recorded; a rematch would notify them again
+    op.create_table('matches',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('offer_id', sa.Integer(), nullable=True),
+    sa.Column('offer_rule_id', sa.Integer(), nullable=True),
+    sa.Column('offer_user_id', sa.String(length=8), nullable=False),
+    sa.Column('offer_start_at', sa.DateTime(), nullable=False),
+    sa.Column('offer_end_at', sa.DateTime(), nullable=False),
+    sa.Column('request_id', sa.Integer(), nullable=True),
+    sa.Column('request_rule_id', sa.Integer(), nullable=True),
+    sa.Column('request_user_id', sa.String(length=8), nullable=False),
+    sa.Column('request_start_at', sa.DateTime(), nullable=False),
+    sa.Column('request_end_at', sa.DateTime(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['offer_user_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['request_user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('offer_user_id', 'offer_start_at', 'offer_end_at', 'request_user_id', 'request_start_at', 'request_end_at', name='uq_matches_pair')
+    )
+    op.create_index('ix_matches_offer_user_start', 'matches', ['offer_user_id', 'request_start_at', 'id'], unique=False)
+    op.create_index('ix_matches_request_user_start', 'matches', ['request_user_id', 'request_start_at', 'id'], unique=False)
+    op.create_index(op.f('ix_matches_offer_id'), 'matches', ['offer_id'], unique=False)
+    op.create_index(op.f('ix_matches_request_id'), 'matches', ['request_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_matches_request_id'), table_name='matches')
+    op.drop_index(op.f('ix_matches_offer_id'), table_name='matches')
+    op.drop_index('ix_matches_request_user_start', table_name='matches')
+    op.drop_index('ix_matches_offer_user_start', table_name='matches')
+    op.drop_table('matches')
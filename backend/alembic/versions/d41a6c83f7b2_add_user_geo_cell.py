@@ -0,0 +1,50 @@
+"""
+Revision ID: d41a6c83f7b2
+Revises: 9b2e47c1d5a3
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+import math
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd41a6c83f7b2'
+down_revision = '9b2e47c1d5a3'
+branch_labels = None
+depends_on = None
+
+# Frozen copy of app.services.geo.cell_for with the GEO_CELL_KM default of this
+# revision, so the backfill doesn't change when the application code does
+_CELL_KM = 10.0
+_KM_PER_DEG_LAT = 111.32
+
+
+def _cell_for(lat: float, lng: float) -> str:
+    deg = _CELL_KM / _KM_PER_DEG_LAT
+    return f"{math.floor(lat / deg)}:{math.floor((lng + 180) / deg) % math.ceil(360 / deg)}"
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.add_column(sa.Column('geo_cell', sa.String(length=32), nullable=True))
+        batch_op.create_index('ix_users_geo_cell', ['geo_cell'], unique=False)
+
+    # Backfill cells for users that already have a location
+    conn = op.get_bind()
+    users = sa.table('users', sa.column('id'), sa.column('location_lat'), sa.column('location_lng'), sa.column('geo_cell'))
+    rows = conn.execute(
+        sa.select(users.c.id, users.c.location_lat, users.c.location_lng).where(
+            users.c.location_lat.isnot(None), users.c.location_lng.isnot(None)
+        )
+    ).all()
+    for user_id, lat, lng in rows:
+        conn.execute(users.update().where(users.c.id == user_id).values(geo_cell=_cell_for(lat, lng)))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.drop_index('ix_users_geo_cell')
+        batch_op.drop_column('geo_cell')
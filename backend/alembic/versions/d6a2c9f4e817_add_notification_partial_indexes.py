@@ -0,0 +1,30 @@
+"""
+Revision ID: d6a2c9f4e817
+Revises: b4f7d2a9c5e1
+Create Date: 2026-10-17 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd6a2c9f4e817'
+down_revision = 'b4f7d2a9c5e1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_notifications_user_unread', 'notifications', ['user_id', 'created_at', 'id'], unique=False,
+                    postgresql_where=sa.text('is_read = false'), sqlite_where=sa.text('is_read = 0'))
+    op.create_index('ix_notifications_read_created', 'notifications', ['created_at'], unique=False,
+                    postgresql_where=sa.text('is_read = true'), sqlite_where=sa.text('is_read = 1'))
+    # Covered by ix_notifications_user_created (user_id, created_at, id)
+    op.drop_index(op.f('ix_notifications_user_id'), table_name='notifications', if_exists=True)
+
+
+def downgrade() -> None:
+    op.create_index(op.f('ix_notifications_user_id'), 'notifications', ['user_id'], unique=False, if_not_exists=True)
+    op.drop_index('ix_notifications_read_created', table_name='notifications')
+    op.drop_index('ix_notifications_user_unread', table_name='notifications')
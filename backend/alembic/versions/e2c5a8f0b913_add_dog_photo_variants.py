@@ -0,0 +1,29 @@
+"""
+Revision ID: e2c5a8f0b913
+Revises: b7d3e9f14a62
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2c5a8f0b913'
+down_revision = 'b7d3e9f14a62'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('dogs') as batch_op:
+        batch_op.add_column(sa.Column('photo_thumb_url', sa.Text(), nullable=True))
+        batch_op.add_column(sa.Column('photo_webp_url', sa.Text(), nullable=True))
+        batch_op.add_column(sa.Column('photo_avif_url', sa.Text(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('dogs') as batch_op:
+        batch_op.drop_column('photo_avif_url')
+        batch_op.drop_column('photo_webp_url')
+        batch_op.drop_column('photo_thumb_url')
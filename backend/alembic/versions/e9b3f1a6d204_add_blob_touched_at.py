@@ -0,0 +1,30 @@
+"""
+Revision ID: e9b3f1a6d204
+Revises: d6a2c9f4e817
+Create Date: 2026-10-17 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e9b3f1a6d204'
+down_revision = 'd6a2c9f4e817'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('blobs', sa.Column('touched_at', sa.DateTime(), nullable=True))
+    blobs = sa.table('blobs', sa.column('created_at'), sa.column('touched_at'))
+    op.execute(blobs.update().values(touched_at=blobs.c.created_at))
+    with op.batch_alter_table('blobs') as batch_op:
+        batch_op.alter_column('touched_at', existing_type=sa.DateTime(), nullable=False)
+        batch_op.create_index('ix_blobs_refcount_touched', ['refcount', 'touched_at'], unique=False)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('blobs') as batch_op:
+        batch_op.drop_index('ix_blobs_refcount_touched')
+        batch_op.drop_column('touched_at')
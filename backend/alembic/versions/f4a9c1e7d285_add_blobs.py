@@ -0,0 +1,29 @@
+"""
+Revision ID: f4a9c1e7d285
+Revises: e2c5a8f0b913
+Create Date: 2026-10-17 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f4a9c1e7d285'
+down_revision = 'e2c5a8f0b913'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Uploads stored before this revision have no row and are never garbage-collected
+    op.create_table('blobs',
+    sa.Column('key', sa.String(length=255), nullable=False),
+    sa.Column('refcount', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('key')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('blobs')
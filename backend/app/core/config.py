@@ -1,6 +1,7 @@
 from pydantic import Field
 from pydantic_settings import BaseSettings
 from functools import lru_cache
+from typing import Callable
 
 
 class Settings(BaseSettings):
@@ -8,12 +9,66 @@ class Settings(BaseSettings):
     secret_key: str = Field("dev-secret", env="SECRET_KEY")
     access_token_expire_minutes: int = Field(60, env="ACCESS_TOKEN_EXPIRE_MINUTES")
     database_url: str = Field("sqlite:///./miguafi.db", env="DATABASE_URL")
+    # Serve requests through an async engine (aiosqlite / asyncpg) instead of the threadpool
+    db_async: bool = Field(False, env="DB_ASYNC")
+    # Connection pool (server databases; SQLite keeps SQLAlchemy's defaults)
+    db_pool_size: int = Field(10, env="DB_POOL_SIZE")
+    db_max_overflow: int = Field(20, env="DB_MAX_OVERFLOW")
+    db_pool_timeout: float = Field(30.0, env="DB_POOL_TIMEOUT")
+    # Recycle before server/proxy idle timeouts; pre-ping drops connections killed in between
+    db_pool_recycle: int = Field(1800, env="DB_POOL_RECYCLE")
+    db_pool_pre_ping: bool = Field(True, env="DB_POOL_PRE_PING")
+    # SQLite pragmas applied to every new connection; WAL lets readers run alongside the writer
+    sqlite_wal: bool = Field(True, env="SQLITE_WAL")
+    sqlite_synchronous: str = Field("NORMAL", env="SQLITE_SYNCHRONOUS")
+    sqlite_busy_timeout_ms: int = Field(5000, env="SQLITE_BUSY_TIMEOUT_MS")
+    # Negative cache_size is in KiB
+    sqlite_cache_size: int = Field(-64000, env="SQLITE_CACHE_SIZE")
+    sqlite_mmap_size: int = Field(268435456, env="SQLITE_MMAP_SIZE")
+    # Responses at least this big are gzipped (0 compresses everything); uploads are never gzipped
+    gzip_minimum_size: int = Field(1024, env="GZIP_MINIMUM_SIZE")
+    gzip_compresslevel: int = Field(6, env="GZIP_COMPRESSLEVEL")
     cors_origins: str = Field("http://localhost:5173,http://127.0.0.1:5173", env="CORS_ORIGINS")
     app_env: str = Field("dev", env="APP_ENV")
+    # Password hashing runs on a dedicated process pool; 0 workers hashes inline
+    password_hash_rounds: int = Field(29000, env="PASSWORD_HASH_ROUNDS")
+    password_hash_workers: int = Field(2, env="PASSWORD_HASH_WORKERS")
+    # Hashes admitted at once (running + queued); beyond that requests get 503 + Retry-After
+    password_hash_max_pending: int = Field(8, env="PASSWORD_HASH_MAX_PENDING")
+    password_hash_timeout_seconds: float = Field(10.0, env="PASSWORD_HASH_TIMEOUT_SECONDS")
+    # Per-worker cache of verified tokens -> principals (0 disables)
+    auth_cache_size: int = Field(10000, env="AUTH_CACHE_SIZE")
+    auth_cache_ttl_seconds: float = Field(60.0, env="AUTH_CACHE_TTL_SECONDS")
     reset_db_on_startup: bool = Field(True, env="RESET_DB_ON_STARTUP")
     # Storage
     storage_backend: str = Field("local", env="STORAGE_BACKEND")  # local | s3
     storage_local_dir: str = Field("./uploads", env="STORAGE_LOCAL_DIR")
+    # Uploads are streamed in chunks of this size and rejected once they exceed the max
+    upload_max_bytes: int = Field(10 * 1024 * 1024, env="UPLOAD_MAX_BYTES")
+    upload_chunk_size: int = Field(64 * 1024, env="UPLOAD_CHUNK_SIZE")
+    # Lifetime of presigned / signed direct-upload URLs
+    upload_url_expires_seconds: int = Field(900, env="UPLOAD_URL_EXPIRES_SECONDS")
+    # Unreferenced uploads touched this recently are kept: they may be about to be attached
+    upload_grace_seconds: int = Field(60, env="UPLOAD_GRACE_SECONDS")
+    # Uploads never attached are removed by python -m app.jobs.sweep_uploads, this many at a time
+    upload_sweep_batch_size: int = Field(500, env="UPLOAD_SWEEP_BATCH_SIZE")
+    # /static/uploads: keys are content hashes, so responses may be cached forever
+    upload_cache_max_age: int = Field(31536000, env="UPLOAD_CACHE_MAX_AGE")
+    # When set (e.g. /protected-uploads), reply with X-Accel-Redirect and let nginx sendfile the body
+    uploads_accel_redirect_prefix: str | None = Field(None, env="UPLOADS_ACCEL_REDIRECT_PREFIX")
+    # Dog photo thumbnail/WebP/AVIF variants (needs Pillow), built by python -m app.workers.images
+    image_variants_enabled: bool = Field(True, env="IMAGE_VARIANTS_ENABLED")
+    image_thumbnail_px: int = Field(320, env="IMAGE_THUMBNAIL_PX")
+    image_max_px: int = Field(1600, env="IMAGE_MAX_PX")
+    image_quality: int = Field(80, env="IMAGE_QUALITY")
+    # S3 switches to multipart upload above the threshold (parts can't be smaller than 5 MiB)
+    s3_multipart_threshold: int = Field(8 * 1024 * 1024, env="S3_MULTIPART_THRESHOLD")
+    s3_multipart_chunksize: int = Field(5 * 1024 * 1024, env="S3_MULTIPART_CHUNKSIZE")
+    # The S3 client is shared process-wide; size its HTTP pool for concurrent uploads
+    s3_max_pool_connections: int = Field(10, env="S3_MAX_POOL_CONNECTIONS")
+    s3_connect_timeout: float = Field(5.0, env="S3_CONNECT_TIMEOUT")
+    s3_read_timeout: float = Field(60.0, env="S3_READ_TIMEOUT")
+    s3_max_attempts: int = Field(3, env="S3_MAX_ATTEMPTS")
     s3_endpoint_url: str | None = Field(None, env="S3_ENDPOINT_URL")
     s3_access_key: str | None = Field(None, env="S3_ACCESS_KEY")
     s3_secret_key: str | None = Field(None, env="S3_SECRET_KEY")
@@ -21,6 +76,51 @@ class Settings(BaseSettings):
     s3_bucket: str | None = Field(None, env="S3_BUCKET")
     # Optional public base URL (e.g., http://localhost:9000/<bucket>) to construct browser-friendly URLs
     s3_public_base_url: str | None = Field(None, env="S3_PUBLIC_BASE_URL")
+    # Most slots one batch / recurrence may create
+    availability_batch_max_slots: int = Field(366, env="AVAILABILITY_BATCH_MAX_SLOTS")
+    # Recurring rules are expanded this far ahead in listings and when a new rule is matched
+    availability_rule_horizon_days: int = Field(28, env="AVAILABILITY_RULE_HORIZON_DAYS")
+    # Retention (python -m app.jobs.archive): slots that ended this long ago move to the archive tables
+    slot_archive_after_hours: int = Field(24, env="SLOT_ARCHIVE_AFTER_HOURS")
+    # Rows moved per transaction, so each batch holds its locks briefly
+    slot_archive_batch_size: int = Field(1000, env="SLOT_ARCHIVE_BATCH_SIZE")
+    # Retention (python -m app.jobs.purge_notifications): read notifications older than this are deleted
+    notification_retention_days: int = Field(90, env="NOTIFICATION_RETENTION_DAYS")
+    notification_purge_batch_size: int = Field(1000, env="NOTIFICATION_PURGE_BATCH_SIZE")
+    # Matching: keep a per-process interval index of future slots (single-worker deployments)
+    matching_index_enabled: bool = Field(False, env="MATCHING_INDEX_ENABLED")
+    # Only match users within this distance of each other (0 disables the proximity filter)
+    match_radius_km: float = Field(25.0, env="MATCH_RADIUS_KM")
+    # Size of the grid cells stored in users.geo_cell; changing it requires recomputing the column
+    geo_cell_km: float = Field(10.0, env="GEO_CELL_KM")
+    # SMTP transport
+    smtp_host: str = Field("localhost", env="SMTP_HOST")
+    smtp_port: int = Field(1025, env="SMTP_PORT")
+    smtp_from: str = Field("noreply@miguafi.local", env="SMTP_FROM")
+    smtp_timeout: float = Field(3.0, env="SMTP_TIMEOUT")
+    smtp_pool_size: int = Field(4, env="SMTP_POOL_SIZE")
+    # Reconnect after this many messages so long-lived sessions don't hit server limits
+    smtp_max_messages_per_connection: int = Field(100, env="SMTP_MAX_MESSAGES_PER_CONNECTION")
+    # Email circuit breaker: open after N consecutive transport failures, probe again after the timeout
+    email_breaker_failure_threshold: int = Field(5, env="EMAIL_BREAKER_FAILURE_THRESHOLD")
+    email_breaker_reset_seconds: float = Field(30.0, env="EMAIL_BREAKER_RESET_SECONDS")
+    # Email outbox worker (python -m app.workers.outbox)
+    outbox_batch_size: int = Field(100, env="OUTBOX_BATCH_SIZE")
+    outbox_workers: int = Field(4, env="OUTBOX_WORKERS")
+    outbox_poll_interval: float = Field(2.0, env="OUTBOX_POLL_INTERVAL")
+    outbox_max_attempts: int = Field(8, env="OUTBOX_MAX_ATTEMPTS")
+    outbox_backoff_seconds: int = Field(30, env="OUTBOX_BACKOFF_SECONDS")
+    outbox_backoff_max_seconds: int = Field(3600, env="OUTBOX_BACKOFF_MAX_SECONDS")
+    # A claimed batch becomes visible again if its worker dies before finishing
+    outbox_lease_seconds: int = Field(300, env="OUTBOX_LEASE_SECONDS")
+    # Photo variant worker (python -m app.workers.images); renders in a process pool
+    image_worker_batch_size: int = Field(20, env="IMAGE_WORKER_BATCH_SIZE")
+    image_worker_processes: int = Field(2, env="IMAGE_WORKER_PROCESSES")
+    image_worker_poll_interval: float = Field(2.0, env="IMAGE_WORKER_POLL_INTERVAL")
+    image_job_max_attempts: int = Field(5, env="IMAGE_JOB_MAX_ATTEMPTS")
+    image_job_backoff_seconds: int = Field(30, env="IMAGE_JOB_BACKOFF_SECONDS")
+    image_job_backoff_max_seconds: int = Field(3600, env="IMAGE_JOB_BACKOFF_MAX_SECONDS")
+    image_job_lease_seconds: int = Field(300, env="IMAGE_JOB_LEASE_SECONDS")
 
     class Config:
         env_file = ".env"
@@ -35,7 +135,18 @@ def get_settings() -> Settings:
 settings = get_settings()
 
 
+_reload_hooks: list[Callable[[], None]] = []
+
+
+def on_reload(hook: Callable[[], None]) -> Callable[[], None]:
+    """Register ``hook`` to drop state built from the previous settings."""
+    _reload_hooks.append(hook)
+    return hook
+
+
 def reload_settings() -> None:
     get_settings.cache_clear()  # type: ignore[attr-defined]
-    global settings
-    settings = get_settings()
+    # Update in place: modules keep the object they imported at startup
+    settings.__dict__.update(get_settings().__dict__)
+    for hook in _reload_hooks:
+        hook()
@@ -1,13 +1,94 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+from typing import Any, Callable, TypeVar
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker, declarative_base, Session
+from starlette.concurrency import run_in_threadpool
 
 from .core.config import settings
 
 
-engine = create_engine(settings.database_url, future=True)
+def engine_options(url: str) -> dict:
+    if make_url(url).get_backend_name() == "sqlite":
+        return {}
+    return {
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+
+
+def sqlite_pragmas() -> dict[str, str | int]:
+    pragmas: dict[str, str | int] = {
+        "synchronous": settings.sqlite_synchronous,
+        "busy_timeout": settings.sqlite_busy_timeout_ms,
+        "cache_size": settings.sqlite_cache_size,
+        "mmap_size": settings.sqlite_mmap_size,
+    }
+    if settings.sqlite_wal:
+        pragmas = {"journal_mode": "WAL", **pragmas}
+    return pragmas
+
+
+def install_sqlite_pragmas(target: Engine, pragmas: dict[str, str | int] | None = None) -> None:
+    """Run ``PRAGMA name=value`` on every new DBAPI connection of a SQLite engine."""
+    if target.dialect.name != "sqlite":
+        return
+    pragmas = sqlite_pragmas() if pragmas is None else pragmas
+
+    @event.listens_for(target, "connect")
+    def _set_pragmas(dbapi_conn, _record):
+        cursor = dbapi_conn.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+
+engine = create_engine(settings.database_url, future=True, **engine_options(settings.database_url))
+install_sqlite_pragmas(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, future=True)
 Base = declarative_base()
 
+# Async drivers for the sync URLs used everywhere else (migrations, workers, jobs)
+_ASYNC_DRIVERS = {"sqlite": "aiosqlite", "postgresql": "asyncpg"}
+
+
+def async_url(url: str) -> str:
+    u = make_url(url)
+    backend = u.get_backend_name()
+    if backend not in _ASYNC_DRIVERS:
+        raise RuntimeError(f"No async driver configured for '{backend}'")
+    return u.set(drivername=f"{backend}+{_ASYNC_DRIVERS[backend]}").render_as_string(hide_password=False)
+
+
+if settings.db_async:
+    async_engine = create_async_engine(async_url(settings.database_url), **engine_options(settings.database_url))
+    install_sqlite_pragmas(async_engine.sync_engine)
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+else:
+    async_engine = None
+    AsyncSessionLocal = None
+
+DbSession = Session | AsyncSession
+T = TypeVar("T")
+
+
+def request_engine() -> Engine:
+    """The engine request handlers actually run statements on."""
+    return async_engine.sync_engine if async_engine is not None else engine
+
+
+def conflict_insert(db: Session, model):
+    """``insert(model)`` for the session's dialect, exposing ``on_conflict_do_*``."""
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(model)
+
 
 def get_db():
     db = SessionLocal()
@@ -15,3 +96,28 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_session():
+    # AsyncSession when DB_ASYNC is set, otherwise a regular Session used from the threadpool
+    if AsyncSessionLocal is not None:
+        async with AsyncSessionLocal() as db:
+            yield db
+        return
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        await run_in_threadpool(db.close)
+
+
+async def run_db(db: DbSession, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run ``fn(session, *args, **kwargs)`` without blocking the event loop.
+
+    With an AsyncSession, ``fn`` gets its sync facade via ``run_sync`` and its
+    statements go through the async driver on the loop; with a sync Session it
+    runs on the threadpool as before.
+    """
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(fn, *args, **kwargs)
+    return await run_in_threadpool(fn, db, *args, **kwargs)
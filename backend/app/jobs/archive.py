@@ -0,0 +1,98 @@
+"""Move expired availability slots out of the hot tables.
+
+Run from backend/ (e.g. hourly from cron):
+
+    python -m app.jobs.archive                     # slots that ended over SLOT_ARCHIVE_AFTER_HOURS ago
+    python -m app.jobs.archive --after-hours 0     # everything that has ended
+    python -m app.jobs.archive --dry-run           # count, move nothing
+
+Past windows can't be created or matched, but they used to stay in
+availability_offers / availability_requests forever, so the per-user overlap
+checks and the matching queries kept walking them. Each batch picks the oldest
+expired rows through the end_at indexes, copies them into the *_archive table
+with one INSERT ... SELECT and deletes them by id in the same short transaction.
+Rows in matches keep pointing at the archived slot's id (archive.slot_id).
+"""
+from __future__ import annotations
+import argparse
+import logging
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import DateTime, delete, func, insert, literal, select
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..db import SessionLocal
+from ..models import AvailabilityOffer, AvailabilityOfferArchive, AvailabilityRequest, AvailabilityRequestArchive
+
+
+logger = logging.getLogger("miguafi.archive")
+
+TABLES = ((AvailabilityOffer, AvailabilityOfferArchive), (AvailabilityRequest, AvailabilityRequestArchive))
+_COLUMNS = ("user_id", "start_at", "end_at", "created_at", "updated_at")
+
+
+def archive_batch(db: Session, model, archive, cutoff: datetime, batch_size: int, now: datetime) -> int:
+    """Move up to ``batch_size`` rows of ``model`` that ended at or before ``cutoff``; commits."""
+    ids = db.scalars(
+        select(model.id)
+        .where(model.end_at <= cutoff)
+        .order_by(model.end_at)
+        .limit(batch_size)
+        # Concurrent runs take disjoint batches on Postgres (ignored by SQLite)
+        .with_for_update(skip_locked=True)
+    ).all()
+    if not ids:
+        return 0
+    source = select(model.id, *(getattr(model, c) for c in _COLUMNS), literal(now, DateTime)).where(model.id.in_(ids))
+    db.execute(insert(archive).from_select(["slot_id", *_COLUMNS, "archived_at"], source))
+    db.execute(delete(model).where(model.id.in_(ids)).execution_options(synchronize_session=False))
+    db.commit()
+    return len(ids)
+
+
+def run(
+    after_hours: int | None = None, batch_size: int | None = None, dry_run: bool = False, pause: float = 0.0
+) -> dict[str, int]:
+    """Archive expired slots; returns rows moved (dry: found) per table."""
+    now = datetime.utcnow()
+    cutoff = now - timedelta(hours=settings.slot_archive_after_hours if after_hours is None else after_hours)
+    batch_size = batch_size or settings.slot_archive_batch_size
+    moved = {}
+    db = SessionLocal()
+    try:
+        for model, archive in TABLES:
+            name = model.__tablename__
+            if dry_run:
+                moved[name] = db.scalar(select(func.count(model.id)).where(model.end_at <= cutoff))
+                continue
+            moved[name] = 0
+            while True:
+                n = archive_batch(db, model, archive, cutoff, batch_size, now)
+                moved[name] += n
+                if n < batch_size:
+                    break
+                if pause:
+                    # Let other writers in between batches
+                    time.sleep(pause)
+            logger.info("%s: %s rows archived", name, moved[name])
+        return moved
+    finally:
+        db.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--after-hours", type=int, default=None,
+                        help="archive slots that ended at least this long ago (default SLOT_ARCHIVE_AFTER_HOURS)")
+    parser.add_argument("--batch-size", type=int, default=None, help="rows per transaction (default SLOT_ARCHIVE_BATCH_SIZE)")
+    parser.add_argument("--pause", type=float, default=0.0, help="seconds to sleep between batches")
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    run(after_hours=args.after_hours, batch_size=args.batch_size, dry_run=args.dry_run, pause=args.pause)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Delete read notifications past the retention period.
+
+Run from backend/ (e.g. daily from cron):
+
+    python -m app.jobs.purge_notifications                 # read ones older than NOTIFICATION_RETENTION_DAYS (90)
+    python -m app.jobs.purge_notifications --days 30
+    python -m app.jobs.purge_notifications --dry-run       # count, delete nothing
+
+The notifications table otherwise only grows. Deletes go by primary key in
+batches of NOTIFICATION_PURGE_BATCH_SIZE, oldest first through
+ix_notifications_read_created, one short transaction each, so only the rows of
+the current batch are ever locked. Unread notifications are kept whatever their
+age, which leaves users.unread_count untouched.
+"""
+from __future__ import annotations
+import argparse
+import logging
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, func, select, true
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..db import SessionLocal
+from ..models import Notification
+
+
+logger = logging.getLogger("miguafi.purge_notifications")
+
+
+def _expired(cutoff: datetime):
+    # "= true" (not "IS true") so the partial index's predicate applies
+    return (Notification.is_read == true(), Notification.created_at < cutoff)
+
+
+def purge_batch(db: Session, cutoff: datetime, batch_size: int) -> int:
+    """Delete up to ``batch_size`` read notifications created before ``cutoff``; commits."""
+    ids = db.scalars(
+        select(Notification.id)
+        .where(*_expired(cutoff))
+        .order_by(Notification.created_at)
+        .limit(batch_size)
+        # Concurrent runs take disjoint batches on Postgres (ignored by SQLite)
+        .with_for_update(skip_locked=True)
+    ).all()
+    if not ids:
+        return 0
+    db.execute(delete(Notification).where(Notification.id.in_(ids)).execution_options(synchronize_session=False))
+    db.commit()
+    return len(ids)
+
+
+def run(days: int | None = None, batch_size: int | None = None, dry_run: bool = False, pause: float = 0.0) -> int:
+    """Purge expired read notifications; returns how many were deleted (dry: found)."""
+    cutoff = datetime.utcnow() - timedelta(days=settings.notification_retention_days if days is None else days)
+    batch_size = batch_size or settings.notification_purge_batch_size
+    db = SessionLocal()
+    try:
+        if dry_run:
+            return db.scalar(select(func.count(Notification.id)).where(*_expired(cutoff)))
+        deleted = 0
+        while True:
+            n = purge_batch(db, cutoff, batch_size)
+            deleted += n
+            if n < batch_size:
+                break
+            if pause:
+                # Let other writers in between batches
+                time.sleep(pause)
+        logger.info("%s read notifications older than %s deleted", deleted, cutoff)
+        return deleted
+    finally:
+        db.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=None,
+                        help="delete read notifications older than this (default NOTIFICATION_RETENTION_DAYS)")
+    parser.add_argument("--batch-size", type=int, default=None,
+                        help="rows per transaction (default NOTIFICATION_PURGE_BATCH_SIZE)")
+    parser.add_argument("--pause", type=float, default=0.0, help="seconds to sleep between batches")
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    run(days=args.days, batch_size=args.batch_size, dry_run=args.dry_run, pause=args.pause)
+
+
+if __name__ == "__main__":
+    main()
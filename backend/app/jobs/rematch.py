@@ -0,0 +1,243 @@
+"""Recompute offer/request matches for every future slot in one batch.
+
+Run from backend/:
+
+    python -m app.jobs.rematch                                  # match and notify everything
+    python -m app.jobs.rematch --since 2026-10-17T08:00         # only look at pairs involving slots created since
+    python -m app.jobs.rematch --workers 4 --dry-run            # count matches, write nothing
+    python -m app.jobs.rematch --horizon-days 1                 # daily: rule occurrences that just entered the horizon
+
+Insert-time matching runs one slot at a time, so slots written while it was not
+running (outage, migration, bulk import) are never matched. This job loads all
+future offers and requests (plus rule occurrences within the horizon) and finds
+every containing pair with a sort/sweep in O((n + m) log(n + m) + k) instead of one
+query per slot. Requests can be split into time ranges matched on a process
+pool. Pairs are recorded in the matches table in bulk and only new ones are
+notified, phrased as if the later-created slot of each pair had just been posted,
+so the job can be re-run safely.
+
+Rules are only matched up to AVAILABILITY_RULE_HORIZON_DAYS ahead when they are
+created. Run daily with --horizon-days 1 so each day is matched as it enters the
+horizon: only rule occurrences in the last N days of the horizon, and the slots
+and occurrences they can pair with, are loaded.
+"""
+from __future__ import annotations
+import argparse
+import bisect
+import heapq
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import NamedTuple
+
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..db import SessionLocal
+from ..models import AvailabilityOffer, AvailabilityRequest, AvailabilityRule, User
+from ..services import geo, matches, recurrence
+from ..services.notifications import notify_many
+
+
+logger = logging.getLogger("miguafi.rematch")
+
+# Keep IN (...) lists well below SQLite's bound-parameter limit
+_IN_CHUNK = 500
+# Rule occurrences are at most a day long (see routers.availability._check_rule)
+_MAX_OCCURRENCE = timedelta(days=1)
+
+
+class Slot(NamedTuple):
+    start_at: datetime
+    end_at: datetime
+    user_id: str
+    id: int | None
+    created_at: datetime
+    # Set for occurrences of a recurring rule (id is then None)
+    rule_id: int | None = None
+
+
+def _start(slot: Slot) -> datetime:
+    return slot.start_at
+
+
+def sweep(offers: list[Slot], requests: list[Slot]) -> list[tuple[Slot, Slot]]:
+    """Every ``(offer, request)`` where the offer contains the request, across different users.
+
+    Requests are visited by start. Offers that have started are pushed on a heap
+    with the latest end on top, so the ones ending at or after the current
+    request's end form a subtree at the root: walking it visits each containing
+    offer and at most two children of each that don't. Offers that already ended sink below and
+    are never visited again, so nothing has to be removed.
+    """
+    offers = sorted(offers, key=_start)
+    pairs = []
+    # (datetime.min - end_at) grows as end_at shrinks: heapq's min-heap keeps the latest end first
+    active: list[tuple[timedelta, int]] = []
+    i = 0
+    for req in sorted(requests, key=_start):
+        while i < len(offers) and offers[i].start_at <= req.start_at:
+            heapq.heappush(active, (datetime.min - offers[i].end_at, i))
+            i += 1
+        bound = datetime.min - req.end_at
+        stack = [0]
+        while stack:
+            k = stack.pop()
+            if k >= len(active) or active[k][0] > bound:
+                continue
+            j = active[k][1]
+            if offers[j].user_id != req.user_id:
+                pairs.append((offers[j], req))
+            stack += (2 * k + 1, 2 * k + 2)
+    return pairs
+
+
+def partition(offers: list[Slot], requests: list[Slot], parts: int) -> list[tuple[list[Slot], list[Slot]]]:
+    """Split requests into ``parts`` consecutive time ranges, each with the offers that may contain them."""
+    requests = sorted(requests, key=_start)
+    offers = sorted(offers, key=_start)
+    starts = [o.start_at for o in offers]
+    size = -(-len(requests) // max(parts, 1))
+    out = []
+    for k in range(0, len(requests), size):
+        chunk = requests[k:k + size]
+        min_end = min(r.end_at for r in chunk)
+        # Containing offers start no later than the last request and end after the earliest end
+        candidates = offers[:bisect.bisect_right(starts, chunk[-1].start_at)]
+        out.append(([o for o in candidates if o.end_at >= min_end], chunk))
+    return out
+
+
+def _sweep_part(part: tuple[list[Slot], list[Slot]]) -> list[tuple[Slot, Slot]]:
+    return sweep(*part)
+
+
+def load_slots(
+    db: Session, now: datetime, window: tuple[datetime, datetime] | None = None
+) -> tuple[list[Slot], list[Slot]]:
+    """Future offers and requests, plus rule occurrences within the horizon.
+
+    With ``window``, only rule occurrences overlapping it and the slots they could
+    pair with (anything overlapping such an occurrence) are loaded.
+    """
+    start, end = window or (now, now + timedelta(days=settings.availability_rule_horizon_days))
+    loaded = []
+    for model, kind in ((AvailabilityOffer, "offer"), (AvailabilityRequest, "request")):
+        rows = db.query(model.start_at, model.end_at, model.user_id, model.id, model.created_at).filter(model.end_at > now)
+        if window is not None:
+            rows = rows.filter(model.end_at > start - _MAX_OCCURRENCE, model.start_at < end + _MAX_OCCURRENCE)
+        slots = [Slot(*row) for row in rows]
+        rules = db.query(AvailabilityRule).filter(
+            AvailabilityRule.kind == kind,
+            AvailabilityRule.start_at < end,
+            or_(AvailabilityRule.ends_at.is_(None), AvailabilityRule.ends_at > start),
+        )
+        slots += [
+            Slot(s, e, r.user_id, None, r.created_at, r.id)
+            for r in rules
+            for s, e in recurrence.windows(r, start, end)
+        ]
+        loaded.append(slots)
+    return loaded[0], loaded[1]
+
+
+def _load_users(db: Session, ids: set[str]) -> dict[str, tuple[str, float | None, float | None]]:
+    ids = sorted(ids)
+    users = {}
+    for k in range(0, len(ids), _IN_CHUNK):
+        rows = db.query(User.id, User.email, User.location_lat, User.location_lng).filter(User.id.in_(ids[k:k + _IN_CHUNK]))
+        users.update((row.id, tuple(row[1:])) for row in rows)
+    return users
+
+
+def _near(poster: tuple, other: tuple) -> bool:
+    # Same rule as insert-time matching: the radius applies only when both sides have a location
+    radius = settings.match_radius_km
+    (_, lat, lng), (_, other_lat, other_lng) = poster, other
+    if radius <= 0 or None in (lat, lng, other_lat, other_lng):
+        return True
+    return geo.haversine_km(lat, lng, other_lat, other_lng) <= radius
+
+
+def find_matches(offers: list[Slot], requests: list[Slot], workers: int = 0) -> list[tuple[Slot, Slot]]:
+    if workers <= 1 or len(requests) < 2:
+        return sweep(offers, requests)
+    parts = partition(offers, requests, workers)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return [pair for pairs in pool.map(_sweep_part, parts) for pair in pairs]
+
+
+def _notification(pair: tuple[Slot, Slot], users: dict) -> tuple[str, str, str] | None:
+    # Notify the owner of the slot that was already there when the other was posted
+    off, req = pair
+    if off.created_at >= req.created_at:
+        if _near(users[off.user_id], users[req.user_id]):
+            return req.user_id, users[req.user_id][0], f"Une offre correspond à votre demande du {req.start_at} au {req.end_at}."
+    elif _near(users[req.user_id], users[off.user_id]):
+        return off.user_id, users[off.user_id][0], f"Une demande correspond à votre offre du {off.start_at} au {off.end_at}."
+    return None
+
+
+def run(
+    workers: int = 0,
+    since: datetime | None = None,
+    dry_run: bool = False,
+    batch_size: int = 1000,
+    horizon_days: int | None = None,
+) -> int:
+    """Match all future slots and notify new pairs; returns how many were notified (dry: matched).
+
+    With ``horizon_days``, only pairs involving a rule occurrence in the last
+    ``horizon_days`` days of the rule horizon are matched.
+    """
+    now = datetime.utcnow()
+    window = None
+    if horizon_days is not None:
+        horizon = now + timedelta(days=settings.availability_rule_horizon_days)
+        window = (max(horizon - timedelta(days=horizon_days), now), horizon)
+    db = SessionLocal()
+    try:
+        offers, requests = load_slots(db, now, window)
+        pairs = find_matches(offers, requests, workers)
+        if window is not None:
+            # Pairs of one-off slots were matched when posted
+            pairs = [(o, r) for o, r in pairs if o.rule_id is not None or r.rule_id is not None]
+        if since is not None:
+            pairs = [(o, r) for o, r in pairs if max(o.created_at, r.created_at) >= since]
+        users = _load_users(db, {s.user_id for pair in pairs for s in pair})
+        pairs = [pair for pair in pairs if _notification(pair, users)]
+        logger.info("%s offers, %s requests: %s matches", len(offers), len(requests), len(pairs))
+        if dry_run:
+            return len(pairs)
+        notified = 0
+        for k in range(0, len(pairs), batch_size):
+            # Pairs already in the matches table were notified before and are skipped
+            new = matches.record(db, pairs[k:k + batch_size])
+            notified += notify_many(db, (_notification(pair, users) for pair in new))
+            db.commit()
+        logger.info("%s new matches notified", notified)
+        return notified
+    finally:
+        db.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=0, help="processes to split the sweep across (0: in-process)")
+    parser.add_argument("--since", type=datetime.fromisoformat, default=None,
+                        help="only pairs where a slot was created at or after this UTC time")
+    parser.add_argument("--batch-size", type=int, default=1000, help="notifications per INSERT/commit")
+    parser.add_argument("--horizon-days", type=int, default=None,
+                        help="only rule occurrences in the last N days of the rule horizon (run daily with 1)")
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    run(
+        workers=args.workers, since=args.since, dry_run=args.dry_run, batch_size=args.batch_size,
+        horizon_days=args.horizon_days,
+    )
+
+
+if __name__ == "__main__":
+    main()
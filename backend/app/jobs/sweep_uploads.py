@@ -0,0 +1,73 @@
+"""Remove stored uploads that nothing references.
+
+Run from backend/ (e.g. hourly from cron):
+
+    python -m app.jobs.sweep_uploads               # unreferenced for longer than UPLOAD_URL_EXPIRES_SECONDS
+    python -m app.jobs.sweep_uploads --dry-run     # count, delete nothing
+
+Every upload is registered in blobs (blobs.touch) before its object is written,
+so objects whose refcount stays at 0 are ones that were never attached: direct
+uploads nobody confirmed, photos of a registration without a dog, variants of
+a photo replaced meanwhile, or references released while the upload was still
+fresh. Rows are deleted in batches, then their objects are purged unless an
+upload touched the key again in between. Objects stored before the blobs table
+existed have no row and are left alone.
+"""
+from __future__ import annotations
+import argparse
+import logging
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, func, select
+
+from ..core.config import settings
+from ..db import SessionLocal
+from ..models import Blob
+from ..services import blobs
+
+
+logger = logging.getLogger("miguafi.sweep_uploads")
+
+
+def run(older_than: int | None = None, batch_size: int | None = None, dry_run: bool = False) -> int:
+    """Delete uploads unreferenced and untouched for ``older_than`` seconds; returns how many (dry: found)."""
+    # Never sweep a direct upload whose URL may still be used, nor one within the purge grace period
+    age = max(settings.upload_url_expires_seconds, settings.upload_grace_seconds) if older_than is None else older_than
+    cutoff = datetime.utcnow() - timedelta(seconds=age)
+    batch_size = batch_size or settings.upload_sweep_batch_size
+    stale = (Blob.refcount <= 0, Blob.touched_at < cutoff)
+    db = SessionLocal()
+    try:
+        if dry_run:
+            return db.scalar(select(func.count()).select_from(Blob).where(*stale))
+        swept = 0
+        while True:
+            keys = db.scalars(
+                select(Blob.key).where(*stale).order_by(Blob.touched_at).limit(batch_size).with_for_update(skip_locked=True)
+            ).all()
+            if keys:
+                db.execute(delete(Blob).where(Blob.key.in_(keys), *stale))
+            db.commit()
+            blobs.purge(keys)
+            swept += len(keys)
+            if len(keys) < batch_size:
+                break
+        logger.info("%s unreferenced uploads removed", swept)
+        return swept
+    finally:
+        db.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--older-than", type=int, default=None,
+                        help="seconds since last touched (default UPLOAD_URL_EXPIRES_SECONDS)")
+    parser.add_argument("--batch-size", type=int, default=None, help="rows per transaction (default UPLOAD_SWEEP_BATCH_SIZE)")
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    run(older_than=args.older_than, batch_size=args.batch_size, dry_run=args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
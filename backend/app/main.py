@@ -1,15 +1,43 @@
 import os
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, ORJSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
 from .core.config import settings
 
 from .db import Base, engine
-from .routers import auth, users, availability, notifications, dogs
+from .routers import auth, users, availability, notifications, dogs, uploads
+from .services import email, hashing, matching
+from .services.principal_cache import principal_cache
+from .uploads import UploadStaticFiles
+
+
+class APIGZipMiddleware(GZipMiddleware):
+	"""Gzip API payloads only: stored photos are already compressed and served with ranges."""
+
+	def __init__(self, app: ASGIApp, skip_prefixes: tuple[str, ...] = (), **kwargs) -> None:
+		super().__init__(app, **kwargs)
+		self.skip_prefixes = skip_prefixes
+
+	async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+		if scope["type"] == "http" and scope["path"].startswith(self.skip_prefixes):
+			await self.app(scope, receive, send)
+			return
+		await super().__call__(scope, receive, send)
 
 
 def create_app() -> FastAPI:
-	app = FastAPI(title="Miguafi API", version="0.1.0")
+	# orjson encodes every route's output; list endpoints also skip per-row validation (pagination.page_response)
+	app = FastAPI(title="Miguafi API", version="0.1.0", default_response_class=ORJSONResponse)
+
+	# Compress large JSON (list pages); small bodies aren't worth the CPU
+	app.add_middleware(
+		APIGZipMiddleware,
+		skip_prefixes=("/static/uploads", "/uploads"),
+		minimum_size=settings.gzip_minimum_size,
+		compresslevel=settings.gzip_compresslevel,
+	)
 
 	# CORS for local web dev (Vite default port 5173)
 	origins = [o.strip() for o in settings.cors_origins.split(',') if o.strip()]
@@ -21,22 +49,42 @@ def create_app() -> FastAPI:
 		allow_headers=["*"],
 	)
 
+	# Password hashing pool saturated: shed load instead of queueing on the threadpool
+	@app.exception_handler(hashing.HashingBusy)
+	def hashing_busy(request: Request, exc: hashing.HashingBusy):
+		return JSONResponse(
+			status_code=503,
+			content={"detail": "Server busy, retry later"},
+			headers={"Retry-After": str(exc.retry_after)},
+		)
+
 	# Basic health
 	@app.get("/health")
 	def health():
 		return {"status": "ok"}
 
+	# Per-process counters (auth cache, password hashing, SMTP circuit breaker)
+	@app.get("/health/metrics")
+	def health_metrics():
+		return {
+			"auth_cache": principal_cache.stats(),
+			"password_hashing": hashing.pool.stats(),
+			"email_breaker": email.breaker.snapshot(),
+		}
+
 	# DB init - controlled by settings
 	if settings.reset_db_on_startup:
 		Base.metadata.drop_all(bind=engine)
 		Base.metadata.create_all(bind=engine)
+		matching.reset_indexes()
+		principal_cache.clear()
 
 	# Static files for local uploads
 	if settings.storage_backend == "local":
 		os.makedirs(settings.storage_local_dir, exist_ok=True)
 		# Serve local uploads under /static/uploads
 		uploads_mount = settings.storage_local_dir
-		app.mount("/static/uploads", StaticFiles(directory=uploads_mount), name="uploads")
+		app.mount("/static/uploads", UploadStaticFiles(directory=uploads_mount), name="uploads")
 
 	# Routers
 	app.include_router(auth.router, prefix="/auth", tags=["auth"])
@@ -44,6 +92,7 @@ def create_app() -> FastAPI:
 	app.include_router(availability.router, prefix="/availability", tags=["availability"])
 	app.include_router(notifications.router, prefix="/notifications", tags=["notifications"])
 	app.include_router(dogs.router, prefix="/dogs", tags=["dogs"])
+	app.include_router(uploads.router, prefix="/uploads", tags=["uploads"])
 
 	return app
 
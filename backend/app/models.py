@@ -1,9 +1,10 @@
 import uuid
 from datetime import datetime
-from sqlalchemy import String, DateTime, ForeignKey, Boolean, Integer, Text, UniqueConstraint, Index
+from sqlalchemy import String, DateTime, ForeignKey, Boolean, Integer, Text, UniqueConstraint, Index, event, text
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 
 from .db import Base
+from .services import geo
 
 
 def generate_user_id() -> str:
@@ -23,17 +24,36 @@ class User(Base):
     # Approximate location (low-precision GPS as text for now)
     location_lat: Mapped[float | None] = mapped_column(nullable=True)
     location_lng: Mapped[float | None] = mapped_column(nullable=True)
+    # Grid cell derived from the location (see services.geo), used to find nearby users
+    geo_cell: Mapped[str | None] = mapped_column(String(32), nullable=True, index=True)
+    # Denormalized count of unread notifications (see services.notifications)
+    unread_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
 
     # Relationships
     offers: Mapped[list["AvailabilityOffer"]] = relationship(back_populates="user", cascade="all, delete-orphan")
     requests: Mapped[list["AvailabilityRequest"]] = relationship(back_populates="user", cascade="all, delete-orphan")
+    rules: Mapped[list["AvailabilityRule"]] = relationship(back_populates="user", cascade="all, delete-orphan")
     notifications: Mapped[list["Notification"]] = relationship(back_populates="user", cascade="all, delete-orphan")
     # Dogs association links
     dog_links: Mapped[list["UserDog"]] = relationship(back_populates="user", cascade="all, delete-orphan")
 
 
+@event.listens_for(User, "before_insert")
+@event.listens_for(User, "before_update")
+def _sync_geo_cell(mapper, connection, target: User) -> None:
+    target.geo_cell = geo.cell_for(target.location_lat, target.location_lng)
+
+
 class AvailabilityOffer(Base):
     __tablename__ = "availability_offers"
+    __table_args__ = (
+        # Matching looks for offers ending after a request, i.e. only future ones
+        Index('ix_availability_offers_end_start', 'end_at', 'start_at'),
+        # Keyset pagination of a user's offers on (start_at, id)
+        Index('ix_availability_offers_user_start', 'user_id', 'start_at', 'id'),
+        # Overlap checks only range over the user's slots that haven't ended yet
+        Index('ix_availability_offers_user_end', 'user_id', 'end_at', 'start_at'),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     user_id: Mapped[str] = mapped_column(ForeignKey("users.id"), index=True, nullable=False)
@@ -47,6 +67,13 @@ class AvailabilityOffer(Base):
 
 class AvailabilityRequest(Base):
     __tablename__ = "availability_requests"
+    __table_args__ = (
+        Index('ix_availability_requests_start_end', 'start_at', 'end_at'),
+        Index('ix_availability_requests_user_start', 'user_id', 'start_at', 'id'),
+        Index('ix_availability_requests_user_end', 'user_id', 'end_at', 'start_at'),
+        # The archive job picks expired requests by end_at
+        Index('ix_availability_requests_end', 'end_at'),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     user_id: Mapped[str] = mapped_column(ForeignKey("users.id"), index=True, nullable=False)
@@ -58,11 +85,121 @@ class AvailabilityRequest(Base):
     user: Mapped[User] = relationship(back_populates="requests")
 
 
+class AvailabilityOfferArchive(Base):
+    """Expired offers moved out of availability_offers by jobs.archive."""
+
+    __tablename__ = "availability_offers_archive"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    # availability_offers.id of the archived row (what matches.offer_id still points at)
+    slot_id: Mapped[int] = mapped_column(Integer, index=True, nullable=False)
+    user_id: Mapped[str] = mapped_column(String(8), index=True, nullable=False)
+    start_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    end_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    created_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    updated_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    archived_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+
+class AvailabilityRequestArchive(Base):
+    """Expired requests moved out of availability_requests by jobs.archive."""
+
+    __tablename__ = "availability_requests_archive"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    # availability_requests.id of the archived row (what matches.request_id still points at)
+    slot_id: Mapped[int] = mapped_column(Integer, index=True, nullable=False)
+    user_id: Mapped[str] = mapped_column(String(8), index=True, nullable=False)
+    start_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    end_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    created_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    updated_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    archived_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+
+class AvailabilityRule(Base):
+    """A recurring offer or request, stored once and expanded on read (see services.recurrence)."""
+
+    __tablename__ = "availability_rules"
+    __table_args__ = (
+        # Matching looks up rules of one kind whose occurrences may overlap a window
+        Index('ix_availability_rules_kind_start_ends', 'kind', 'start_at', 'ends_at'),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    user_id: Mapped[str] = mapped_column(ForeignKey("users.id"), index=True, nullable=False)
+    kind: Mapped[str] = mapped_column(String(10), nullable=False)  # offer | request
+    # First occurrence; its length is every occurrence's length
+    start_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    end_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    freq: Mapped[str] = mapped_column(String(10), nullable=False)  # daily | weekly
+    interval: Mapped[int] = mapped_column(Integer, default=1, nullable=False)
+    # Comma-separated weekday numbers, 0 = Monday; empty means start_at's weekday (weekly) / every day (daily)
+    weekdays: Mapped[str] = mapped_column(String(20), default="", nullable=False)
+    until: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    count: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    # End of the last occurrence (an upper bound), null for open-ended rules
+    ends_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+    user: Mapped[User] = relationship(back_populates="rules")
+
+
+class Match(Base):
+    """An offer/request pair that was matched, and notified, once (see services.matches).
+
+    Each side is identified by owner and window rather than row id, so re-running
+    matching or deleting and re-posting a slot finds the existing pair. The ids
+    point at the slot (or rule) currently behind each side; they are cleared when
+    it is deleted and set again if it is re-posted.
+    """
+
+    __tablename__ = "matches"
+    __table_args__ = (
+        UniqueConstraint(
+            'offer_user_id', 'offer_start_at', 'offer_end_at', 'request_user_id', 'request_start_at', 'request_end_at',
+            name='uq_matches_pair',
+        ),
+        # A user's matches on either side, keyset-paginated on (request_start_at, id)
+        Index('ix_matches_offer_user_start', 'offer_user_id', 'request_start_at', 'id'),
+        Index('ix_matches_request_user_start', 'request_user_id', 'request_start_at', 'id'),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    offer_id: Mapped[int | None] = mapped_column(Integer, nullable=True, index=True)
+    offer_rule_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    offer_user_id: Mapped[str] = mapped_column(ForeignKey("users.id"), nullable=False)
+    offer_start_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    offer_end_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    request_id: Mapped[int | None] = mapped_column(Integer, nullable=True, index=True)
+    request_rule_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    request_user_id: Mapped[str] = mapped_column(ForeignKey("users.id"), nullable=False)
+    request_start_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    request_end_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+
 class Notification(Base):
     __tablename__ = "notifications"
+    __table_args__ = (
+        # Keyset pagination of a user's notifications on (created_at, id)
+        # (also serves lookups by user_id alone, so the column has no index of its own)
+        Index('ix_notifications_user_created', 'user_id', 'created_at', 'id'),
+        # unread_only listings, their totals and read-all only visit unread rows.
+        # Queries must filter with ``is_read == false()`` for the predicate to apply
+        Index(
+            'ix_notifications_user_unread', 'user_id', 'created_at', 'id',
+            postgresql_where=text('is_read = false'), sqlite_where=text('is_read = 0'),
+        ),
+        # The retention job deletes the oldest read notifications first
+        Index(
+            'ix_notifications_read_created', 'created_at',
+            postgresql_where=text('is_read = true'), sqlite_where=text('is_read = 1'),
+        ),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
-    user_id: Mapped[str] = mapped_column(ForeignKey("users.id"), index=True, nullable=False)
+    user_id: Mapped[str] = mapped_column(ForeignKey("users.id"), nullable=False)
     message: Mapped[str] = mapped_column(Text, nullable=False)
     is_read: Mapped[bool] = mapped_column(Boolean, default=False)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
@@ -70,12 +207,55 @@ class Notification(Base):
     user: Mapped[User] = relationship(back_populates="notifications")
 
 
+class EmailOutbox(Base):
+    __tablename__ = "email_outbox"
+    __table_args__ = (
+        Index('ix_email_outbox_status_next_attempt', 'status', 'next_attempt_at'),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    to_email: Mapped[str] = mapped_column(String(254), nullable=False)
+    subject: Mapped[str] = mapped_column(String(255), nullable=False)
+    body: Mapped[str] = mapped_column(Text, nullable=False)
+    # pending | sent | failed
+    status: Mapped[str] = mapped_column(String(16), default="pending", nullable=False)
+    attempts: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    next_attempt_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    sent_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+
+
+class ImageJob(Base):
+    __tablename__ = "image_jobs"
+    __table_args__ = (
+        Index('ix_image_jobs_status_next_attempt', 'status', 'next_attempt_at'),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    dog_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    # Stored upload to render, and the photo_url the variants are attached to
+    key: Mapped[str] = mapped_column(String(255), nullable=False)
+    url: Mapped[str] = mapped_column(Text, nullable=False)
+    # pending | done | failed
+    status: Mapped[str] = mapped_column(String(16), default="pending", nullable=False)
+    attempts: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    next_attempt_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+
+
 class Dog(Base):
     __tablename__ = "dogs"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     name: Mapped[str] = mapped_column(String(100), nullable=False)
     photo_url: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # Variants of an uploaded photo_url, filled in by services.images once generated
+    photo_thumb_url: Mapped[str | None] = mapped_column(Text, nullable=True)
+    photo_webp_url: Mapped[str | None] = mapped_column(Text, nullable=True)
+    photo_avif_url: Mapped[str | None] = mapped_column(Text, nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
 
     user_links: Mapped[list["UserDog"]] = relationship(back_populates="dog", cascade="all, delete-orphan")
@@ -96,3 +276,19 @@ class UserDog(Base):
 
     user: Mapped[User] = relationship(back_populates="dog_links")
     dog: Mapped[Dog] = relationship(back_populates="user_links")
+
+
+class Blob(Base):
+    """Reference count of a content-addressed upload (see services.blobs)."""
+
+    __tablename__ = "blobs"
+    __table_args__ = (
+        # jobs.sweep_uploads looks for stale unreferenced uploads
+        Index('ix_blobs_refcount_touched', 'refcount', 'touched_at'),
+    )
+
+    key: Mapped[str] = mapped_column(String(255), primary_key=True)
+    refcount: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    # Last time an upload wrote, reused or confirmed the object (see blobs.touch)
+    touched_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
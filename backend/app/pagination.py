@@ -0,0 +1,99 @@
+from __future__ import annotations
+import base64
+import binascii
+import heapq
+import json
+from datetime import datetime
+from itertools import islice
+
+from fastapi import HTTPException
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Query
+
+
+MAX_PAGE_SIZE = 100
+
+
+def encode_cursor(sort_value: datetime, row_id: int) -> str:
+    raw = json.dumps([sort_value.isoformat(), row_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        sort_value, row_id = json.loads(raw)
+        return datetime.fromisoformat(sort_value), int(row_id)
+    except (binascii.Error, ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def paginate(
+    q: Query,
+    sort_col,
+    id_col,
+    *,
+    descending: bool,
+    page: int,
+    page_size: int,
+    cursor: str | None,
+    include_total: bool,
+    extra: list | None = None,
+) -> tuple[list, dict]:
+    """Page through ``q`` ordered by ``(sort_col, id_col)``.
+
+    With ``cursor`` the page starts right after the encoded ``(sort value, id)`` key,
+    which a composite index on ``(owner, sort_col, id)`` resolves without skipping
+    rows; otherwise ``page`` is used as an OFFSET. Both modes return ``next_cursor``,
+    so clients can switch to keyset paging after the first page.
+
+    ``extra`` rows that are not in the table (e.g. expanded recurring rules) are
+    merged into the same order; they need the same two attributes, with ids that
+    don't collide with the table's.
+    """
+    page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+    total = q.order_by(None).count() if include_total else None
+    if total is not None and extra:
+        total += len(extra)
+    key = tuple_(sort_col, id_col)
+    if descending:
+        q = q.order_by(sort_col.desc(), id_col.desc())
+    else:
+        q = q.order_by(sort_col.asc(), id_col.asc())
+    meta: dict = {"total": total, "page_size": page_size}
+    skip = 0
+    if cursor:
+        after = decode_cursor(cursor)
+        q = q.filter(key < after if descending else key > after)
+    else:
+        page = max(page, 1)
+        skip = (page - 1) * page_size
+        meta["page"] = page
+    if extra:
+        def row_key(row) -> tuple:
+            return getattr(row, sort_col.key), getattr(row, id_col.key)
+
+        extra = sorted(extra, key=row_key, reverse=descending)
+        if cursor:
+            extra = [r for r in extra if (row_key(r) < after if descending else row_key(r) > after)]
+        # The offset applies to the merged sequence, so the table side can't skip on its own
+        merged = heapq.merge(q.limit(skip + page_size + 1).all(), extra, key=row_key, reverse=descending)
+        rows = list(islice(merged, skip, skip + page_size + 1))
+    else:
+        rows = q.offset(skip).limit(page_size + 1).all()
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    last = rows[-1] if rows else None
+    meta["next_cursor"] = encode_cursor(getattr(last, sort_col.key), getattr(last, id_col.key)) if has_more else None
+    return rows, meta
+
+
+def page_response(items: list[dict], meta: dict) -> ORJSONResponse:
+    """Serialize a page of plain row dicts straight to JSON.
+
+    Routes still declare the page model as ``response_model`` for the schema, but
+    returning a response makes FastAPI skip validating and re-encoding every row;
+    orjson writes the datetimes itself (same ISO format as ``isoformat()``).
+    """
+    return ORJSONResponse({"items": items, **meta})
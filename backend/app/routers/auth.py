@@ -1,107 +1,112 @@
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
-import os
 import re
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 
-from ..db import get_db
+from ..db import DbSession, get_session, run_db
 from ..models import User, Dog, UserDog
 from ..schemas import Token, UserCreate, UserOut
-from ..security import hash_password, verify_password, create_access_token
-from ..services import storage as storage_mod
-from ..services.email import send_email
+from ..security import hash_password_async, verify_password_async, create_access_token
+from ..services import blobs, images
+from ..services.image_jobs import enqueue_variants
+from ..services.outbox import enqueue_email
+from ..services.storage import StoredFile
+from ..uploads import save_upload
 
 
 router = APIRouter()
 
 
-@router.post("/register", response_model=UserOut)
-def register(user_in: UserCreate, db: Session = Depends(get_db)):
-    if db.query(User).filter(User.email == user_in.email).first():
-        raise HTTPException(status_code=400, detail="Email already registered")
+def _email_taken(db: Session, email: str) -> bool:
+    return db.query(User.id).filter(User.email == email).first() is not None
+
+
+def _create_user(
+    db: Session,
+    email: str,
+    password_hash: str,
+    location_lat: float | None,
+    location_lng: float | None,
+    dog_name: str | None,
+    photo: StoredFile | None = None,
+) -> tuple[User, int | None]:
     user = User(
-        email=user_in.email,
-        password_hash=hash_password(user_in.password),
-        location_lat=user_in.location_lat,
-        location_lng=user_in.location_lng,
+        email=email,
+        password_hash=password_hash,
+        location_lat=location_lat,
+        location_lng=location_lng,
     )
     db.add(user)
     db.flush()  # get user id
 
     # Optional: create a Dog linked to the user if dog_name provided
-    if user_in.dog_name:
-        name = user_in.dog_name.upper()
-        dog = Dog(name=name)
+    dog_id = None
+    if dog_name:
+        dog = Dog(name=dog_name, photo_url=photo.url if photo else None)
         db.add(dog)
         db.flush()
         db.add(UserDog(user_id=user.id, dog_id=dog.id, is_owner=True))
+        if photo:
+            blobs.acquire(db, [photo.url])
+            if images.enabled():
+                enqueue_variants(db, dog.id, photo.key, photo.url)
+        dog_id = dog.id
 
+    # Welcome email (simple bilingual)
+    enqueue_email(db, user.email, "Bienvenue / Welcome to Miguafi", "Bienvenue chez Miguafi!\nWelcome to Miguafi!")
     db.commit()
     db.refresh(user)
-    # Welcome email (simple bilingual)
-    send_email(user.email, "Bienvenue / Welcome to Miguafi", "Bienvenue chez Miguafi!\nWelcome to Miguafi!")
+    return user, dog_id
+
+
+@router.post("/register", response_model=UserOut)
+async def register(user_in: UserCreate, db: DbSession = Depends(get_session)):
+    if await run_db(db, _email_taken, user_in.email):
+        raise HTTPException(status_code=400, detail="Email already registered")
+    # Awaited on the hashing pool, so the event loop keeps serving other requests
+    password_hash = await hash_password_async(user_in.password)
+    dog_name = user_in.dog_name.upper() if user_in.dog_name else None
+    user, _ = await run_db(
+        db, _create_user, user_in.email, password_hash, user_in.location_lat, user_in.location_lng, dog_name
+    )
     return user
 
 
 @router.post("/register-multipart", response_model=UserOut)
-def register_multipart(
+async def register_multipart(
     email: str = Form(...),
     password: str = Form(...),
     dog_name: str | None = Form(default=None),
     location_lat: float | None = Form(default=None),
     location_lng: float | None = Form(default=None),
     file: UploadFile | None = File(default=None),
-    db: Session = Depends(get_db),
+    db: DbSession = Depends(get_session),
 ):
-    if db.query(User).filter(User.email == email).first():
+    if await run_db(db, _email_taken, email):
         raise HTTPException(status_code=400, detail="Email already registered")
 
-    user = User(
-        email=email,
-        password_hash=hash_password(password),
-        location_lat=location_lat,
-        location_lng=location_lng,
-    )
-    db.add(user)
-    db.flush()
-
-    photo_url: str | None = None
-    if file is not None:
-        if not file.content_type or not file.content_type.startswith("image/"):
-            raise HTTPException(status_code=400, detail="Only image uploads are allowed")
-        # Enforce max size 10MB
-        try:
-            file.file.seek(0, os.SEEK_END)
-            size = file.file.tell()
-            file.file.seek(0)
-        except Exception:
-            size = 0
-        if size > 10 * 1024 * 1024:
-            raise HTTPException(status_code=400, detail="Image too large (max 10MB)")
-        storage = storage_mod.get_storage()
-        filename = file.filename or "upload"
-        photo_url = storage.save(file.file, filename, content_type=file.content_type)
-
     if dog_name:
-        name = dog_name.upper()
+        dog_name = dog_name.upper()
         # Validate pattern: uppercase letters/digits ending with two digits
-        if not re.fullmatch(r"^[A-Z0-9]{1,98}[0-9]{2}$", name):
+        if not re.fullmatch(r"^[A-Z0-9]{1,98}[0-9]{2}$", dog_name):
             raise HTTPException(status_code=400, detail="Invalid dog name format")
-        dog = Dog(name=name, photo_url=photo_url)
-        db.add(dog)
-        db.flush()
-        db.add(UserDog(user_id=user.id, dog_id=dog.id, is_owner=True))
 
-    db.commit()
-    db.refresh(user)
-    send_email(user.email, "Bienvenue / Welcome to Miguafi", "Bienvenue chez Miguafi!\nWelcome to Miguafi!")
+    password_hash = await hash_password_async(password)
+
+    stored = await save_upload(file) if file is not None else None
+    # A photo without a dog to attach it to stays unreferenced and is swept (jobs.sweep_uploads)
+    user, _ = await run_db(db, _create_user, email, password_hash, location_lat, location_lng, dog_name, stored)
     return user
 
 
+def _find_user(db: Session, email: str) -> tuple[str, str] | None:
+    return db.query(User.id, User.password_hash).filter(User.email == email).first()
+
+
 @router.post("/login", response_model=Token)
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == form_data.username).first()
-    if not user or not verify_password(form_data.password, user.password_hash):
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: DbSession = Depends(get_session)):
+    user = await run_db(db, _find_user, form_data.username)
+    if not user or not await verify_password_async(form_data.password, user.password_hash):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
 
     access_token = create_access_token(subject=user.id)
@@ -1,13 +1,23 @@
-from datetime import datetime
+import bisect
+from datetime import datetime, timedelta
+from itertools import islice
+from typing import Annotated, Literal, NamedTuple
 from fastapi import APIRouter, Depends, HTTPException, status
-from pydantic import BaseModel
-from sqlalchemy import and_, asc, desc
+from pydantic import BaseModel, Field
+from sqlalchemy import insert, or_
 from sqlalchemy.orm import Session
 
-from ..db import get_db
-from ..models import AvailabilityOffer, AvailabilityRequest, Notification, User
-from .users import get_current_user
-from ..services.email import send_email
+from ..core.config import settings
+from ..db import DbSession, get_session, run_db
+from ..pagination import page_response, paginate
+from ..models import AvailabilityOffer, AvailabilityRequest, AvailabilityRule, Match
+from ..schemas import MatchPage, SlotPage
+from .users import get_current_principal
+from ..services import matches, matching
+from ..services import recurrence
+from ..services.recurrence import occurrences
+from ..services.notifications import notify_many
+from ..services.principal_cache import Principal
 
 
 router = APIRouter()
@@ -22,56 +32,111 @@ class SlotIn(BaseModel):
         return self.end_at > self.start_at
 
 
-def _notify(db: Session, user: User, message: str) -> None:
-    notif = Notification(user_id=user.id, message=message)
-    db.add(notif)
-    send_email(user.email, "Miguafi - Nouvelle correspondance", message)
+class RecurrenceIn(BaseModel):
+    # RRULE-style: the first window, repeated daily/weekly (on ``weekdays``) until ``until`` or ``count`` times
+    start_at: datetime
+    end_at: datetime
+    freq: Literal["daily", "weekly"] = "weekly"
+    # Up to a year between periods (days or weeks); larger gaps aren't a schedule and overflow datetime
+    interval: int = Field(1, ge=1, le=366)
+    weekdays: list[Annotated[int, Field(ge=0, le=6)]] = Field(default_factory=list)  # 0 = Monday
+    until: datetime | None = None
+    count: int | None = Field(None, ge=1, le=10000)
 
 
-def _match_offer(db: Session, offer: AvailabilityOffer) -> None:
-    # Find requests that fit within offer window
-    matches = (
-        db.query(AvailabilityRequest)
-        .filter(
-            and_(
-                AvailabilityRequest.start_at >= offer.start_at,
-                AvailabilityRequest.end_at <= offer.end_at,
-                AvailabilityRequest.user_id != offer.user_id,
-            )
-        )
-        .all()
-    )
-    for req in matches:
-        if req.user:  # Notify requester about offer
-            _notify(db, req.user, f"Une offre correspond à votre demande du {req.start_at} au {req.end_at}.")
+class SlotBatchIn(BaseModel):
+    # Either an explicit list of windows or a recurrence
+    slots: list[SlotIn] = Field(default_factory=list)
+    recurrence: RecurrenceIn | None = None
 
 
-def _match_request(db: Session, request: AvailabilityRequest) -> None:
-    # Find offers that contain the requested window
-    matches = (
-        db.query(AvailabilityOffer)
-        .filter(
-            and_(
-                AvailabilityOffer.start_at <= request.start_at,
-                AvailabilityOffer.end_at >= request.end_at,
-                AvailabilityOffer.user_id != request.user_id,
-            )
-        )
-        .all()
-    )
-    for off in matches:
-        if off.user:  # Notify offer owner about request
-            _notify(db, off.user, f"Une demande correspond à votre offre du {off.start_at} au {off.end_at}.")
+class _Occurrence(NamedTuple):
+    # A rule occurrence listed among one-off slots; the negated rule id keeps (start_at, id) keys unique
+    id: int
+    start_at: datetime
+    end_at: datetime
+    rule_id: int
 
 
-@router.post("/offers", response_model=dict)
-def create_offer(slot: SlotIn, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+_KINDS = {AvailabilityOffer: "offer", AvailabilityRequest: "request"}
+_MODELS = {kind: model for model, kind in _KINDS.items()}
+
+
+def _horizon(now: datetime) -> datetime:
+    return now + timedelta(days=settings.availability_rule_horizon_days)
+
+
+def _location(user: Principal) -> tuple[float, float] | None:
+    if user.location_lat is None or user.location_lng is None:
+        return None
+    return user.location_lat, user.location_lng
+
+
+def _notify_requesters(db: Session, pairs: list[tuple]) -> None:
+    # Only pairs never matched before are notified
+    notify_many(db, (
+        (req.user_id, req.email, f"Une offre correspond à votre demande du {req.start_at} au {req.end_at}.")
+        for _, req in matches.record(db, pairs)
+    ))
+
+
+def _notify_offerers(db: Session, pairs: list[tuple]) -> None:
+    notify_many(db, (
+        (off.user_id, off.email, f"Une demande correspond à votre offre du {off.start_at} au {off.end_at}.")
+        for off, _ in matches.record(db, pairs)
+    ))
+
+
+def _match_offer(db: Session, offer: AvailabilityOffer, near: tuple[float, float] | None) -> None:
+    # Find nearby requests that fit within offer window and notify requesters
+    _notify_requesters(db, [(offer, req) for req in matching.requests_within_offer(db, offer, near)])
+
+
+def _match_request(db: Session, request: AvailabilityRequest, near: tuple[float, float] | None) -> None:
+    # Find nearby offers that contain the requested window and notify offer owners
+    _notify_offerers(db, [(off, request) for off in matching.offers_containing_request(db, request, near)])
+
+
+def _check_slot(slot: SlotIn) -> None:
     if not slot.valid:
         raise HTTPException(status_code=400, detail="Invalid time range")
     # Prevent past and overlapping windows
     now = datetime.utcnow()
     if slot.end_at <= now or slot.start_at <= now:
         raise HTTPException(status_code=400, detail="Time range must be in the future")
+
+
+def _overlaps(slots: list, windows) -> bool:
+    """Whether any ``(start_at, end_at)`` in ``windows`` overlaps one of ``slots`` (sorted, non-overlapping)."""
+    starts = [slot.start_at for slot in slots]
+    for start_at, end_at in windows:
+        pos = bisect.bisect_left(starts, end_at) - 1
+        if pos >= 0 and slots[pos].end_at > start_at:
+            return True
+    return False
+
+
+def _rule_meets(rule: AvailabilityRule, slots: list) -> bool:
+    """Whether an occurrence of ``rule`` overlaps one of ``slots`` (sorted, non-overlapping)."""
+    if rule.count is not None:
+        # At most ``count`` occurrences: expand them once over the slots' span
+        return _overlaps(slots, recurrence.windows(rule, slots[0].start_at, slots[-1].end_at))
+    # Each lookup skips straight to the slot, however far out it is
+    return any(next(recurrence.windows(rule, slot.start_at, slot.end_at), None) is not None for slot in slots)
+
+
+def _rules_overlap(db: Session, user_id: str, kind: str, slots: list[SlotIn]) -> bool:
+    """Whether one of ``user_id``'s ``kind`` rules overlaps one of ``slots`` (sorted, non-overlapping)."""
+    rules = db.query(AvailabilityRule).filter(
+        AvailabilityRule.user_id == user_id,
+        AvailabilityRule.kind == kind,
+        AvailabilityRule.start_at < slots[-1].end_at,
+        or_(AvailabilityRule.ends_at.is_(None), AvailabilityRule.ends_at > slots[0].start_at),
+    )
+    return any(_rule_meets(rule, slots) for rule in rules)
+
+
+def _create_offer(db: Session, current_user: Principal, slot: SlotIn) -> int:
     overlap = (
         db.query(AvailabilityOffer)
         .filter(
@@ -80,27 +145,29 @@ def create_offer(slot: SlotIn, db: Session = Depends(get_db), current_user: User
             AvailabilityOffer.start_at < slot.end_at,
             AvailabilityOffer.end_at > slot.start_at,
         )
+        # Walk ix_*_user_end from the slot's start: ended (or archived) windows are never visited
+        .order_by(AvailabilityOffer.end_at)
         .first()
     )
-    if overlap:
+    if overlap or _rules_overlap(db, current_user.id, "offer", [slot]):
         raise HTTPException(status_code=400, detail="Overlapping offer exists")
     offer = AvailabilityOffer(user_id=current_user.id, start_at=slot.start_at, end_at=slot.end_at)
     db.add(offer)
     db.commit()
     db.refresh(offer)
-    _match_offer(db, offer)
+    matching.index_offer(offer)
+    _match_offer(db, offer, _location(current_user))
     db.commit()
-    return {"id": offer.id}
+    return offer.id
 
 
-@router.post("/requests", response_model=dict)
-def create_request(slot: SlotIn, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    if not slot.valid:
-        raise HTTPException(status_code=400, detail="Invalid time range")
-    # Prevent past and overlapping windows
-    now = datetime.utcnow()
-    if slot.end_at <= now or slot.start_at <= now:
-        raise HTTPException(status_code=400, detail="Time range must be in the future")
+@router.post("/offers", response_model=dict)
+async def create_offer(slot: SlotIn, db: DbSession = Depends(get_session), current_user: Principal = Depends(get_current_principal)):
+    _check_slot(slot)
+    return {"id": await run_db(db, _create_offer, current_user, slot)}
+
+
+def _create_request(db: Session, current_user: Principal, slot: SlotIn) -> int:
     overlap = (
         db.query(AvailabilityRequest)
         .filter(
@@ -108,86 +175,354 @@ def create_request(slot: SlotIn, db: Session = Depends(get_db), current_user: Us
             AvailabilityRequest.start_at < slot.end_at,
             AvailabilityRequest.end_at > slot.start_at,
         )
+        # Walk ix_*_user_end from the slot's start: ended (or archived) windows are never visited
+        .order_by(AvailabilityRequest.end_at)
         .first()
     )
-    if overlap:
+    if overlap or _rules_overlap(db, current_user.id, "request", [slot]):
         raise HTTPException(status_code=400, detail="Overlapping request exists")
     req = AvailabilityRequest(user_id=current_user.id, start_at=slot.start_at, end_at=slot.end_at)
     db.add(req)
     db.commit()
     db.refresh(req)
-    _match_request(db, req)
+    matching.index_request(req)
+    _match_request(db, req, _location(current_user))
     db.commit()
-    return {"id": req.id}
+    return req.id
 
 
-@router.delete("/offers/{offer_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_offer(offer_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+@router.post("/requests", response_model=dict)
+async def create_request(slot: SlotIn, db: DbSession = Depends(get_session), current_user: Principal = Depends(get_current_principal)):
+    _check_slot(slot)
+    return {"id": await run_db(db, _create_request, current_user, slot)}
+
+
+def _batch_slots(batch: SlotBatchIn) -> list[SlotIn]:
+    """The batch's windows sorted by start, after the single-slot checks and an overlap check within the set."""
+    if bool(batch.slots) == (batch.recurrence is not None):
+        raise HTTPException(status_code=400, detail="Provide either slots or a recurrence")
+    limit = settings.availability_batch_max_slots
+    rule = batch.recurrence
+    if rule is None:
+        slots = list(batch.slots)
+    else:
+        if rule.until is None and rule.count is None:
+            raise HTTPException(status_code=400, detail="Recurrence needs until or count")
+        duration = rule.end_at - rule.start_at
+        starts = occurrences(
+            rule.start_at, freq=rule.freq, interval=rule.interval, weekdays=rule.weekdays, until=rule.until, count=rule.count
+        )
+        slots = [SlotIn(start_at=start, end_at=start + duration) for start in islice(starts, limit + 1)]
+    if not slots:
+        raise HTTPException(status_code=400, detail="Recurrence has no occurrences")
+    if len(slots) > limit:
+        raise HTTPException(status_code=400, detail=f"Too many slots (max {limit})")
+    for slot in slots:
+        _check_slot(slot)
+    slots.sort(key=lambda slot: slot.start_at)
+    for prev, slot in zip(slots, slots[1:]):
+        if slot.start_at < prev.end_at:
+            raise HTTPException(status_code=400, detail="Slots in the batch overlap")
+    return slots
+
+
+def _insert_batch(db: Session, model, user_id: str, slots: list[SlotIn], overlap_detail: str) -> list:
+    # One query fetches every existing window the batch could overlap; the sorted,
+    # non-overlapping batch is then checked against them by bisecting on start
+    existing = (
+        db.query(model.start_at, model.end_at)
+        .filter(model.user_id == user_id, model.start_at < slots[-1].end_at, model.end_at > slots[0].start_at)
+        .order_by(model.end_at)
+        .all()
+    )
+    if _overlaps(slots, existing) or _rules_overlap(db, user_id, _KINDS[model], slots):
+        raise HTTPException(status_code=400, detail=overlap_detail)
+    # One multi-row INSERT (insertmanyvalues); plain RETURNING rows don't expire on commit
+    rows = db.execute(
+        insert(model).returning(model.id, model.user_id, model.start_at, model.end_at),
+        [{"user_id": user_id, "start_at": slot.start_at, "end_at": slot.end_at} for slot in slots],
+    ).all()
+    db.commit()
+    return rows
+
+
+def _create_offers(db: Session, current_user: Principal, slots: list[SlotIn]) -> list[int]:
+    offers = _insert_batch(db, AvailabilityOffer, current_user.id, slots, "Overlapping offer exists")
+    for offer in offers:
+        matching.index_offer(offer)
+    # One matching pass for the whole set
+    _notify_requesters(db, matching.requests_within_offers(db, offers, _location(current_user)))
+    db.commit()
+    return [offer.id for offer in offers]
+
+
+@router.post("/offers/batch", response_model=dict)
+async def create_offers(batch: SlotBatchIn, db: DbSession = Depends(get_session), current_user: Principal = Depends(get_current_principal)):
+    slots = _batch_slots(batch)
+    return {"ids": await run_db(db, _create_offers, current_user, slots)}
+
+
+def _create_requests(db: Session, current_user: Principal, slots: list[SlotIn]) -> list[int]:
+    requests = _insert_batch(db, AvailabilityRequest, current_user.id, slots, "Overlapping request exists")
+    for req in requests:
+        matching.index_request(req)
+    _notify_offerers(db, [(off, req) for req, off in matching.offers_containing_requests(db, requests, _location(current_user))])
+    db.commit()
+    return [req.id for req in requests]
+
+
+@router.post("/requests/batch", response_model=dict)
+async def create_requests(batch: SlotBatchIn, db: DbSession = Depends(get_session), current_user: Principal = Depends(get_current_principal)):
+    slots = _batch_slots(batch)
+    return {"ids": await run_db(db, _create_requests, current_user, slots)}
+
+
+def _check_rule(rule: RecurrenceIn) -> None:
+    _check_slot(SlotIn(start_at=rule.start_at, end_at=rule.end_at))
+    # Keeps a rule's own occurrences from overlapping each other
+    if rule.end_at - rule.start_at > timedelta(days=1):
+        raise HTTPException(status_code=400, detail="Recurring slots can't be longer than a day")
+    starts = occurrences(
+        rule.start_at, freq=rule.freq, interval=rule.interval, weekdays=rule.weekdays, until=rule.until, count=rule.count
+    )
+    if next(starts, None) is None:
+        raise HTTPException(status_code=400, detail="Recurrence has no occurrences")
+
+
+def _rule_overlaps(db: Session, rule: AvailabilityRule) -> bool:
+    """Whether ``rule`` overlaps one of its owner's one-off slots or rules of the same kind."""
+    model = _MODELS[rule.kind]
+    slots = db.query(model.start_at, model.end_at).filter(model.user_id == rule.user_id, model.end_at > rule.start_at)
+    others = db.query(AvailabilityRule).filter(
+        AvailabilityRule.user_id == rule.user_id,
+        AvailabilityRule.kind == rule.kind,
+        or_(AvailabilityRule.ends_at.is_(None), AvailabilityRule.ends_at > rule.start_at),
+    )
+    if rule.ends_at is not None:
+        slots = slots.filter(model.start_at < rule.ends_at)
+        others = others.filter(AvailabilityRule.start_at < rule.ends_at)
+    slots = slots.order_by(model.start_at).all()
+    if slots and _rule_meets(rule, slots):
+        return True
+    return any(recurrence.overlaps(rule, other) for other in others)
+
+
+def _create_rule(db: Session, current_user: Principal, kind: str, payload: RecurrenceIn) -> int:
+    rule = AvailabilityRule(
+        user_id=current_user.id,
+        kind=kind,
+        start_at=payload.start_at,
+        end_at=payload.end_at,
+        freq=payload.freq,
+        interval=payload.interval,
+        weekdays=recurrence.format_weekdays(payload.weekdays),
+        until=payload.until,
+        count=payload.count,
+    )
+    rule.ends_at = recurrence.last_end(rule)
+    if _rule_overlaps(db, rule):
+        raise HTTPException(status_code=400, detail=f"Overlapping {kind} exists")
+    db.add(rule)
+    db.commit()
+    db.refresh(rule)
+    # Match the occurrences inside the horizon, in one pass like a batch
+    now = datetime.utcnow()
+    windows = [matching.Window(rule.user_id, s, e, rule.id) for s, e in recurrence.windows(rule, now, _horizon(now))]
+    near = _location(current_user)
+    if kind == "offer":
+        _notify_requesters(db, matching.requests_within_offers(db, windows, near))
+    else:
+        _notify_offerers(db, [(off, req) for req, off in matching.offers_containing_requests(db, windows, near)])
+    db.commit()
+    return rule.id
+
+
+@router.post("/offers/rules", response_model=dict)
+async def create_offer_rule(payload: RecurrenceIn, db: DbSession = Depends(get_session), current_user: Principal = Depends(get_current_principal)):
+    _check_rule(payload)
+    return {"id": await run_db(db, _create_rule, current_user, "offer", payload)}
+
+
+@router.post("/requests/rules", response_model=dict)
+async def create_request_rule(payload: RecurrenceIn, db: DbSession = Depends(get_session), current_user: Principal = Depends(get_current_principal)):
+    _check_rule(payload)
+    return {"id": await run_db(db, _create_rule, current_user, "request", payload)}
+
+
+def _list_rules(db: Session, user_id: str) -> list[dict]:
+    rules = db.query(AvailabilityRule).filter(AvailabilityRule.user_id == user_id).order_by(AvailabilityRule.id).all()
+    return [
+        {
+            "id": r.id,
+            "kind": r.kind,
+            "start_at": r.start_at,
+            "end_at": r.end_at,
+            "freq": r.freq,
+            "interval": r.interval,
+            "weekdays": recurrence.parse_weekdays(r.weekdays),
+            "until": r.until,
+            "count": r.count,
+        }
+        for r in rules
+    ]
+
+
+@router.get("/rules/mine", response_model=dict)
+async def my_rules(db: DbSession = Depends(get_session), current_user: Principal = Depends(get_current_principal)):
+    return {"items": await run_db(db, _list_rules, current_user.id)}
+
+
+def _delete_rule(db: Session, user_id: str, rule_id: int) -> None:
+    obj = db.get(AvailabilityRule, rule_id)
+    if not obj or obj.user_id != user_id:
+        raise HTTPException(status_code=404, detail="Rule not found")
+    matches.unlink_rule(db, obj.kind, obj.id)
+    db.delete(obj)
+    db.commit()
+
+
+@router.delete("/rules/{rule_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_rule(rule_id: int, db: DbSession = Depends(get_session), current_user: Principal = Depends(get_current_principal)):
+    await run_db(db, _delete_rule, current_user.id, rule_id)
+    return
+
+
+def _delete_offer(db: Session, user_id: str, offer_id: int) -> None:
     obj = db.get(AvailabilityOffer, offer_id)
-    if not obj or obj.user_id != current_user.id:
+    if not obj or obj.user_id != user_id:
         raise HTTPException(status_code=404, detail="Offer not found")
+    matching.unindex_offer(obj)
+    matches.unlink_slot(db, "offer", obj.id)
     db.delete(obj)
     db.commit()
+
+
+@router.delete("/offers/{offer_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_offer(offer_id: int, db: DbSession = Depends(get_session), current_user: Principal = Depends(get_current_principal)):
+    await run_db(db, _delete_offer, current_user.id, offer_id)
     return
 
 
-@router.delete("/requests/{request_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_request(request_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+def _delete_request(db: Session, user_id: str, request_id: int) -> None:
     obj = db.get(AvailabilityRequest, request_id)
-    if not obj or obj.user_id != current_user.id:
+    if not obj or obj.user_id != user_id:
         raise HTTPException(status_code=404, detail="Request not found")
+    matching.unindex_request(obj)
+    matches.unlink_slot(db, "request", obj.id)
     db.delete(obj)
     db.commit()
+
+
+@router.delete("/requests/{request_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_request(request_id: int, db: DbSession = Depends(get_session), current_user: Principal = Depends(get_current_principal)):
+    await run_db(db, _delete_request, current_user.id, request_id)
     return
 
 
-@router.get("/offers/mine", response_model=dict)
-def my_offers(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+def _slot_page(
+    db: Session, model, user_id: str, page: int, page_size: int, sort: str, cursor: str | None, include_total: bool
+) -> tuple[list[dict], dict]:
+    q = db.query(model).filter(model.user_id == user_id)
+    # The user's rules of this kind, expanded up to the horizon, are listed like one-off slots
+    now = datetime.utcnow()
+    rules = db.query(AvailabilityRule).filter(AvailabilityRule.user_id == user_id, AvailabilityRule.kind == _KINDS[model]).all()
+    extra = [_Occurrence(-r.id, s, e, r.id) for r in rules for s, e in recurrence.windows(r, now, _horizon(now))]
+    items, meta = paginate(
+        q,
+        model.start_at,
+        model.id,
+        descending=sort.startswith('-'),
+        page=page,
+        page_size=page_size,
+        cursor=cursor,
+        include_total=include_total,
+        extra=extra,
+    )
+    rows = []
+    for r in items:
+        rule_id = getattr(r, "rule_id", None)
+        rows.append({"id": None if rule_id else r.id, "start_at": r.start_at, "end_at": r.end_at, "rule_id": rule_id})
+    return rows, meta
+
+
+@router.get("/offers/mine", response_model=SlotPage)
+async def my_offers(
+    db: DbSession = Depends(get_session),
+    current_user: Principal = Depends(get_current_principal),
     page: int = 1,
     page_size: int = 20,
     sort: str = "-start_at",  # - for desc
+    cursor: str | None = None,
+    include_total: bool = True,
 ):
-    q = db.query(AvailabilityOffer).filter(AvailabilityOffer.user_id == current_user.id)
-    total = q.count()
-    order_col = AvailabilityOffer.start_at
-    order = desc(order_col) if sort.startswith('-') else asc(order_col)
-    items = (
-        q.order_by(order)
-        .offset((page - 1) * page_size)
-        .limit(page_size)
-        .all()
-    )
-    return {
-        "items": [{"id": r.id, "start_at": r.start_at.isoformat(), "end_at": r.end_at.isoformat()} for r in items],
-        "total": total,
-        "page": page,
-        "page_size": page_size,
-    }
+    items, meta = await run_db(db, _slot_page, AvailabilityOffer, current_user.id, page, page_size, sort, cursor, include_total)
+    return page_response(items, meta)
 
 
-@router.get("/requests/mine", response_model=dict)
-def my_requests(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+@router.get("/requests/mine", response_model=SlotPage)
+async def my_requests(
+    db: DbSession = Depends(get_session),
+    current_user: Principal = Depends(get_current_principal),
     page: int = 1,
     page_size: int = 20,
     sort: str = "-start_at",
+    cursor: str | None = None,
+    include_total: bool = True,
 ):
-    q = db.query(AvailabilityRequest).filter(AvailabilityRequest.user_id == current_user.id)
-    total = q.count()
-    order_col = AvailabilityRequest.start_at
-    order = desc(order_col) if sort.startswith('-') else asc(order_col)
-    items = (
-        q.order_by(order)
-        .offset((page - 1) * page_size)
-        .limit(page_size)
-        .all()
-    )
+    items, meta = await run_db(db, _slot_page, AvailabilityRequest, current_user.id, page, page_size, sort, cursor, include_total)
+    return page_response(items, meta)
+
+
+def _match_side(m: Match, prefix: str) -> dict:
     return {
-        "items": [{"id": r.id, "start_at": r.start_at.isoformat(), "end_at": r.end_at.isoformat()} for r in items],
-        "total": total,
-        "page": page,
-        "page_size": page_size,
+        "id": getattr(m, f"{prefix}_id"),
+        "rule_id": getattr(m, f"{prefix}_rule_id"),
+        "user_id": getattr(m, f"{prefix}_user_id"),
+        "start_at": getattr(m, f"{prefix}_start_at"),
+        "end_at": getattr(m, f"{prefix}_end_at"),
     }
+
+
+def _match_page(
+    db: Session, user_id: str, page: int, page_size: int, cursor: str | None, include_total: bool
+) -> tuple[list[dict], dict]:
+    # Upcoming matches whose slots both still exist, on either side of the pair
+    q = db.query(Match).filter(
+        or_(Match.offer_user_id == user_id, Match.request_user_id == user_id),
+        Match.request_end_at > datetime.utcnow(),
+        or_(Match.offer_id.isnot(None), Match.offer_rule_id.isnot(None)),
+        or_(Match.request_id.isnot(None), Match.request_rule_id.isnot(None)),
+    )
+    items, meta = paginate(
+        q,
+        Match.request_start_at,
+        Match.id,
+        descending=False,
+        page=page,
+        page_size=page_size,
+        cursor=cursor,
+        include_total=include_total,
+    )
+    return [
+        {
+            "id": m.id,
+            "role": "offer" if m.offer_user_id == user_id else "request",
+            "offer": _match_side(m, "offer"),
+            "request": _match_side(m, "request"),
+            "created_at": m.created_at,
+        }
+        for m in items
+    ], meta
+
+
+@router.get("/matches/mine", response_model=MatchPage)
+async def my_matches(
+    db: DbSession = Depends(get_session),
+    current_user: Principal = Depends(get_current_principal),
+    page: int = 1,
+    page_size: int = 20,
+    cursor: str | None = None,
+    include_total: bool = True,
+):
+    items, meta = await run_db(db, _match_page, current_user.id, page, page_size, cursor, include_total)
+    return page_response(items, meta)
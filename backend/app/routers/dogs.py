@@ -1,13 +1,16 @@
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
-import os
 from sqlalchemy.orm import Session
 from sqlalchemy import and_
+from starlette.concurrency import run_in_threadpool
 
-from ..db import get_db
+from ..db import DbSession, get_session, run_db
 from ..models import Dog, UserDog, User
-from ..schemas import DogCreate, DogUpdate, DogOut
-from .users import get_current_user
-from ..services import storage as storage_mod
+from ..schemas import DogCreate, DogUpdate, DogOut, PhotoConfirmIn, PhotoUploadIn
+from .users import get_current_principal
+from ..services import blobs, images, storage as storage_mod
+from ..services.image_jobs import enqueue_variants
+from ..services.principal_cache import Principal
+from ..uploads import check_stored_upload, save_upload, upload_url
 
 router = APIRouter()
 
@@ -26,85 +29,153 @@ def _ensure_owner(db: Session, user_id: str, dog_id: int) -> Dog:
     return dog
 
 
-@router.get("/me", response_model=list[DogOut])
-def list_my_dogs(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    rows = (
+def _list_my_dogs(db: Session, user_id: str) -> list[Dog]:
+    return (
         db.query(Dog)
         .join(UserDog, UserDog.dog_id == Dog.id)
-        .filter(UserDog.user_id == current_user.id)
+        .filter(UserDog.user_id == user_id)
         .order_by(Dog.created_at.desc())
         .all()
     )
-    return rows
 
 
-@router.post("/", response_model=DogOut)
-def create_dog(payload: DogCreate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+@router.get("/me", response_model=list[DogOut])
+async def list_my_dogs(db: DbSession = Depends(get_session), current_user: Principal = Depends(get_current_principal)):
+    return await run_db(db, _list_my_dogs, current_user.id)
+
+
+def _check_photo_url(url: str | None) -> None:
+    # Only uploads this API stored can be referenced: their keys are counted and may be deleted
+    if url is not None and storage_mod.get_storage().key_for(url) is None:
+        raise HTTPException(status_code=400, detail="Invalid photo URL")
+
+
+def _create_dog(db: Session, user_id: str, payload: DogCreate) -> Dog:
     dog = Dog(name=payload.name, photo_url=payload.photo_url)
     db.add(dog)
     db.flush()  # get id
-    db.add(UserDog(user_id=current_user.id, dog_id=dog.id, is_owner=True))
+    db.add(UserDog(user_id=user_id, dog_id=dog.id, is_owner=True))
+    blobs.acquire(db, [dog.photo_url])
     db.commit()
     db.refresh(dog)
     return dog
 
 
-@router.put("/{dog_id}", response_model=DogOut)
-def update_dog(dog_id: int, payload: DogUpdate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    dog = _ensure_owner(db, current_user.id, dog_id)
+@router.post("/", response_model=DogOut)
+async def create_dog(payload: DogCreate, db: DbSession = Depends(get_session), current_user: Principal = Depends(get_current_principal)):
+    _check_photo_url(payload.photo_url)
+    return await run_db(db, _create_dog, current_user.id, payload)
+
+
+def _photo_urls(dog: Dog) -> list[str | None]:
+    return [dog.photo_url, dog.photo_thumb_url, dog.photo_webp_url, dog.photo_avif_url]
+
+
+def _replace_photo(db: Session, dog: Dog, url: str) -> list[str]:
+    # Variants belong to the old photo; the pipeline regenerates them for uploads
+    orphaned = blobs.release(db, _photo_urls(dog))
+    dog.photo_url = url
+    dog.photo_thumb_url = dog.photo_webp_url = dog.photo_avif_url = None
+    blobs.acquire(db, [url])
+    return orphaned
+
+
+def _update_dog(db: Session, user_id: str, dog_id: int, payload: DogUpdate) -> tuple[Dog, list[str]]:
+    dog = _ensure_owner(db, user_id, dog_id)
     # Enforce name immutability
     if getattr(payload, "name", None) is not None:
         raise HTTPException(status_code=400, detail="Dog name is immutable")
-    if payload.photo_url is not None:
-        dog.photo_url = payload.photo_url
+    orphaned: list[str] = []
+    if payload.photo_url is not None and payload.photo_url != dog.photo_url:
+        orphaned = _replace_photo(db, dog, payload.photo_url)
     db.add(dog)
     db.commit()
     db.refresh(dog)
+    return dog, orphaned
+
+
+@router.put("/{dog_id}", response_model=DogOut)
+async def update_dog(dog_id: int, payload: DogUpdate, db: DbSession = Depends(get_session), current_user: Principal = Depends(get_current_principal)):
+    _check_photo_url(payload.photo_url)
+    dog, orphaned = await run_db(db, _update_dog, current_user.id, dog_id, payload)
+    await run_in_threadpool(blobs.purge, orphaned)
     return dog
 
 
-@router.delete("/{dog_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_dog(dog_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    dog = _ensure_owner(db, current_user.id, dog_id)
+def _delete_dog(db: Session, user_id: str, dog_id: int) -> list[str]:
+    dog = _ensure_owner(db, user_id, dog_id)
+    orphaned = blobs.release(db, _photo_urls(dog))
     # Cascade via relationships will remove links
     db.delete(dog)
     db.commit()
+    return orphaned
+
+
+@router.delete("/{dog_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_dog(dog_id: int, db: DbSession = Depends(get_session), current_user: Principal = Depends(get_current_principal)):
+    orphaned = await run_db(db, _delete_dog, current_user.id, dog_id)
+    # Photos shared with other dogs keep a reference and stay
+    await run_in_threadpool(blobs.purge, orphaned)
     return
 
 
+def _set_photo(db: Session, dog_id: int, key: str, url: str) -> tuple[Dog, list[str]]:
+    dog = db.get(Dog, dog_id)
+    orphaned = _replace_photo(db, dog, url)
+    db.add(dog)
+    # Variants are built by app.workers.images; until then clients fall back to photo_url
+    if images.enabled():
+        enqueue_variants(db, dog_id, key, url)
+    db.commit()
+    db.refresh(dog)
+    return dog, orphaned
+
+
 @router.post("/{dog_id}/photo", response_model=DogOut)
-def upload_dog_photo(
+async def upload_dog_photo(
     dog_id: int,
     file: UploadFile = File(...),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: DbSession = Depends(get_session),
+    current_user: Principal = Depends(get_current_principal),
 ):
-    dog = _ensure_owner(db, current_user.id, dog_id)
-    if not file.content_type or not file.content_type.startswith("image/"):
-        raise HTTPException(status_code=400, detail="Only image uploads are allowed")
-    try:
-        file.file.seek(0, os.SEEK_END)
-        size = file.file.tell()
-        file.file.seek(0)
-    except Exception:
-        size = 0
-    if size > 10 * 1024 * 1024:
-        raise HTTPException(status_code=400, detail="Image too large (max 10MB)")
-
-    storage = storage_mod.get_storage()
-    # Save with original filename to preserve extension if present
-    filename = file.filename or "upload"
-    url = storage.save(file.file, filename, content_type=file.content_type)
-    dog.photo_url = url
-    db.add(dog)
-    db.commit()
-    db.refresh(dog)
+    await run_db(db, _ensure_owner, current_user.id, dog_id)
+    stored = await save_upload(file)
+    return await _attach_photo(db, dog_id, stored.key, stored.url)
+
+
+async def _attach_photo(db: DbSession, dog_id: int, key: str, url: str) -> Dog:
+    dog, orphaned = await run_db(db, _set_photo, dog_id, key, url)
+    await run_in_threadpool(blobs.purge, orphaned)
     return dog
 
 
-@router.post("/{dog_id}/coowners/{user_id}", status_code=200)
-def add_coowner(dog_id: int, user_id: str, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    _ = _ensure_owner(db, current_user.id, dog_id)
+@router.post("/{dog_id}/photo/upload-url", response_model=dict)
+async def dog_photo_upload_url(
+    dog_id: int,
+    payload: PhotoUploadIn,
+    db: DbSession = Depends(get_session),
+    current_user: Principal = Depends(get_current_principal),
+):
+    # Step 1 of a direct upload: the client sends the bytes to storage, not to the API
+    await run_db(db, _ensure_owner, current_user.id, dog_id)
+    return await run_in_threadpool(upload_url, payload.filename, payload.content_type, payload.size, payload.sha256)
+
+
+@router.post("/{dog_id}/photo/confirm", response_model=DogOut)
+async def confirm_dog_photo(
+    dog_id: int,
+    payload: PhotoConfirmIn,
+    db: DbSession = Depends(get_session),
+    current_user: Principal = Depends(get_current_principal),
+):
+    # Step 2: attach the uploaded (or already stored) object to the dog
+    await run_db(db, _ensure_owner, current_user.id, dog_id)
+    url = await run_in_threadpool(check_stored_upload, payload.key)
+    return await _attach_photo(db, dog_id, payload.key, url)
+
+
+def _add_coowner(db: Session, owner_id: str, dog_id: int, user_id: str) -> None:
+    _ = _ensure_owner(db, owner_id, dog_id)
     if not db.get(User, user_id):
         raise HTTPException(status_code=404, detail="User not found")
     existing = db.query(UserDog).filter(and_(UserDog.user_id == user_id, UserDog.dog_id == dog_id)).first()
@@ -114,15 +185,24 @@ def add_coowner(dog_id: int, user_id: str, db: Session = Depends(get_db), curren
     else:
         db.add(UserDog(user_id=user_id, dog_id=dog_id, is_owner=True))
     db.commit()
+
+
+@router.post("/{dog_id}/coowners/{user_id}", status_code=200)
+async def add_coowner(dog_id: int, user_id: str, db: DbSession = Depends(get_session), current_user: Principal = Depends(get_current_principal)):
+    await run_db(db, _add_coowner, current_user.id, dog_id, user_id)
     return {"status": "ok"}
 
 
-@router.delete("/{dog_id}/coowners/{user_id}", status_code=200)
-def remove_coowner(dog_id: int, user_id: str, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    _ = _ensure_owner(db, current_user.id, dog_id)
+def _remove_coowner(db: Session, owner_id: str, dog_id: int, user_id: str) -> None:
+    _ = _ensure_owner(db, owner_id, dog_id)
     link = db.query(UserDog).filter(and_(UserDog.user_id == user_id, UserDog.dog_id == dog_id)).first()
     if not link:
         raise HTTPException(status_code=404, detail="Link not found")
     db.delete(link)
     db.commit()
+
+
+@router.delete("/{dog_id}/coowners/{user_id}", status_code=200)
+async def remove_coowner(dog_id: int, user_id: str, db: DbSession = Depends(get_session), current_user: Principal = Depends(get_current_principal)):
+    await run_db(db, _remove_coowner, current_user.id, dog_id, user_id)
     return {"status": "ok"}
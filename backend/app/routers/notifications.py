@@ -1,59 +1,95 @@
 from fastapi import APIRouter, Depends
+from sqlalchemy import false
 from sqlalchemy.orm import Session
 
-from ..db import get_db
+from ..db import DbSession, get_session, run_db
 from ..models import Notification, User
-from .users import get_current_user
+from ..pagination import page_response, paginate
+from ..schemas import NotificationPage
+from ..services.notifications import add_unread
+from ..services.principal_cache import Principal
+from .users import get_current_principal
 
 
 router = APIRouter()
 
 
-@router.get("/me", response_model=dict)
-def my_notifications(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+def _notification_page(
+    db: Session, user_id: str, page: int, page_size: int, unread_only: bool, cursor: str | None, include_total: bool
+) -> tuple[list[dict], dict]:
+    q = db.query(Notification).filter(Notification.user_id == user_id)
+    if unread_only:
+        # "= false" rather than "IS false" so ix_notifications_user_unread applies
+        q = q.filter(Notification.is_read == false())
+    items, meta = paginate(
+        q,
+        Notification.created_at,
+        Notification.id,
+        descending=True,
+        page=page,
+        page_size=page_size,
+        cursor=cursor,
+        include_total=include_total,
+    )
+    return [{"id": n.id, "message": n.message, "is_read": n.is_read, "created_at": n.created_at} for n in items], meta
+
+
+@router.get("/me", response_model=NotificationPage)
+async def my_notifications(
+    db: DbSession = Depends(get_session),
+    current_user: Principal = Depends(get_current_principal),
     page: int = 1,
     page_size: int = 20,
     unread_only: bool = False,
+    cursor: str | None = None,
+    include_total: bool = True,
 ):
-    q = db.query(Notification).filter(Notification.user_id == current_user.id)
-    if unread_only:
-        q = q.filter(Notification.is_read.is_(False))
-    total = q.count()
-    items = (
-        q.order_by(Notification.created_at.desc())
-        .offset((page - 1) * page_size)
-        .limit(page_size)
-        .all()
-    )
-    return {
-        "items": [
-            {"id": n.id, "message": n.message, "is_read": n.is_read, "created_at": n.created_at.isoformat()} for n in items
-        ],
-        "total": total,
-        "page": page,
-        "page_size": page_size,
-    }
+    items, meta = await run_db(db, _notification_page, current_user.id, page, page_size, unread_only, cursor, include_total)
+    return page_response(items, meta)
 
 
-@router.put("/{notification_id}/read", response_model=dict)
-def mark_read(notification_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+def _unread_count(db: Session, user_id: str) -> int:
+    # Maintained on the user row: one primary-key lookup, no COUNT over notifications
+    return db.query(User.unread_count).filter(User.id == user_id).scalar() or 0
+
+
+@router.get("/me/unread-count", response_model=dict)
+async def my_unread_count(db: DbSession = Depends(get_session), current_user: Principal = Depends(get_current_principal)):
+    return {"unread_count": await run_db(db, _unread_count, current_user.id)}
+
+
+def _mark_read(db: Session, user_id: str, notification_id: int) -> bool:
     n = db.get(Notification, notification_id)
-    if not n or n.user_id != current_user.id:
-        return {"status": "ignored"}
-    n.is_read = True
-    db.add(n)
+    if not n or n.user_id != user_id:
+        return False
+    # Conditional update so concurrent calls decrement the counter only once
+    changed = db.query(Notification).filter(
+        Notification.id == n.id,
+        Notification.is_read.is_(False)
+    ).update({Notification.is_read: True})
+    add_unread(db, {user_id: -changed})
     db.commit()
+    return True
+
+
+@router.put("/{notification_id}/read", response_model=dict)
+async def mark_read(notification_id: int, db: DbSession = Depends(get_session), current_user: Principal = Depends(get_current_principal)):
+    if not await run_db(db, _mark_read, current_user.id, notification_id):
+        return {"status": "ignored"}
     return {"status": "ok"}
 
 
-@router.post("/me/read-all", response_model=dict)
-def mark_all_read(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+def _mark_all_read(db: Session, user_id: str) -> None:
     # Mark only unread notifications for this user
-    db.query(Notification).filter(
-        Notification.user_id == current_user.id,
-        Notification.is_read.is_(False)
+    changed = db.query(Notification).filter(
+        Notification.user_id == user_id,
+        Notification.is_read == false()
     ).update({Notification.is_read: True})
+    add_unread(db, {user_id: -changed})
     db.commit()
+
+
+@router.post("/me/read-all", response_model=dict)
+async def mark_all_read(db: DbSession = Depends(get_session), current_user: Principal = Depends(get_current_principal)):
+    await run_db(db, _mark_all_read, current_user.id)
     return {"status": "ok"}
@@ -0,0 +1,22 @@
+from fastapi import APIRouter, HTTPException, Request, status
+from jose import JWTError
+
+from ..security import decode_upload_token
+from ..uploads import receive_upload
+
+
+router = APIRouter()
+
+
+@router.put("/{token}", status_code=status.HTTP_204_NO_CONTENT)
+async def put_upload(token: str, request: Request):
+    # Target of the signed URLs handed out for local storage; S3 uploads never reach the API
+    try:
+        claims = decode_upload_token(token)
+    except JWTError:
+        raise HTTPException(status_code=403, detail="Invalid or expired upload URL")
+    stored = await receive_upload(request, claims)
+    if stored.key != claims["key"]:
+        # Stored under its real hash but never attached: removed by jobs.sweep_uploads
+        raise HTTPException(status_code=400, detail="Content does not match the signed checksum")
+    return
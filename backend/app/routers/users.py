@@ -2,42 +2,74 @@ from fastapi import APIRouter, Depends, HTTPException, Header
 from sqlalchemy.orm import Session
 from jose import JWTError
 
-from ..db import get_db
+from ..db import DbSession, get_session, run_db
 from ..models import User
 from ..schemas import UserOut, UserUpdate
 from ..security import decode_access_token
+from ..services.principal_cache import Principal, principal_cache
 
 
 router = APIRouter()
 
 
-def get_current_user(
-    authorization: str | None = Header(default=None), db: Session = Depends(get_db)
-) -> User:
+def _load_principal(db: Session, user_id: str) -> Principal | None:
+    user = db.get(User, user_id)
+    return Principal.from_user(user) if user else None
+
+
+async def get_current_principal(
+    authorization: str | None = Header(default=None), db: DbSession = Depends(get_session)
+) -> Principal:
+    # The session only connects on first use, so cache hits never touch the database
     if not authorization or not authorization.lower().startswith("bearer "):
         raise HTTPException(status_code=401, detail="Missing token")
     token = authorization.split(" ", 1)[1]
+    cached = principal_cache.get(token)
+    if cached is not None:
+        return cached
     try:
         payload = decode_access_token(token)
     except JWTError:
         raise HTTPException(status_code=401, detail="Invalid token")
-    user_id = payload.get("sub")
-    user = db.get(User, user_id)
+    principal = await run_db(db, _load_principal, payload.get("sub"))
+    if principal is None:
+        raise HTTPException(status_code=401, detail="User not found")
+    principal_cache.put(token, principal, payload.get("exp"))
+    return principal
+
+
+def _load_user(db: Session, principal: Principal) -> User:
+    user = db.get(User, principal.id)
     if not user:
+        principal_cache.invalidate_user(principal.id)
         raise HTTPException(status_code=401, detail="User not found")
     return user
 
 
+async def get_current_user(
+    principal: Principal = Depends(get_current_principal), db: DbSession = Depends(get_session)
+) -> User:
+    # For endpoints that need the full row; id-only endpoints use get_current_principal
+    return await run_db(db, _load_user, principal)
+
+
 @router.get("/me", response_model=UserOut)
-def read_me(current_user: User = Depends(get_current_user)):
+async def read_me(current_user: User = Depends(get_current_user)):
     return current_user
 
 
-@router.put("/me", response_model=UserOut)
-def update_me(update: UserUpdate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+def _update_me(db: Session, user: User, update: UserUpdate) -> User:
     for field, value in update.model_dump(exclude_unset=True).items():
-        setattr(current_user, field, value)
-    db.add(current_user)
+        setattr(user, field, value)
+    db.add(user)
     db.commit()
-    db.refresh(current_user)
-    return current_user
+    principal_cache.invalidate_user(user.id)
+    db.refresh(user)
+    return user
+
+
+@router.put("/me", response_model=UserOut)
+async def update_me(
+    update: UserUpdate, db: DbSession = Depends(get_session), current_user: User = Depends(get_current_user)
+):
+    return await run_db(db, _update_me, current_user, update)
@@ -56,6 +56,74 @@ class DogUpdate(BaseModel):
 class DogOut(DogBase):
     id: int
     created_at: datetime
+    # Null until the background image pipeline has processed an uploaded photo
+    photo_thumb_url: Optional[str] = None
+    photo_webp_url: Optional[str] = None
+    photo_avif_url: Optional[str] = None
 
     class Config:
         from_attributes = True
+
+
+# Direct photo uploads
+class PhotoUploadIn(BaseModel):
+    content_type: str
+    size: int = Field(gt=0)
+    sha256: str
+    filename: Optional[str] = None
+
+
+class PhotoConfirmIn(BaseModel):
+    key: str
+
+
+# List pages; see pagination.page_response
+class PageMeta(BaseModel):
+    total: Optional[int] = None
+    page_size: int
+    page: Optional[int] = None
+    next_cursor: Optional[str] = None
+
+
+class SlotOut(BaseModel):
+    # Occurrences of recurring rules have no id of their own, only rule_id
+    id: Optional[int] = None
+    start_at: datetime
+    end_at: datetime
+    rule_id: Optional[int] = None
+
+
+class SlotPage(PageMeta):
+    items: list[SlotOut]
+
+
+class NotificationOut(BaseModel):
+    id: int
+    message: str
+    is_read: bool
+    created_at: datetime
+
+
+class NotificationPage(PageMeta):
+    items: list[NotificationOut]
+
+
+class MatchSide(BaseModel):
+    # id for one-off slots, rule_id for rule occurrences; both null once the slot was deleted
+    id: Optional[int] = None
+    rule_id: Optional[int] = None
+    user_id: str
+    start_at: datetime
+    end_at: datetime
+
+
+class MatchOut(BaseModel):
+    id: int
+    role: str  # offer | request: the caller's side
+    offer: MatchSide
+    request: MatchSide
+    created_at: datetime
+
+
+class MatchPage(PageMeta):
+    items: list[MatchOut]
@@ -1,22 +1,30 @@
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 
-from jose import jwt
-from passlib.context import CryptContext
+from jose import JWTError, jwt
 
 from .core.config import settings
+from .services import hashing
 
 
-pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
 ALGORITHM = "HS256"
 
 
+# Both run on the dedicated hashing pool and raise hashing.HashingBusy when it is saturated
 def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+    return hashing.pool.run(hashing.hash_in_worker, password, settings.password_hash_rounds)
 
 
 def verify_password(password: str, password_hash: str) -> bool:
-    return pwd_context.verify(password, password_hash)
+    return hashing.pool.run(hashing.verify_in_worker, password, password_hash)
+
+
+async def hash_password_async(password: str) -> str:
+    return await hashing.pool.run_async(hashing.hash_in_worker, password, settings.password_hash_rounds)
+
+
+async def verify_password_async(password: str, password_hash: str) -> bool:
+    return await hashing.pool.run_async(hashing.verify_in_worker, password, password_hash)
 
 
 def create_access_token(subject: str, expires_minutes: Optional[int] = None) -> str:
@@ -28,3 +36,20 @@ def create_access_token(subject: str, expires_minutes: Optional[int] = None) ->
 
 def decode_access_token(token: str) -> dict:
     return jwt.decode(token, settings.secret_key, algorithms=[ALGORITHM])
+
+
+# Local-storage direct uploads: the token pins key, size and content type
+UPLOAD_TOKEN_PURPOSE = "upload"
+
+
+def create_upload_token(key: str, size: int, content_type: str) -> str:
+    expire = datetime.now(tz=timezone.utc) + timedelta(seconds=settings.upload_url_expires_seconds)
+    claims = {"purpose": UPLOAD_TOKEN_PURPOSE, "key": key, "size": size, "ct": content_type, "exp": expire}
+    return jwt.encode(claims, settings.secret_key, algorithm=ALGORITHM)
+
+
+def decode_upload_token(token: str) -> dict:
+    claims = jwt.decode(token, settings.secret_key, algorithms=[ALGORITHM])
+    if claims.get("purpose") != UPLOAD_TOKEN_PURPOSE:
+        raise JWTError("Not an upload token")
+    return claims
@@ -0,0 +1,88 @@
+from __future__ import annotations
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Iterable
+
+from sqlalchemy import bindparam, delete, select, update
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..db import SessionLocal, conflict_insert
+from ..models import Blob
+from . import storage as storage_mod
+
+
+# Core table: executemany UPDATE with per-row bind params
+_blobs = Blob.__table__
+
+
+def _keys(urls: Iterable[str | None]) -> Counter:
+    storage = storage_mod.get_storage()
+    return Counter(key for key in (storage.key_for(u) for u in urls if u) if key)
+
+
+def touch(key: str) -> None:
+    """Register ``key`` as in use before its object is written, reused or attached.
+
+    Commits on its own session. A row touched within ``upload_grace_seconds`` is
+    not collected even at refcount 0, which covers the gap between storing an
+    upload and the transaction that acquires it; uploads that are never attached
+    are removed later by ``jobs.sweep_uploads``.
+    """
+    db = SessionLocal()
+    try:
+        now = datetime.utcnow()
+        stmt = conflict_insert(db, Blob)
+        stmt = stmt.on_conflict_do_update(index_elements=[Blob.key], set_={"touched_at": now})
+        db.execute(stmt, [{"key": key, "refcount": 0, "touched_at": now}])
+        db.commit()
+    finally:
+        db.close()
+
+
+def acquire(db: Session, urls: Iterable[str | None]) -> None:
+    """Count one more reference to each stored upload in ``urls``; foreign URLs are ignored."""
+    keys = _keys(urls)
+    if not keys:
+        return
+    stmt = conflict_insert(db, Blob)
+    stmt = stmt.on_conflict_do_update(index_elements=[Blob.key], set_={"refcount": Blob.refcount + stmt.excluded.refcount})
+    db.execute(stmt, [{"key": key, "refcount": n} for key, n in keys.items()])
+
+
+def release(db: Session, urls: Iterable[str | None]) -> list[str]:
+    """Drop references to ``urls`` and return the keys nothing points at anymore.
+
+    Their rows are deleted in the caller's transaction; pass the keys to ``purge``
+    after committing to remove the objects themselves.
+    """
+    keys = _keys(urls)
+    if not keys:
+        return []
+    db.execute(
+        update(_blobs).where(_blobs.c.key == bindparam("b_key")).values(refcount=_blobs.c.refcount - bindparam("b_n")),
+        [{"b_key": key, "b_n": n} for key, n in keys.items()],
+    )
+    # Keys touched just now may be about to be acquired by another upload; the sweep gets them later
+    unused = (Blob.refcount <= 0, Blob.touched_at < datetime.utcnow() - timedelta(seconds=settings.upload_grace_seconds))
+    orphaned = db.scalars(select(Blob.key).where(Blob.key.in_(list(keys)), *unused)).all()
+    if orphaned:
+        db.execute(delete(Blob).where(Blob.key.in_(orphaned), *unused))
+    return list(orphaned)
+
+
+def purge(keys: Iterable[str]) -> None:
+    """Delete stored objects for ``keys`` unless an upload touched or re-acquired them since."""
+    keys = list(keys)
+    if not keys:
+        return
+    db = SessionLocal()
+    try:
+        live = set(db.scalars(select(Blob.key).where(Blob.key.in_(keys))))
+    finally:
+        db.close()
+    storage = storage_mod.get_storage()
+    for key in keys:
+        # Rows written before keys were checked may hold anything; only issued keys are deleted
+        if key not in live and storage.is_key(key):
+            storage.delete(key)
@@ -1,20 +1,176 @@
+from __future__ import annotations
+import queue
 import smtplib
+import threading
 from email.message import EmailMessage
+from typing import Sequence
 
 from ..core.config import settings
+from .circuit import CircuitBreaker, CircuitOpenError
 
 
-def send_email(to_email: str, subject: str, body: str) -> None:
-    host = getattr(settings, "smtp_host", None) or "localhost"
-    port = int(getattr(settings, "smtp_port", 1025))
+# Server rejected one message; the session itself is still usable
+_MESSAGE_ERRORS = (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError)
+
+
+class _Connection:
+    def __init__(self, host: str, port: int, timeout: float) -> None:
+        self.smtp = smtplib.SMTP(host, port, timeout=timeout)
+        self.sent = 0
+
+    def close(self) -> None:
+        try:
+            self.smtp.quit()
+        except Exception:
+            self.smtp.close()
+
+
+class SMTPPool:
+    """Small pool of persistent SMTP sessions.
+
+    At most ``size`` sessions are open at once. A checked-out session sends a whole
+    batch of messages back to back, and is recycled after ``max_messages``.
+    """
+
+    def __init__(self, host: str, port: int, size: int = 4, timeout: float = 3.0, max_messages: int = 100) -> None:
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.max_messages = max_messages
+        self._slots = threading.BoundedSemaphore(size)
+        self._idle: queue.LifoQueue[_Connection] = queue.LifoQueue()
+
+    def _connect(self) -> _Connection:
+        return _Connection(self.host, self.port, self.timeout)
+
+    def send_many(self, messages: Sequence[EmailMessage]) -> list[Exception | None]:
+        """Send ``messages`` over one pooled session; returns a per-message error or None."""
+        results: list[Exception | None] = []
+        with self._slots:
+            try:
+                conn: _Connection | None = self._idle.get_nowait()
+                reused = True
+            except queue.Empty:
+                conn, reused = None, False
+            for msg in messages:
+                error: Exception | None = None
+                # A reused idle session may have been dropped by the server: retry once on a fresh one
+                for _ in range(2):
+                    try:
+                        if conn is None:
+                            conn, reused = self._connect(), False
+                        conn.smtp.send_message(msg)
+                        conn.sent += 1
+                        error = None
+                        break
+                    except _MESSAGE_ERRORS as exc:
+                        error = exc
+                        break
+                    except (smtplib.SMTPException, OSError) as exc:
+                        error = exc
+                        if conn is not None:
+                            conn.close()
+                        conn = None
+                        if not reused:
+                            break
+                        reused = False
+                results.append(error)
+                if conn is None and error is not None:
+                    # Could not even connect: fail the rest fast instead of timing out per message
+                    results.extend([error] * (len(messages) - len(results)))
+                    break
+                if conn is not None and conn.sent >= self.max_messages:
+                    conn.close()
+                    conn = None
+            if conn is not None:
+                self._idle.put(conn)
+        return results
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+_pool: SMTPPool | None = None
+_pool_lock = threading.Lock()
+
+breaker = CircuitBreaker(
+    "smtp",
+    failure_threshold=settings.email_breaker_failure_threshold,
+    reset_timeout=settings.email_breaker_reset_seconds,
+)
+
+
+def get_transport() -> SMTPPool:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = SMTPPool(
+                    settings.smtp_host,
+                    settings.smtp_port,
+                    size=settings.smtp_pool_size,
+                    timeout=settings.smtp_timeout,
+                    max_messages=settings.smtp_max_messages_per_connection,
+                )
+    return _pool
+
+
+def reset_transport() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+        _pool = None
+
+
+def build_message(to_email: str, subject: str, body: str) -> EmailMessage:
     msg = EmailMessage()
-    msg["From"] = "noreply@miguafi.local"
+    msg["From"] = settings.smtp_from
     msg["To"] = to_email
     msg["Subject"] = subject
     msg.set_content(body)
+    return msg
+
+
+def send_many(messages: Sequence[tuple[str, str, str]]) -> list[Exception | None]:
+    """Send ``(to_email, subject, body)`` tuples over one pooled SMTP session.
+
+    While the SMTP circuit is open every message fails immediately with
+    ``CircuitOpenError`` instead of waiting on a connect timeout.
+    """
+    if not messages:
+        return []
+    if not breaker.allow():
+        error = CircuitOpenError(breaker.name, breaker.retry_in())
+        return [error] * len(messages)
+    try:
+        results = get_transport().send_many([build_message(*m) for m in messages])
+    except BaseException:
+        # Always settle the call allow() admitted, or a half-open probe would block every later send
+        breaker.record_failure()
+        raise
+    # Rejected recipients are the message's fault, not the relay's
+    if any(e is not None and not isinstance(e, _MESSAGE_ERRORS) for e in results):
+        breaker.record_failure()
+    else:
+        breaker.record_success()
+    return results
+
+
+def deliver_email(to_email: str, subject: str, body: str) -> None:
+    # Raises on SMTP failure; callers decide whether to retry
+    error = send_many([(to_email, subject, body)])[0]
+    if error is not None:
+        raise error
+
+
+def send_email(to_email: str, subject: str, body: str) -> None:
     try:
-        with smtplib.SMTP(host, port, timeout=3) as s:
-            s.send_message(msg)
+        deliver_email(to_email, subject, body)
     except Exception:
         # In tests or local dev without SMTP, silently ignore.
         return
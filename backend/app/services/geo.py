@@ -0,0 +1,52 @@
+from __future__ import annotations
+import math
+
+from ..core.config import settings
+
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEG_LAT = 111.32
+
+
+def _cell_deg(cell_km: float) -> float:
+    return cell_km / KM_PER_DEG_LAT
+
+
+def _columns(deg: float) -> int:
+    return math.ceil(360 / deg)
+
+
+def _cell_index(lat: float, lng: float, deg: float) -> tuple[int, int]:
+    # Columns wrap around the antimeridian
+    return math.floor(lat / deg), math.floor((lng + 180) / deg) % _columns(deg)
+
+
+def cell_for(lat: float | None, lng: float | None, cell_km: float | None = None) -> str | None:
+    """Grid cell key stored in ``users.geo_cell`` (square cells in degrees)."""
+    if lat is None or lng is None:
+        return None
+    i, j = _cell_index(lat, lng, _cell_deg(cell_km or settings.geo_cell_km))
+    return f"{i}:{j}"
+
+
+def cells_within(lat: float, lng: float, radius_km: float, cell_km: float | None = None) -> list[str]:
+    """Keys of every cell that may hold a point within ``radius_km`` of (lat, lng)."""
+    cell_km = cell_km or settings.geo_cell_km
+    deg = _cell_deg(cell_km)
+    i0, j0 = _cell_index(lat, lng, deg)
+    lat_rings = math.ceil(radius_km / cell_km)
+    # Longitude degrees shrink towards the poles: size the rings for the most poleward row
+    edge_lat = min(abs(lat) + radius_km / KM_PER_DEG_LAT, 90.0)
+    km_per_deg_lng = KM_PER_DEG_LAT * max(math.cos(math.radians(edge_lat)), 1e-6)
+    columns = _columns(deg)
+    lng_rings = min(math.ceil(radius_km / km_per_deg_lng / deg), columns // 2)
+    cols = sorted({(j0 + dj) % columns for dj in range(-lng_rings, lng_rings + 1)})
+    return [f"{i}:{j}" for i in range(i0 - lat_rings, i0 + lat_rings + 1) for j in cols]
+
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
@@ -0,0 +1,180 @@
+from __future__ import annotations
+import asyncio
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError as FutureTimeout
+from typing import Any, Callable
+
+from passlib.context import CryptContext
+from starlette.concurrency import run_in_threadpool
+
+from ..core.config import settings
+
+
+class HashingBusy(Exception):
+    """Raised when the hashing pool is at capacity or a hash took too long."""
+
+    retry_after = 1
+
+
+_contexts: dict[int, CryptContext] = {}
+
+
+def _context(rounds: int) -> CryptContext:
+    ctx = _contexts.get(rounds)
+    if ctx is None:
+        ctx = _contexts[rounds] = CryptContext(
+            schemes=["pbkdf2_sha256"], deprecated="auto", pbkdf2_sha256__rounds=rounds
+        )
+    return ctx
+
+
+# Run inside pool processes: keep them module-level so they pickle by reference
+def hash_in_worker(password: str, rounds: int) -> str:
+    return _context(rounds).hash(password)
+
+
+def verify_in_worker(password: str, password_hash: str) -> bool:
+    # The hash carries its own rounds; the context's rounds only affect new hashes
+    return _context(settings.password_hash_rounds).verify(password, password_hash)
+
+
+class HashingPool:
+    """Size-capped process pool for CPU-heavy password hashing.
+
+    At most ``max_pending`` calls are admitted at once (running or queued); further
+    calls fail immediately with ``HashingBusy`` instead of tying up request threads.
+    A call that times out frees its slot only once its job has actually finished.
+    With ``workers=0`` admitted calls run inline in the calling thread.
+    """
+
+    def __init__(self, workers: int, max_pending: int, timeout: float) -> None:
+        self.workers = workers
+        self.max_pending = max(max_pending, 1)
+        self.timeout = timeout
+        self._admission = threading.BoundedSemaphore(self.max_pending)
+        self._executor: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.in_flight = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    # spawn: forking a threaded server process is unsafe
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                    )
+        return self._executor
+
+    def _admit(self) -> float:
+        if not self._admission.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise HashingBusy()
+        with self._lock:
+            self.in_flight += 1
+        return time.perf_counter()
+
+    def _release(self, started: float) -> None:
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.in_flight -= 1
+            self.calls += 1
+            self.total_seconds += elapsed
+            self.max_seconds = max(self.max_seconds, elapsed)
+        self._admission.release()
+
+    def _submit(self, started: float, fn: Callable[..., Any], *args: Any) -> tuple[Future, Callable[..., None]]:
+        released = threading.Event()
+
+        def release(_: Future | None = None) -> None:
+            with self._lock:
+                if released.is_set():
+                    return
+                released.set()
+            self._release(started)
+
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except BaseException:
+            release()
+            raise
+        # The slot is held until the job is done (or cancelled while still queued), not
+        # until the caller stops waiting: jobs abandoned on timeout still count as pending
+        future.add_done_callback(release)
+        return future, release
+
+    def _timed_out(self, future: Future) -> HashingBusy:
+        # Drops the job if it hasn't started; a running one keeps its slot until it ends
+        future.cancel()
+        with self._lock:
+            self.timeouts += 1
+        return HashingBusy()
+
+    def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        started = self._admit()
+        if self.workers <= 0:
+            try:
+                return fn(*args)
+            finally:
+                self._release(started)
+        future, release = self._submit(started, fn, *args)
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            raise self._timed_out(future)
+        finally:
+            # Settle now rather than whenever the pool's thread runs the callback
+            if future.done():
+                release()
+
+    async def run_async(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """``run`` for async handlers: awaits the worker without holding a thread."""
+        started = self._admit()
+        if self.workers <= 0:
+            try:
+                return await run_in_threadpool(fn, *args)
+            finally:
+                self._release(started)
+        future, release = self._submit(started, fn, *args)
+        try:
+            # shield: on timeout the job is cancelled explicitly, not just the asyncio wrapper
+            return await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), self.timeout)
+        except asyncio.TimeoutError:
+            raise self._timed_out(future)
+        finally:
+            if future.done():
+                release()
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "in_flight": self.in_flight,
+                "calls": self.calls,
+                "rejected": self.rejected,
+                "timeouts": self.timeouts,
+                "avg_ms": round(self.total_seconds / self.calls * 1000, 2) if self.calls else 0.0,
+                "max_ms": round(self.max_seconds * 1000, 2),
+            }
+
+
+pool = HashingPool(
+    workers=settings.password_hash_workers,
+    max_pending=settings.password_hash_max_pending,
+    timeout=settings.password_hash_timeout_seconds,
+)
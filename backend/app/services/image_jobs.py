@@ -0,0 +1,85 @@
+from __future__ import annotations
+from datetime import datetime, timedelta
+from typing import NamedTuple
+
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..models import ImageJob
+
+
+def enqueue_variants(db: Session, dog_id: int, key: str, url: str) -> None:
+    # Written in the caller's transaction; rendered later by app.workers.images
+    db.add(ImageJob(dog_id=dog_id, key=key, url=url))
+
+
+class ClaimedImageJob(NamedTuple):
+    id: int
+    dog_id: int
+    key: str
+    url: str
+    attempts: int
+    last_error: str | None
+
+
+# Core table: results are written back with one executemany UPDATE per batch
+_jobs = ImageJob.__table__
+
+
+def claim_batch(db: Session, limit: int) -> list[ClaimedImageJob]:
+    """Lease up to ``limit`` due jobs and commit the lease; returns plain tuples."""
+    now = datetime.utcnow()
+    rows = db.execute(
+        select(ImageJob.id, ImageJob.dog_id, ImageJob.key, ImageJob.url, ImageJob.attempts, ImageJob.last_error)
+        .where(ImageJob.status == "pending", ImageJob.next_attempt_at <= now)
+        .order_by(ImageJob.next_attempt_at, ImageJob.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    ).all()
+    claimed = [ClaimedImageJob(*row) for row in rows]
+    if claimed:
+        lease_until = now + timedelta(seconds=settings.image_job_lease_seconds)
+        db.execute(update(_jobs).where(_jobs.c.id.in_([j.id for j in claimed])).values(next_attempt_at=lease_until))
+    db.commit()
+    return claimed
+
+
+def backoff_delay(attempts: int) -> timedelta:
+    seconds = settings.image_job_backoff_seconds * 2 ** max(attempts - 1, 0)
+    return timedelta(seconds=min(seconds, settings.image_job_backoff_max_seconds))
+
+
+def _result(job: ClaimedImageJob, **values) -> dict:
+    # Every result sets the same columns so a batch is one executemany
+    row = {"status": "pending", "attempts": job.attempts, "last_error": job.last_error, "finished_at": None}
+    row.update(values)
+    return {"b_id": job.id, **{f"v_{k}": v for k, v in row.items()}}
+
+
+def mark_done(job: ClaimedImageJob) -> dict:
+    now = datetime.utcnow()
+    return _result(job, status="done", finished_at=now, last_error=None, next_attempt_at=now)
+
+
+def mark_failed(job: ClaimedImageJob, error: str) -> dict:
+    attempts = job.attempts + 1
+    if attempts >= settings.image_job_max_attempts:
+        now = datetime.utcnow()
+        return _result(job, status="failed", attempts=attempts, last_error=error[:1000], finished_at=now, next_attempt_at=now)
+    return _result(
+        job, attempts=attempts, last_error=error[:1000], next_attempt_at=datetime.utcnow() + backoff_delay(attempts)
+    )
+
+
+def save_results(db: Session, results: list[dict]) -> None:
+    """Write back ``mark_done``/``mark_failed`` results; nothing is committed here."""
+    if not results:
+        return
+    columns = ("status", "attempts", "last_error", "finished_at", "next_attempt_at")
+    db.execute(
+        update(_jobs)
+        .where(_jobs.c.id == bindparam("b_id"))
+        .values({c: bindparam(f"v_{c}") for c in columns}),
+        results,
+    )
@@ -0,0 +1,76 @@
+from __future__ import annotations
+import io
+from typing import BinaryIO
+
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..models import Dog
+from . import blobs, storage as storage_mod
+
+try:
+    from PIL import Image, ImageOps, features
+except ImportError:  # Pillow is optional: without it dogs only have the original photo
+    Image = None  # type: ignore[assignment]
+
+
+def enabled() -> bool:
+    return settings.image_variants_enabled and Image is not None
+
+
+def _encode(img, fmt: str, max_px: int) -> bytes:
+    resized = img.copy()
+    resized.thumbnail((max_px, max_px))
+    buf = io.BytesIO()
+    resized.save(buf, format=fmt, quality=settings.image_quality)
+    return buf.getvalue()
+
+
+def render_variants(src: BinaryIO) -> dict[str, tuple[bytes, str, str]]:
+    """Encode an image into ``{name: (data, extension, content type)}`` variants.
+
+    ``thumb`` is a small WebP for list views; ``webp`` (and ``avif`` when Pillow was
+    built with it) are full views bounded to ``image_max_px``.
+    """
+    with Image.open(src) as img:
+        img = ImageOps.exif_transpose(img)
+        if img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGBA" if "A" in img.getbands() else "RGB")
+        variants = {
+            "thumb": (_encode(img, "WEBP", settings.image_thumbnail_px), ".webp", "image/webp"),
+            "webp": (_encode(img, "WEBP", settings.image_max_px), ".webp", "image/webp"),
+        }
+        if features.check("avif"):
+            variants["avif"] = (_encode(img, "AVIF", settings.image_max_px), ".avif", "image/avif")
+    return variants
+
+
+def build_variants(key: str) -> dict[str, str]:
+    """Render and store the variants of the stored upload ``key``; returns ``{name: url}``.
+
+    CPU-bound: app.workers.images runs it in a process pool. Errors propagate so
+    the job is retried.
+    """
+    if Image is None:
+        raise RuntimeError("Pillow is not installed")
+    storage = storage_mod.get_storage()
+    with storage.open(key) as src:
+        variants = render_variants(src)
+    return {
+        name: storage.save(io.BytesIO(data), f"{name}{ext}", content_type=content_type, on_key=blobs.touch).url
+        for name, (data, ext, content_type) in variants.items()
+    }
+
+
+def attach_variants(db: Session, dog_id: int, url: str, urls: dict[str, str]) -> bool:
+    """Point the dog at ``urls`` if its photo is still ``url``; nothing is committed here."""
+    # Skip if another upload replaced the photo in the meantime
+    attached = db.query(Dog).filter(Dog.id == dog_id, Dog.photo_url == url).update({
+        Dog.photo_thumb_url: urls.get("thumb"),
+        Dog.photo_webp_url: urls.get("webp"),
+        Dog.photo_avif_url: urls.get("avif"),
+    })
+    # Variants of a replaced photo stay unreferenced and are swept (jobs.sweep_uploads)
+    if attached:
+        blobs.acquire(db, urls.values())
+    return bool(attached)
@@ -0,0 +1,72 @@
+from __future__ import annotations
+from typing import Iterable
+
+from sqlalchemy import and_, bindparam, update
+from sqlalchemy.orm import Session
+
+from ..db import conflict_insert
+from ..models import Match
+
+
+# Core table: executemany UPDATE with per-row bind params
+_matches = Match.__table__
+_KEY = ("offer_user_id", "offer_start_at", "offer_end_at", "request_user_id", "request_start_at", "request_end_at")
+_IDS = ("offer_id", "offer_rule_id", "request_id", "request_rule_id")
+
+
+def _side(prefix: str, slot) -> dict:
+    # One-off slots (ORM rows, Candidates) have an id; rule occurrences have a rule_id instead
+    rule_id = getattr(slot, "rule_id", None)
+    return {
+        f"{prefix}_id": None if rule_id is not None else slot.id,
+        f"{prefix}_rule_id": rule_id,
+        f"{prefix}_user_id": slot.user_id,
+        f"{prefix}_start_at": slot.start_at,
+        f"{prefix}_end_at": slot.end_at,
+    }
+
+
+def _key(row: dict) -> tuple:
+    return tuple(row[c] for c in _KEY)
+
+
+def record(db: Session, pairs: Iterable[tuple]) -> list[tuple]:
+    """Store ``(offer, request)`` pairs and return the ones that were not recorded before.
+
+    One multi-row INSERT ... ON CONFLICT DO NOTHING on uq_matches_pair; RETURNING
+    tells which pairs are new, so concurrent or repeated matching notifies each pair
+    once. Known pairs are re-pointed at the current slot ids with one executemany
+    UPDATE. Nothing is committed here.
+    """
+    by_key: dict[tuple, tuple] = {}
+    rows: dict[tuple, dict] = {}
+    for offer, request in pairs:
+        row = {**_side("offer", offer), **_side("request", request)}
+        key = _key(row)
+        if key not in rows:
+            rows[key] = row
+            by_key[key] = (offer, request)
+    if not rows:
+        return []
+    stmt = conflict_insert(db, Match).on_conflict_do_nothing(index_elements=list(_KEY))
+    inserted = {tuple(r) for r in db.execute(stmt.returning(*(getattr(Match, c) for c in _KEY)), list(rows.values()))}
+    known = [row for key, row in rows.items() if key not in inserted]
+    if known:
+        db.execute(
+            update(_matches)
+            .where(and_(*(_matches.c[c] == bindparam(f"k_{c}") for c in _KEY)))
+            .values({c: bindparam(f"v_{c}") for c in _IDS}),
+            [{**{f"k_{c}": row[c] for c in _KEY}, **{f"v_{c}": row[c] for c in _IDS}} for row in known],
+        )
+    return [pair for key, pair in by_key.items() if key in inserted]
+
+
+def unlink_slot(db: Session, kind: str, slot_id: int) -> None:
+    """Detach matches from a deleted offer/request; the pairs stay recorded."""
+    column = Match.offer_id if kind == "offer" else Match.request_id
+    db.query(Match).filter(column == slot_id).update({column: None}, synchronize_session=False)
+
+
+def unlink_rule(db: Session, kind: str, rule_id: int) -> None:
+    column = Match.offer_rule_id if kind == "offer" else Match.request_rule_id
+    db.query(Match).filter(column == rule_id).update({column: None}, synchronize_session=False)
@@ -0,0 +1,375 @@
+from __future__ import annotations
+import bisect
+import heapq
+import threading
+from datetime import datetime, timedelta
+from typing import Iterable, NamedTuple
+
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..models import AvailabilityOffer, AvailabilityRequest, AvailabilityRule, User
+from . import geo, recurrence
+
+
+# Upper bound used when bisecting on a start timestamp alone
+_MAX = (datetime.max,)
+# Keep IN (...) lists well below SQLite's bound-parameter limit
+_IN_CHUNK = 500
+_MAX_CELLS = 400
+
+
+class Candidate(NamedTuple):
+    """A matched slot together with its owner's email, fetched in the same query.
+
+    Occurrences of recurring rules have no row of their own: ``id`` is None and
+    ``rule_id`` names the rule.
+    """
+
+    id: int | None
+    user_id: str
+    email: str
+    start_at: datetime
+    end_at: datetime
+    rule_id: int | None = None
+
+
+class Window(NamedTuple):
+    """An occurrence of one of ``user_id``'s rules, matched like a one-off slot."""
+
+    user_id: str
+    start_at: datetime
+    end_at: datetime
+    rule_id: int | None = None
+
+
+class IntervalIndex:
+    """Sorted-endpoint index over availability windows.
+
+    Entries are ``(start_at, end_at, id, user_id)`` tuples kept sorted by start. The
+    longest window currently indexed bounds how far before a point an enclosing
+    window may start, so both containment lookups only bisect a narrow slice of the
+    list. Spans are kept as a sorted multiset so the bound shrinks again when a long
+    window is removed or pruned. A heap ordered by end lets ``prune`` drop ended
+    windows a few at a time; removed windows stay in it until they end and are
+    skipped then.
+    """
+
+    def __init__(self) -> None:
+        self._entries: list[tuple[datetime, datetime, int, str]] = []
+        self._spans: list[timedelta] = []
+        self._ends: list[tuple[datetime, datetime, int, str]] = []
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def max_span(self) -> timedelta:
+        return self._spans[-1] if self._spans else timedelta(0)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries = []
+            self._spans = []
+            self._ends = []
+
+    def load(self, rows: Iterable[tuple[int, str, datetime, datetime]]) -> None:
+        entries = sorted((start_at, end_at, item_id, user_id) for item_id, user_id, start_at, end_at in rows)
+        spans = sorted(e[1] - e[0] for e in entries)
+        ends = [(end_at, start_at, item_id, user_id) for start_at, end_at, item_id, user_id in entries]
+        heapq.heapify(ends)
+        with self._lock:
+            self._entries = entries
+            self._spans = spans
+            self._ends = ends
+
+    def add(self, item_id: int, user_id: str, start_at: datetime, end_at: datetime) -> None:
+        with self._lock:
+            bisect.insort(self._entries, (start_at, end_at, item_id, user_id))
+            bisect.insort(self._spans, end_at - start_at)
+            heapq.heappush(self._ends, (end_at, start_at, item_id, user_id))
+
+    def remove(self, item_id: int, user_id: str, start_at: datetime, end_at: datetime) -> None:
+        entry = (start_at, end_at, item_id, user_id)
+        with self._lock:
+            pos = bisect.bisect_left(self._entries, entry)
+            if pos < len(self._entries) and self._entries[pos] == entry:
+                del self._entries[pos]
+                del self._spans[bisect.bisect_left(self._spans, end_at - start_at)]
+
+    def prune(self, now: datetime, limit: int | None = None) -> int:
+        """Drop up to ``limit`` windows that ended by ``now``; returns how many were popped."""
+        popped = 0
+        with self._lock:
+            while self._ends and self._ends[0][0] <= now and (limit is None or popped < limit):
+                end_at, start_at, item_id, user_id = heapq.heappop(self._ends)
+                self.remove(item_id, user_id, start_at, end_at)
+                popped += 1
+        return popped
+
+    def within(self, start_at: datetime, end_at: datetime, exclude_user: str | None = None) -> list[int]:
+        """Ids of windows fully inside ``[start_at, end_at]``."""
+        with self._lock:
+            lo = bisect.bisect_left(self._entries, (start_at,))
+            hi = bisect.bisect_right(self._entries, (end_at,) + _MAX)
+            return [
+                item_id
+                for _, e, item_id, user_id in self._entries[lo:hi]
+                if e <= end_at and user_id != exclude_user
+            ]
+
+    def containing(self, start_at: datetime, end_at: datetime, exclude_user: str | None = None) -> list[int]:
+        """Ids of windows that fully contain ``[start_at, end_at]``."""
+        with self._lock:
+            lo = bisect.bisect_left(self._entries, (start_at - self.max_span,))
+            hi = bisect.bisect_right(self._entries, (start_at,) + _MAX)
+            return [
+                item_id
+                for _, e, item_id, user_id in self._entries[lo:hi]
+                if e >= end_at and user_id != exclude_user
+            ]
+
+
+offer_index = IntervalIndex()
+request_index = IntervalIndex()
+_loaded = False
+_load_lock = threading.Lock()
+# Ended windows dropped from each index per lookup, so no request pays for a full sweep
+_PRUNE_STEP = 64
+
+
+def reset_indexes() -> None:
+    global _loaded
+    with _load_lock:
+        offer_index.clear()
+        request_index.clear()
+        _loaded = False
+
+
+def _ensure_loaded(db: Session) -> None:
+    global _loaded
+    if _loaded:
+        now = datetime.utcnow()
+        offer_index.prune(now, _PRUNE_STEP)
+        request_index.prune(now, _PRUNE_STEP)
+        return
+    # Query outside the lock: under an AsyncSession these statements yield to the
+    # event loop, and a second request blocking on the lock would stall it
+    now = datetime.utcnow()
+    loaded = [
+        (index, db.query(model.id, model.user_id, model.start_at, model.end_at).filter(model.end_at > now).all())
+        for model, index in ((AvailabilityOffer, offer_index), (AvailabilityRequest, request_index))
+    ]
+    with _load_lock:
+        if _loaded:
+            return
+        for index, rows in loaded:
+            index.load(rows)
+        _loaded = True
+
+
+def _nearby(q, near: tuple[float, float] | None) -> list:
+    """Rows of ``q`` (which selects the owner's location) within ``match_radius_km`` of ``near``.
+
+    Distance only applies when both sides have a location, so a pair matches the
+    same way whichever of them posts: without ``near`` every row is kept, and
+    owners without a location are kept too. The grid-cell IN list narrows located
+    candidates through ix_users_geo_cell; the haversine check then drops the
+    corners of the covering cells.
+    """
+    radius = settings.match_radius_km
+    if near is None or radius <= 0:
+        return q.all()
+    lat, lng = near
+    cells = geo.cells_within(lat, lng, radius)
+    # A radius spanning too many cells is cheaper to check without the IN list
+    if len(cells) <= _MAX_CELLS:
+        q = q.filter(or_(User.geo_cell.in_(cells), User.geo_cell.is_(None)))
+    return [
+        row for row in q.all()
+        if row.location_lat is None or row.location_lng is None
+        or geo.haversine_km(lat, lng, row.location_lat, row.location_lng) <= radius
+    ]
+
+
+def _candidates(db: Session, model, criteria: list, near: tuple[float, float] | None) -> list[Candidate]:
+    """Slots of ``model`` matching ``criteria``, limited to owners near ``near`` when given.
+
+    Owners are joined in the same statement so callers never lazy-load ``slot.user``.
+    """
+    q = (
+        db.query(model.id, model.user_id, User.email, model.start_at, model.end_at, User.location_lat, User.location_lng)
+        .join(User, User.id == model.user_id)
+        .filter(*criteria)
+    )
+    return [Candidate(*row[:5]) for row in _nearby(q, near)]
+
+
+def _rule_candidates(
+    db: Session, kind: str, start_at: datetime, end_at: datetime, exclude_user: str, near: tuple[float, float] | None
+) -> list[Candidate]:
+    """Occurrences of other users' ``kind`` rules overlapping ``[start_at, end_at)``.
+
+    Only rules that have started by ``end_at`` and have not ended by ``start_at`` are
+    loaded (ix_availability_rules_kind_start_ends), then expanded inside the window,
+    so the cost follows the number of rules, not of stored occurrences.
+    """
+    q = (
+        db.query(AvailabilityRule, User.email, User.location_lat, User.location_lng)
+        .join(User, User.id == AvailabilityRule.user_id)
+        .filter(
+            AvailabilityRule.kind == kind,
+            AvailabilityRule.start_at < end_at,
+            or_(AvailabilityRule.ends_at.is_(None), AvailabilityRule.ends_at > start_at),
+            AvailabilityRule.user_id != exclude_user,
+        )
+    )
+    return [
+        Candidate(None, rule.user_id, email, occ_start, occ_end, rule.id)
+        for rule, email, _, _ in _nearby(q, near)
+        for occ_start, occ_end in recurrence.windows(rule, start_at, end_at)
+    ]
+
+
+def _load_by_ids(db: Session, model, ids: list[int], near: tuple[float, float] | None) -> list[Candidate]:
+    rows = []
+    for i in range(0, len(ids), _IN_CHUNK):
+        rows.extend(_candidates(db, model, [model.id.in_(ids[i:i + _IN_CHUNK])], near))
+    return rows
+
+
+def index_offer(offer: AvailabilityOffer) -> None:
+    if settings.matching_index_enabled and _loaded:
+        offer_index.add(offer.id, offer.user_id, offer.start_at, offer.end_at)
+
+
+def index_request(request: AvailabilityRequest) -> None:
+    if settings.matching_index_enabled and _loaded:
+        request_index.add(request.id, request.user_id, request.start_at, request.end_at)
+
+
+def unindex_offer(offer: AvailabilityOffer) -> None:
+    if settings.matching_index_enabled and _loaded:
+        offer_index.remove(offer.id, offer.user_id, offer.start_at, offer.end_at)
+
+
+def unindex_request(request: AvailabilityRequest) -> None:
+    if settings.matching_index_enabled and _loaded:
+        request_index.remove(request.id, request.user_id, request.start_at, request.end_at)
+
+
+def requests_within_offer(
+    db: Session, offer: AvailabilityOffer, near: tuple[float, float] | None = None
+) -> list[Candidate]:
+    """Requests from other users whose window fits inside the offer.
+
+    ``near`` is the offer owner's (lat, lng); when set, only requesters within
+    ``match_radius_km`` are returned.
+    """
+    if settings.matching_index_enabled:
+        _ensure_loaded(db)
+        ids = request_index.within(offer.start_at, offer.end_at, exclude_user=offer.user_id)
+        found = _load_by_ids(db, AvailabilityRequest, ids, near)
+    else:
+        # Range on start_at is bounded on both sides, served by ix_availability_requests_start_end
+        criteria = [
+            AvailabilityRequest.start_at >= offer.start_at,
+            AvailabilityRequest.start_at < offer.end_at,
+            AvailabilityRequest.end_at <= offer.end_at,
+            AvailabilityRequest.user_id != offer.user_id,
+        ]
+        found = _candidates(db, AvailabilityRequest, criteria, near)
+    return found + [
+        c for c in _rule_candidates(db, "request", offer.start_at, offer.end_at, offer.user_id, near)
+        if c.start_at >= offer.start_at and c.end_at <= offer.end_at
+    ]
+
+
+def offers_containing_request(
+    db: Session, request: AvailabilityRequest, near: tuple[float, float] | None = None
+) -> list[Candidate]:
+    """Offers from other users whose window contains the request."""
+    if settings.matching_index_enabled:
+        _ensure_loaded(db)
+        ids = offer_index.containing(request.start_at, request.end_at, exclude_user=request.user_id)
+        found = _load_by_ids(db, AvailabilityOffer, ids, near)
+    else:
+        # end_at >= request.end_at skips every past offer via ix_availability_offers_end_start
+        criteria = [
+            AvailabilityOffer.end_at >= request.end_at,
+            AvailabilityOffer.start_at <= request.start_at,
+            AvailabilityOffer.user_id != request.user_id,
+        ]
+        found = _candidates(db, AvailabilityOffer, criteria, near)
+    return found + [
+        c for c in _rule_candidates(db, "offer", request.start_at, request.end_at, request.user_id, near)
+        if c.start_at <= request.start_at and c.end_at >= request.end_at
+    ]
+
+
+def requests_within_offers(
+    db: Session, offers: list[AvailabilityOffer], near: tuple[float, float] | None = None
+) -> list[tuple[AvailabilityOffer, Candidate]]:
+    """``(offer, request)`` pairs for a batch of one user's offers or rule windows, in a single pass.
+
+    One range query (or one round of index lookups) spans the whole batch. A user's
+    offers never overlap, so each request fits in at most one of them, found by
+    bisecting on start.
+    """
+    if not offers:
+        return []
+    offers = sorted(offers, key=lambda o: o.start_at)
+    user_id = offers[0].user_id
+    if settings.matching_index_enabled:
+        _ensure_loaded(db)
+        ids = sorted({i for o in offers for i in request_index.within(o.start_at, o.end_at, exclude_user=user_id)})
+        found = _load_by_ids(db, AvailabilityRequest, ids, near)
+    else:
+        criteria = [
+            AvailabilityRequest.start_at >= offers[0].start_at,
+            AvailabilityRequest.start_at < offers[-1].end_at,
+            AvailabilityRequest.end_at <= offers[-1].end_at,
+            AvailabilityRequest.user_id != user_id,
+        ]
+        found = _candidates(db, AvailabilityRequest, criteria, near)
+    found += _rule_candidates(db, "request", offers[0].start_at, offers[-1].end_at, user_id, near)
+    starts = [o.start_at for o in offers]
+    pairs = []
+    for req in found:
+        pos = bisect.bisect_right(starts, req.start_at) - 1
+        if pos >= 0 and req.end_at <= offers[pos].end_at:
+            pairs.append((offers[pos], req))
+    return pairs
+
+
+def offers_containing_requests(
+    db: Session, requests: list[AvailabilityRequest], near: tuple[float, float] | None = None
+) -> list[tuple[AvailabilityRequest, Candidate]]:
+    """``(request, offer)`` pairs for a batch of one user's requests, in a single pass."""
+    if not requests:
+        return []
+    requests = sorted(requests, key=lambda r: r.start_at)
+    user_id = requests[0].user_id
+    if settings.matching_index_enabled:
+        _ensure_loaded(db)
+        ids = sorted({i for r in requests for i in offer_index.containing(r.start_at, r.end_at, exclude_user=user_id)})
+        found = _load_by_ids(db, AvailabilityOffer, ids, near)
+    else:
+        criteria = [
+            AvailabilityOffer.end_at >= requests[0].end_at,
+            AvailabilityOffer.start_at <= requests[-1].start_at,
+            AvailabilityOffer.user_id != user_id,
+        ]
+        found = _candidates(db, AvailabilityOffer, criteria, near)
+    found += _rule_candidates(db, "offer", requests[0].start_at, requests[-1].end_at, user_id, near)
+    starts = [r.start_at for r in requests]
+    pairs = []
+    for off in found:
+        # Non-overlapping requests sorted by start also have sorted ends
+        i = bisect.bisect_left(starts, off.start_at)
+        while i < len(requests) and requests[i].end_at <= off.end_at:
+            pairs.append((requests[i], off))
+            i += 1
+    return pairs
@@ -0,0 +1,54 @@
+from __future__ import annotations
+from collections import Counter
+from datetime import datetime
+from typing import Iterable
+
+from sqlalchemy import bindparam, insert, update
+from sqlalchemy.orm import Session
+
+from ..models import EmailOutbox, Notification, User
+
+
+MATCH_SUBJECT = "Miguafi - Nouvelle correspondance"
+
+
+def notify_many(db: Session, items: Iterable[tuple[str, str, str]], subject: str = MATCH_SUBJECT) -> int:
+    """Queue an in-app notification and an email for each ``(user_id, email, message)``.
+
+    Both tables get a single executemany INSERT, and unread counters a single
+    executemany UPDATE, regardless of fan-out; nothing is committed here.
+    """
+    items = list(items)
+    if not items:
+        return 0
+    now = datetime.utcnow()
+    db.execute(
+        insert(Notification),
+        [{"user_id": user_id, "message": message, "is_read": False, "created_at": now} for user_id, _, message in items],
+    )
+    db.execute(
+        insert(EmailOutbox),
+        [
+            {"to_email": email, "subject": subject, "body": message, "status": "pending", "attempts": 0,
+             "next_attempt_at": now, "created_at": now}
+            for _, email, message in items
+        ],
+    )
+    add_unread(db, Counter(user_id for user_id, _, _ in items))
+    return len(items)
+
+
+_users = User.__table__
+
+
+def add_unread(db: Session, counts: dict[str, int]) -> None:
+    """Adjust ``users.unread_count`` by ``counts[user_id]`` (negative to decrement)."""
+    counts = {user_id: delta for user_id, delta in counts.items() if delta}
+    if not counts:
+        return
+    db.execute(
+        update(_users)
+        .where(_users.c.id == bindparam("b_user_id"))
+        .values(unread_count=_users.c.unread_count + bindparam("b_delta")),
+        [{"b_user_id": user_id, "b_delta": delta} for user_id, delta in counts.items()],
+    )
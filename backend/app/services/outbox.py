@@ -0,0 +1,96 @@
+from __future__ import annotations
+from datetime import datetime, timedelta
+from typing import NamedTuple
+
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..models import EmailOutbox
+
+
+def enqueue_email(db: Session, to_email: str, subject: str, body: str) -> None:
+    # Written in the caller's transaction; delivered later by app.workers.outbox
+    db.add(EmailOutbox(to_email=to_email, subject=subject, body=body))
+
+
+class ClaimedEmail(NamedTuple):
+    id: int
+    to_email: str
+    subject: str
+    body: str
+    attempts: int
+    last_error: str | None
+
+
+# Core table: results are written back with one executemany UPDATE per batch
+_outbox = EmailOutbox.__table__
+
+
+def claim_batch(db: Session, limit: int) -> list[ClaimedEmail]:
+    """Lease up to ``limit`` due messages and commit the lease.
+
+    Returns plain tuples read before the commit, so using them costs no further
+    queries (ORM rows would each be reloaded after the commit expires them).
+    """
+    now = datetime.utcnow()
+    rows = db.execute(
+        select(
+            EmailOutbox.id, EmailOutbox.to_email, EmailOutbox.subject, EmailOutbox.body,
+            EmailOutbox.attempts, EmailOutbox.last_error,
+        )
+        .where(EmailOutbox.status == "pending", EmailOutbox.next_attempt_at <= now)
+        .order_by(EmailOutbox.next_attempt_at, EmailOutbox.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    ).all()
+    claimed = [ClaimedEmail(*row) for row in rows]
+    if claimed:
+        lease_until = now + timedelta(seconds=settings.outbox_lease_seconds)
+        db.execute(update(_outbox).where(_outbox.c.id.in_([m.id for m in claimed])).values(next_attempt_at=lease_until))
+    db.commit()
+    return claimed
+
+
+def backoff_delay(attempts: int) -> timedelta:
+    seconds = settings.outbox_backoff_seconds * 2 ** max(attempts - 1, 0)
+    return timedelta(seconds=min(seconds, settings.outbox_backoff_max_seconds))
+
+
+def _result(msg: ClaimedEmail, **values) -> dict:
+    # Every result sets the same columns so a batch is one executemany
+    row = {"status": "pending", "attempts": msg.attempts, "last_error": msg.last_error, "sent_at": None}
+    row.update(values)
+    return {"b_id": msg.id, **{f"v_{k}": v for k, v in row.items()}}
+
+
+def mark_sent(msg: ClaimedEmail) -> dict:
+    now = datetime.utcnow()
+    return _result(msg, status="sent", sent_at=now, last_error=None, next_attempt_at=now)
+
+
+def defer(msg: ClaimedEmail, seconds: float) -> dict:
+    # Not an attempt: the relay was known to be down, so nothing was tried
+    return _result(msg, next_attempt_at=datetime.utcnow() + timedelta(seconds=max(seconds, 1.0)))
+
+
+def mark_failed(msg: ClaimedEmail, error: str) -> dict:
+    attempts = msg.attempts + 1
+    if attempts >= settings.outbox_max_attempts:
+        return _result(msg, status="failed", attempts=attempts, last_error=error[:1000], next_attempt_at=datetime.utcnow())
+    return _result(
+        msg, attempts=attempts, last_error=error[:1000], next_attempt_at=datetime.utcnow() + backoff_delay(attempts)
+    )
+
+
+def save_results(db: Session, results: list[dict]) -> None:
+    """Write back ``mark_sent``/``defer``/``mark_failed`` results; nothing is committed here."""
+    if not results:
+        return
+    columns = ("status", "attempts", "last_error", "sent_at", "next_attempt_at")
+    db.execute(
+        update(_outbox)
+        .where(_outbox.c.id == bindparam("b_id"))
+        .values({c: bindparam(f"v_{c}") for c in columns}),
+        results,
+    )
@@ -0,0 +1,160 @@
+from __future__ import annotations
+import math
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Iterator
+
+
+FREQUENCIES = ("daily", "weekly")
+
+
+def occurrences(
+    dtstart: datetime,
+    *,
+    freq: str = "weekly",
+    interval: int = 1,
+    weekdays: list[int] | None = None,
+    until: datetime | None = None,
+    count: int | None = None,
+    after: datetime | None = None,
+) -> Iterator[datetime]:
+    """Start times of an RRULE-style recurrence, in order.
+
+    Covers FREQ=DAILY/WEEKLY with INTERVAL, BYDAY (``weekdays``, 0 = Monday),
+    UNTIL and COUNT; ``dtstart`` is always the first candidate and its time of
+    day is kept. ``after`` drops starts before it; without ``count`` whole
+    periods before it are skipped arithmetically, so expanding a window costs
+    only the occurrences inside it. Unbounded rules yield forever.
+    """
+    if freq not in FREQUENCIES:
+        raise ValueError(f"Unsupported frequency: {freq}")
+    if interval < 1:
+        raise ValueError("interval must be >= 1")
+    days = sorted(set(weekdays or ()))
+    if freq == "weekly":
+        step = timedelta(weeks=interval)
+        # Periods are Monday-aligned weeks; BYDAY picks days within each
+        period = dtstart - timedelta(days=dtstart.weekday())
+        offsets = [timedelta(days=d) for d in days or [dtstart.weekday()]]
+        allowed = None
+    else:
+        step = timedelta(days=interval)
+        period = dtstart
+        offsets = [timedelta(0)]
+        # BYDAY on a daily rule filters the generated days
+        allowed = set(days) or None
+        if allowed is not None and interval % 7 == 0 and dtstart.weekday() not in allowed:
+            return
+    if after is not None and count is None and after > period + step:
+        period += ((after - period) // step - 1) * step
+    seen = 0
+    while True:
+        for offset in offsets:
+            start = period + offset
+            if start < dtstart or (allowed is not None and start.weekday() not in allowed):
+                continue
+            if (until is not None and start > until) or (count is not None and seen >= count):
+                return
+            seen += 1
+            if after is None or start >= after:
+                yield start
+        period += step
+
+
+def format_weekdays(weekdays: list[int]) -> str:
+    return ",".join(str(d) for d in sorted(set(weekdays)))
+
+
+def parse_weekdays(value: str) -> list[int]:
+    return [int(d) for d in value.split(",") if d]
+
+
+def rule_occurrences(rule, **kwargs) -> Iterator[datetime]:
+    """``occurrences`` of an ``AvailabilityRule`` (or anything with the same fields)."""
+    return occurrences(
+        rule.start_at,
+        freq=rule.freq,
+        interval=rule.interval,
+        weekdays=parse_weekdays(rule.weekdays),
+        until=rule.until,
+        count=rule.count,
+        **kwargs,
+    )
+
+
+def windows(rule, start: datetime, end: datetime) -> Iterator[tuple[datetime, datetime]]:
+    """``(start_at, end_at)`` of each occurrence of ``rule`` overlapping ``[start, end)``."""
+    duration = rule.end_at - rule.start_at
+    for occ in rule_occurrences(rule, after=start - duration):
+        if occ >= end:
+            return
+        if occ + duration > start:
+            yield occ, occ + duration
+
+
+def last_end(rule) -> datetime | None:
+    """End of the rule's last occurrence (an upper bound with ``until``); None if open-ended."""
+    duration = rule.end_at - rule.start_at
+    if rule.count is not None:
+        last = deque(rule_occurrences(rule), maxlen=1)
+        return last[0] + duration if last else rule.end_at
+    if rule.until is not None:
+        return rule.until + duration
+    return None
+
+
+def _period_days(rule) -> int:
+    """Days after which the rule's occurrences repeat."""
+    if rule.freq == "weekly":
+        return 7 * rule.interval
+    # BYDAY on a daily rule repeats with the week as well
+    return math.lcm(rule.interval, 7) if parse_weekdays(rule.weekdays) else rule.interval
+
+
+def _windows_meet(wa, wb) -> bool:
+    # Two sorted lists of windows, neither overlapping itself
+    i = j = 0
+    while i < len(wa) and j < len(wb):
+        if wa[i][0] < wb[j][1] and wb[j][0] < wa[i][1]:
+            return True
+        # Advance whichever ends first
+        if wa[i][1] <= wb[j][1]:
+            i += 1
+        else:
+            j += 1
+    return False
+
+
+def _phases_meet(a, b, start: datetime) -> bool:
+    # Occurrence k of a phase of ``a`` and m of one of ``b`` start (sb - sa) + m*Pb - k*Pa
+    # apart, and m*Pb - k*Pa takes every multiple of gcd(Pa, Pb): only the remainder matters
+    pa, pb = _period_days(a), _period_days(b)
+    g = timedelta(days=math.gcd(pa, pb))
+    for sa, ea in windows(a, start, start + timedelta(days=pa)):
+        for sb, eb in windows(b, start, start + timedelta(days=pb)):
+            r = (sb - sa) % g
+            # b starts r after a (or g - r before it); occurrences are at most a day and g is at least one
+            if r < ea - sa or g - r < eb - sb:
+                return True
+    return False
+
+
+def overlaps(a, b) -> bool:
+    """Whether an occurrence of rule ``a`` overlaps an occurrence of rule ``b``.
+
+    Once both have started, their occurrences repeat together every lcm of the two
+    periods. When the rules share at least two such cycles (always, if neither
+    ends), overlap is decided from one period of each rule's occurrences modulo the
+    gcd of the periods; otherwise the occurrences until the earlier end are
+    compared, fewer than two cycles' worth.
+    """
+    start = max(a.start_at, b.start_at)
+    ends = [r.ends_at for r in (a, b) if r.ends_at is not None]
+    end = min(ends) if ends else None
+    if end is not None and end <= start:
+        return False
+    # Compared in days: the lcm itself may be far too long for a timedelta
+    cycle = math.lcm(_period_days(a), _period_days(b))
+    if end is None or (end - start).days > 2 * cycle + 1:
+        return _phases_meet(a, b, start)
+    return _windows_meet(list(windows(a, start, end)), list(windows(b, start, end)))
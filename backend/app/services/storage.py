@@ -1,49 +1,296 @@
 from __future__ import annotations
+import base64
+import hashlib
+import io
+import mimetypes
 import os
+import re
+import tempfile
+import threading
 import uuid
-from typing import BinaryIO
+from typing import BinaryIO, Callable, NamedTuple
 
+from ..core import config
 from ..core.config import settings
 
 
+class UploadTooLarge(Exception):
+    def __init__(self, max_bytes: int) -> None:
+        super().__init__(f"Upload exceeds {max_bytes} bytes")
+        self.max_bytes = max_bytes
+
+
+class StoredFile(NamedTuple):
+    url: str
+    key: str
+    size: int
+    sha256: str
+
+
+# Keys are a SHA-256 plus a short extension: a plain file name, never a path
+_KEY = re.compile(r"[0-9a-f]{64}(?:\.[a-z0-9]{1,10})?")
+_EXT = re.compile(r"\.[a-z0-9]{1,10}")
+
+
+def content_key(sha256: str, filename: str, prefix: str = "") -> str:
+    # Same bytes -> same key, so re-uploads of a photo share one object
+    ext = os.path.splitext(filename)[1].lower()
+    return f"{prefix}{sha256}{ext if _EXT.fullmatch(ext) else ''}"
+
+
+class _LimitedReader:
+    """File-like wrapper that counts and hashes what is read, failing past ``max_bytes``."""
+
+    def __init__(self, fileobj: BinaryIO, max_bytes: int, chunk_size: int) -> None:
+        self._fileobj = fileobj
+        self.max_bytes = max_bytes
+        self.chunk_size = chunk_size
+        self.size = 0
+        self._hash = hashlib.sha256()
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0:
+            size = self.chunk_size
+        # One byte past the limit is enough to tell an oversized upload
+        chunk = self._fileobj.read(min(size, self.max_bytes - self.size + 1))
+        self.size += len(chunk)
+        if self.size > self.max_bytes:
+            raise UploadTooLarge(self.max_bytes)
+        self._hash.update(chunk)
+        return chunk
+
+    def chunks(self):
+        while chunk := self.read(self.chunk_size):
+            yield chunk
+
+    @property
+    def sha256(self) -> str:
+        return self._hash.hexdigest()
+
+
 class StorageService:
-    def save(self, fileobj: BinaryIO, filename: str, content_type: str | None = None) -> str:
+    # Prepended to content-hash keys
+    KEY_PREFIX = ""
+
+    def save(
+        self,
+        fileobj: BinaryIO,
+        filename: str,
+        content_type: str | None = None,
+        max_bytes: int | None = None,
+        on_key: Callable[[str], None] | None = None,
+    ) -> StoredFile:
+        """Store ``fileobj`` under its content key.
+
+        ``on_key`` is called with the key once the content is hashed, before the
+        object is written or an existing copy is reused (see ``blobs.touch``).
+        """
+        raise NotImplementedError
+
+    def open(self, key: str) -> BinaryIO:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def exists(self, key: str) -> bool:
+        return self.stat(key) is not None
+
+    def stat(self, key: str) -> tuple[int, str | None] | None:
+        """``(size, content type)`` of a stored object, or None if it does not exist."""
+        raise NotImplementedError
+
+    def url_for(self, key: str) -> str:
         raise NotImplementedError
 
+    def presign_upload(self, key: str, size: int, content_type: str, sha256: str) -> dict | None:
+        """Request a client can send straight to the backend, or None if uploads must go through the API."""
+        return None
+
+    def is_key(self, key: str) -> bool:
+        """Whether ``key`` has the shape of the content-hash keys ``save`` issues."""
+        return key.startswith(self.KEY_PREFIX) and _KEY.fullmatch(key[len(self.KEY_PREFIX):]) is not None
+
+    def key_for(self, url: str) -> str | None:
+        """Storage key behind a URL returned by ``save``; None for foreign URLs.
+
+        URLs without a key are not reference-counted, so they are never deleted.
+        """
+        return None
+
+    def _key_after(self, prefix: str, url: str) -> str | None:
+        # Anything but an issued key (e.g. "../x") is foreign, so it can never reach delete()
+        key = url[len(prefix):] if url.startswith(prefix) else None
+        return key if key is not None and self.is_key(key) else None
+
+    def _reader(self, fileobj: BinaryIO, max_bytes: int | None) -> _LimitedReader:
+        return _LimitedReader(fileobj, max_bytes or settings.upload_max_bytes, settings.upload_chunk_size)
+
 
 class LocalStorage(StorageService):
+    URL_PREFIX = "/static/uploads/"
+
     def __init__(self, base_dir: str) -> None:
         self.base_dir = base_dir
         os.makedirs(self.base_dir, exist_ok=True)
 
-    def save(self, fileobj: BinaryIO, filename: str, content_type: str | None = None) -> str:
-        ext = os.path.splitext(filename)[1]
-        key = f"{uuid.uuid4().hex}{ext}"
-        path = os.path.join(self.base_dir, key)
-        with open(path, 'wb') as f:
-            f.write(fileobj.read())
+    def save(
+        self,
+        fileobj: BinaryIO,
+        filename: str,
+        content_type: str | None = None,
+        max_bytes: int | None = None,
+        on_key: Callable[[str], None] | None = None,
+    ) -> StoredFile:
+        reader = self._reader(fileobj, max_bytes)
+        # Write under a temporary name so a rejected or failed upload never becomes visible;
+        # the final name is only known once the content hash is
+        tmp = os.path.join(self.base_dir, f".{uuid.uuid4().hex}.part")
+        try:
+            with open(tmp, 'wb') as f:
+                for chunk in reader.chunks():
+                    f.write(chunk)
+            key = content_key(reader.sha256, filename, self.KEY_PREFIX)
+            if on_key is not None:
+                on_key(key)
+            path = os.path.join(self.base_dir, key)
+            if os.path.exists(path):
+                os.unlink(tmp)
+            else:
+                os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
         # Expose via /static/uploads/<key>
-        return f"/static/uploads/{key}"
+        return StoredFile(self.url_for(key), key, reader.size, reader.sha256)
+
+    def open(self, key: str) -> BinaryIO:
+        return open(os.path.join(self.base_dir, key), 'rb')
+
+    def delete(self, key: str) -> None:
+        try:
+            os.unlink(os.path.join(self.base_dir, key))
+        except FileNotFoundError:
+            pass
+
+    def stat(self, key: str) -> tuple[int, str | None] | None:
+        try:
+            size = os.stat(os.path.join(self.base_dir, key)).st_size
+        except FileNotFoundError:
+            return None
+        return size, mimetypes.guess_type(key)[0]
+
+    def url_for(self, key: str) -> str:
+        return f"{self.URL_PREFIX}{key}"
+
+    def key_for(self, url: str) -> str | None:
+        return self._key_after(self.URL_PREFIX, url)
 
 
 class S3Storage(StorageService):
+    KEY_PREFIX = "dogs/"
+
     def __init__(self, endpoint_url: str | None, access_key: str, secret_key: str, region: str | None, bucket: str) -> None:
         import boto3  # type: ignore
+        from boto3.s3.transfer import TransferConfig  # type: ignore
+        from botocore.config import Config  # type: ignore
 
         self.bucket = bucket
+        # Clients are thread-safe: one per process reuses credentials, endpoint setup and TLS sessions
         self.s3 = boto3.client(
             's3',
             endpoint_url=endpoint_url,
             aws_access_key_id=access_key,
             aws_secret_access_key=secret_key,
             region_name=region,
+            config=Config(
+                max_pool_connections=settings.s3_max_pool_connections,
+                connect_timeout=settings.s3_connect_timeout,
+                read_timeout=settings.s3_read_timeout,
+                retries={"max_attempts": settings.s3_max_attempts, "mode": "standard"},
+                tcp_keepalive=True,
+                # SigV4 so presigned uploads also sign content type, length and checksum
+                signature_version="s3v4",
+            ),
+        )
+        # One part in flight per upload keeps memory at a single part buffer
+        self.transfer_config = TransferConfig(
+            multipart_threshold=settings.s3_multipart_threshold,
+            multipart_chunksize=settings.s3_multipart_chunksize,
+            max_concurrency=1,
+            use_threads=False,
         )
 
-    def save(self, fileobj: BinaryIO, filename: str, content_type: str | None = None) -> str:
-        ext = os.path.splitext(filename)[1]
-        key = f"dogs/{uuid.uuid4().hex}{ext}"
+    def save(
+        self,
+        fileobj: BinaryIO,
+        filename: str,
+        content_type: str | None = None,
+        max_bytes: int | None = None,
+        on_key: Callable[[str], None] | None = None,
+    ) -> StoredFile:
         extra_args = {'ContentType': content_type} if content_type else None
-        self.s3.upload_fileobj(fileobj, self.bucket, key, ExtraArgs=extra_args or {})
+        reader = self._reader(fileobj, max_bytes)
+        # Spool to local disk first: the key is the content hash, known only after the last byte
+        with tempfile.TemporaryFile() as spool:
+            for chunk in reader.chunks():
+                spool.write(chunk)
+            key = content_key(reader.sha256, filename, self.KEY_PREFIX)
+            if on_key is not None:
+                on_key(key)
+            if not self.exists(key):
+                spool.seek(0)
+                self.s3.upload_fileobj(spool, self.bucket, key, ExtraArgs=extra_args or {}, Config=self.transfer_config)
+        return StoredFile(self.url_for(key), key, reader.size, reader.sha256)
+
+    def stat(self, key: str) -> tuple[int, str | None] | None:
+        from botocore.exceptions import ClientError  # type: ignore
+
+        try:
+            head = self.s3.head_object(Bucket=self.bucket, Key=key)
+        except ClientError as exc:
+            if exc.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+        return head["ContentLength"], head.get("ContentType")
+
+    def presign_upload(self, key: str, size: int, content_type: str, sha256: str) -> dict | None:
+        # S3 rejects the PUT unless length, type and SHA-256 match what was signed,
+        # so the object behind a content-hash key really has that content
+        checksum = base64.b64encode(bytes.fromhex(sha256)).decode()
+        url = self.s3.generate_presigned_url(
+            "put_object",
+            Params={
+                "Bucket": self.bucket,
+                "Key": key,
+                "ContentType": content_type,
+                "ContentLength": size,
+                "ChecksumSHA256": checksum,
+            },
+            ExpiresIn=settings.upload_url_expires_seconds,
+        )
+        return {
+            "method": "PUT",
+            "url": url,
+            "headers": {"Content-Type": content_type, "x-amz-checksum-sha256": checksum},
+        }
+
+    def delete(self, key: str) -> None:
+        self.s3.delete_object(Bucket=self.bucket, Key=key)
+
+    def key_for(self, url: str) -> str | None:
+        return self._key_after(self.url_for(""), url)
+
+    def open(self, key: str) -> BinaryIO:
+        # Buffered: image decoders need to seek, and uploads are capped at upload_max_bytes
+        body = self.s3.get_object(Bucket=self.bucket, Key=key)["Body"]
+        try:
+            return io.BytesIO(body.read())
+        finally:
+            body.close()
+
+    def url_for(self, key: str) -> str:
         # Prefer public base URL if provided (for browser access)
         public = (settings.s3_public_base_url or '').rstrip('/') if getattr(settings, 's3_public_base_url', None) else None
         if public:
@@ -56,7 +303,11 @@ class S3Storage(StorageService):
         return f"s3://{settings.s3_bucket}/{key}"
 
 
-def get_storage() -> StorageService:
+_storage: StorageService | None = None
+_storage_lock = threading.Lock()
+
+
+def _build_storage() -> StorageService:
     if settings.storage_backend == 's3':
         if not all([settings.s3_access_key, settings.s3_secret_key, settings.s3_bucket]):
             raise RuntimeError("S3 storage misconfigured: missing access/secret/bucket")
@@ -69,3 +320,20 @@ def get_storage() -> StorageService:
         )
     # default local
     return LocalStorage(settings.storage_local_dir)
+
+
+def get_storage() -> StorageService:
+    """Process-wide storage backend, built on first use."""
+    global _storage
+    if _storage is None:
+        with _storage_lock:
+            if _storage is None:
+                _storage = _build_storage()
+    return _storage
+
+
+@config.on_reload
+def reset_storage() -> None:
+    global _storage
+    with _storage_lock:
+        _storage = None
@@ -0,0 +1,140 @@
+from __future__ import annotations
+import mimetypes
+import os
+import re
+import tempfile
+
+from fastapi import HTTPException, Request, UploadFile
+from fastapi.staticfiles import StaticFiles
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse
+from starlette.types import Scope
+
+from .core.config import settings
+from .security import create_upload_token
+from .services import blobs
+from .services import storage as storage_mod
+from .services.storage import StoredFile, UploadTooLarge, content_key
+
+
+_CONTENT_KEY = re.compile(r"[0-9a-f]{64}")
+
+
+def _too_large(max_bytes: int) -> HTTPException:
+    return HTTPException(status_code=400, detail=f"Image too large (max {max_bytes // (1024 * 1024)}MB)")
+
+
+async def save_upload(file: UploadFile) -> StoredFile:
+    """Stream an image upload to the configured storage.
+
+    The size limit is enforced while copying, so it holds even when the client
+    lies about (or omits) the length; the copy runs on the threadpool.
+    """
+    if not file.content_type or not file.content_type.startswith("image/"):
+        raise HTTPException(status_code=400, detail="Only image uploads are allowed")
+    storage = storage_mod.get_storage()
+    # Save with original filename to preserve extension if present
+    filename = file.filename or "upload"
+    try:
+        return await run_in_threadpool(
+            storage.save, file.file, filename, content_type=file.content_type, on_key=blobs.touch
+        )
+    except UploadTooLarge as exc:
+        raise _too_large(exc.max_bytes)
+
+
+def upload_url(filename: str | None, content_type: str, size: int, sha256: str) -> dict:
+    """Where a client should send a photo of ``size`` bytes hashing to ``sha256``.
+
+    The key is derived from the hash up front, so an object that is already stored
+    needs no upload at all (``upload`` is None). Otherwise S3 gets a presigned PUT;
+    local storage gets a signed ``PUT /uploads/{token}`` on the API.
+    """
+    if not content_type.startswith("image/"):
+        raise HTTPException(status_code=400, detail="Only image uploads are allowed")
+    if size > settings.upload_max_bytes:
+        raise _too_large(settings.upload_max_bytes)
+    if not _CONTENT_KEY.fullmatch(sha256):
+        raise HTTPException(status_code=400, detail="sha256 must be 64 lowercase hex characters")
+    storage = storage_mod.get_storage()
+    ext = os.path.splitext(filename or "")[1] or mimetypes.guess_extension(content_type) or ""
+    key = content_key(sha256, f"upload{ext}", storage.KEY_PREFIX)
+    # Registered up front: an unconfirmed upload is swept once its URL has expired
+    blobs.touch(key)
+    if storage.exists(key):
+        return {"key": key, "upload": None}
+    upload = storage.presign_upload(key, size, content_type, sha256)
+    if upload is None:
+        token = create_upload_token(key, size, content_type)
+        upload = {"method": "PUT", "url": f"/uploads/{token}", "headers": {"Content-Type": content_type}}
+    return {"key": key, "upload": {**upload, "expires_in": settings.upload_url_expires_seconds}}
+
+
+def check_stored_upload(key: str) -> str:
+    """URL of an uploaded object after checking it exists and is an acceptable image."""
+    storage = storage_mod.get_storage()
+    if not storage.is_key(key):
+        raise HTTPException(status_code=400, detail="Invalid upload key")
+    # Keeps a release elsewhere from purging the object before the caller acquires it
+    blobs.touch(key)
+    info = storage.stat(key)
+    if info is None:
+        raise HTTPException(status_code=400, detail="Upload not found")
+    size, content_type = info
+    if size > settings.upload_max_bytes:
+        raise _too_large(settings.upload_max_bytes)
+    if not content_type or not content_type.startswith("image/"):
+        raise HTTPException(status_code=400, detail="Only image uploads are allowed")
+    return storage.url_for(key)
+
+
+async def receive_upload(request: Request, claims: dict) -> StoredFile:
+    """Store the body of a signed local upload; the content must hash to the signed key."""
+    if request.headers.get("content-type") != claims["ct"]:
+        raise HTTPException(status_code=400, detail="Content type does not match the upload URL")
+    max_bytes = claims["size"]
+    # Small bodies stay in memory; larger ones spill to a temp file chunk by chunk
+    spool = tempfile.SpooledTemporaryFile(max_size=settings.upload_chunk_size)
+    try:
+        received = 0
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > max_bytes:
+                raise _too_large(max_bytes)
+            spool.write(chunk)
+        spool.seek(0)
+        storage = storage_mod.get_storage()
+        stored = await run_in_threadpool(storage.save, spool, claims["key"], claims["ct"], max_bytes, blobs.touch)
+    finally:
+        spool.close()
+    return stored
+
+
+class UploadStaticFiles(StaticFiles):
+    """``StaticFiles`` for stored uploads, which are never modified in place.
+
+    Responses are ``immutable`` with a long max-age. Content-addressed keys use
+    their hash as a strong ETag, which is the same on every replica, unlike
+    Starlette's mtime-based one. Range and If-None-Match are handled by
+    ``FileResponse``/``StaticFiles``. With ``uploads_accel_redirect_prefix`` set,
+    the body is left to nginx (X-Accel-Redirect), which serves it with sendfile.
+    """
+
+    def file_response(
+        self, full_path: str, stat_result: os.stat_result, scope: Scope, status_code: int = 200
+    ) -> Response:
+        name = os.path.relpath(full_path, self.directory).replace(os.sep, "/")
+        headers = {"cache-control": f"public, max-age={settings.upload_cache_max_age}, immutable"}
+        stem = name.rsplit("/", 1)[-1].split(".", 1)[0]
+        if _CONTENT_KEY.fullmatch(stem):
+            headers["etag"] = f'"{stem}"'
+        response = FileResponse(full_path, status_code=status_code, headers=headers, stat_result=stat_result)
+        if self.is_not_modified(response.headers, Headers(scope=scope)):
+            return NotModifiedResponse(response.headers)
+        prefix = settings.uploads_accel_redirect_prefix
+        if prefix:
+            headers["x-accel-redirect"] = f"{prefix.rstrip('/')}/{name}"
+            return Response(status_code=status_code, headers=headers, media_type=mimetypes.guess_type(name)[0])
+        return response
@@ -0,0 +1,97 @@
+"""Build dog photo variants queued in the image_jobs table.
+
+Run from backend/:
+
+    python -m app.workers.images            # poll forever
+    python -m app.workers.images --once     # process what is due and exit
+"""
+from __future__ import annotations
+import argparse
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor
+
+from sqlalchemy import select
+
+from ..core.config import settings
+from ..db import SessionLocal
+from ..models import Dog
+from ..services import image_jobs, images
+
+
+logger = logging.getLogger("miguafi.images")
+
+
+def _pool(processes: int | None = None) -> ProcessPoolExecutor:
+    # Rendering is CPU-bound; spawn so children never share the parent's DB connections
+    return ProcessPoolExecutor(
+        max_workers=processes or settings.image_worker_processes, mp_context=multiprocessing.get_context("spawn")
+    )
+
+
+def drain_once(pool: Executor, batch_size: int | None = None) -> int:
+    """Process one batch of due jobs; returns how many were claimed."""
+    db = SessionLocal()
+    try:
+        jobs = image_jobs.claim_batch(db, batch_size or settings.image_worker_batch_size)
+        if not jobs:
+            return 0
+        # Jobs for a photo that was replaced (or a dog since deleted) have nothing to attach to
+        current = set(map(tuple, db.execute(select(Dog.id, Dog.photo_url).where(Dog.id.in_({j.dog_id for j in jobs})))))
+        futures = {j.id: pool.submit(images.build_variants, j.key) for j in jobs if (j.dog_id, j.url) in current}
+        results = []
+        for job in jobs:
+            future = futures.get(job.id)
+            if future is None:
+                results.append(image_jobs.mark_done(job))
+                continue
+            try:
+                urls = future.result()
+            except Exception as exc:  # noqa: BLE001 - unreadable upload, storage error: retried with backoff
+                results.append(image_jobs.mark_failed(job, f"{type(exc).__name__}: {exc}"))
+                logger.warning("image job %s failed (attempt %s): %s", job.id, job.attempts + 1, exc)
+                continue
+            images.attach_variants(db, job.dog_id, job.url, urls)
+            results.append(image_jobs.mark_done(job))
+        image_jobs.save_results(db, results)
+        db.commit()
+        return len(jobs)
+    finally:
+        db.close()
+
+
+def run(stop: threading.Event | None = None, processes: int | None = None, batch_size: int | None = None) -> None:
+    stop = stop or threading.Event()
+    with _pool(processes) as pool:
+        while not stop.is_set():
+            # Keep draining while full batches come back; sleep only when idle
+            if drain_once(pool, batch_size) < (batch_size or settings.image_worker_batch_size):
+                stop.wait(settings.image_worker_poll_interval)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build dog photo variants queued in the image_jobs table.")
+    parser.add_argument("--once", action="store_true", help="process due jobs and exit")
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--batch-size", type=int, default=None)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    if not images.enabled():
+        parser.error("image variants are disabled (IMAGE_VARIANTS_ENABLED) or Pillow is not installed")
+
+    if args.once:
+        with _pool(args.processes) as pool:
+            total = 0
+            while (n := drain_once(pool, args.batch_size)):
+                total += n
+        logger.info("processed %s jobs", total)
+        return
+    try:
+        run(processes=args.processes, batch_size=args.batch_size)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
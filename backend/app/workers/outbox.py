@@ -0,0 +1,98 @@
+"""Deliver queued emails from the outbox table.
+
+Run from backend/:
+
+    python -m app.workers.outbox            # poll forever
+    python -m app.workers.outbox --once     # drain what is due and exit
+"""
+from __future__ import annotations
+import argparse
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from ..core.config import settings
+from ..db import SessionLocal
+from ..services import outbox
+from ..services import email
+from ..services.circuit import CircuitOpenError
+
+
+logger = logging.getLogger("miguafi.outbox")
+
+
+def _deliver(messages: list[tuple[str, str, str]]) -> list[Exception | None]:
+    try:
+        return email.send_many(messages)
+    except Exception as exc:  # noqa: BLE001 - any SMTP/network error is retried
+        return [exc] * len(messages)
+
+
+def _chunks(items: list, n: int) -> list[list]:
+    size = -(-len(items) // n)
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def drain_once(pool: ThreadPoolExecutor, batch_size: int | None = None) -> int:
+    """Send one batch of due messages; returns how many were attempted."""
+    db = SessionLocal()
+    try:
+        rows = outbox.claim_batch(db, batch_size or settings.outbox_batch_size)
+        if not rows:
+            return 0
+        # One chunk per pooled SMTP session, each sent back to back on that session
+        messages = [(r.to_email, r.subject, r.body) for r in rows]
+        chunks = _chunks(messages, max(settings.smtp_pool_size, 1))
+        errors = [e for chunk_errors in pool.map(_deliver, chunks) for e in chunk_errors]
+        deferred = 0
+        results = []
+        for row, error in zip(rows, errors):
+            if error is None:
+                results.append(outbox.mark_sent(row))
+            elif isinstance(error, CircuitOpenError):
+                results.append(outbox.defer(row, error.retry_in))
+                deferred += 1
+            else:
+                results.append(outbox.mark_failed(row, f"{type(error).__name__}: {error}"))
+                logger.warning("outbox message %s failed (attempt %s): %s", row.id, row.attempts + 1, error)
+        outbox.save_results(db, results)
+        db.commit()
+        if deferred:
+            logger.warning("deferred %s messages: %s", deferred, email.breaker.snapshot())
+        return len(rows)
+    finally:
+        db.close()
+
+
+def run(stop: threading.Event | None = None, workers: int | None = None, batch_size: int | None = None) -> None:
+    stop = stop or threading.Event()
+    with ThreadPoolExecutor(max_workers=workers or settings.outbox_workers) as pool:
+        while not stop.is_set():
+            # Keep draining while full batches come back; sleep only when idle
+            if drain_once(pool, batch_size) < (batch_size or settings.outbox_batch_size):
+                stop.wait(settings.outbox_poll_interval)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Deliver queued emails from the outbox table.")
+    parser.add_argument("--once", action="store_true", help="drain due messages and exit")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--batch-size", type=int, default=None)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+
+    if args.once:
+        with ThreadPoolExecutor(max_workers=args.workers or settings.outbox_workers) as pool:
+            total = 0
+            while (n := drain_once(pool, args.batch_size)):
+                total += n
+        logger.info("attempted %s messages", total)
+        return
+    try:
+        run(workers=args.workers, batch_size=args.batch_size)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Measure concurrent offer/request write throughput on SQLite.
+
+Run from backend/:
+
+    python -m benchmarks.bench_db_writes --threads 8 --writes 300
+
+Each thread inserts offers and requests one transaction at a time (as the API
+does) while a reader thread keeps paging through them. The same workload runs
+against the default rollback journal and against the WAL/pragma settings that
+app.db installs on its engines.
+"""
+from __future__ import annotations
+import argparse
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import sessionmaker
+
+from app.db import Base, install_sqlite_pragmas, sqlite_pragmas
+from app.models import AvailabilityOffer, AvailabilityRequest, User
+
+
+def _run(pragmas: dict | None, threads: int, writes: int) -> tuple[float, int, int]:
+    with tempfile.TemporaryDirectory() as tmp:
+        eng = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}", pool_size=threads + 1)
+        if pragmas:
+            install_sqlite_pragmas(eng, pragmas)
+        Base.metadata.create_all(eng)
+        Session = sessionmaker(bind=eng)
+        with Session() as db:
+            db.execute(insert(User), [
+                {"id": f"bench{i:04d}", "email": f"bench{i}@example.com", "password_hash": "x"} for i in range(threads)
+            ])
+            db.commit()
+
+        errors = [0]
+        reads = [0]
+        done = threading.Event()
+        base = datetime(2030, 1, 1)
+
+        def writer(n: int) -> None:
+            user_id = f"bench{n:04d}"
+            for i in range(writes):
+                model = AvailabilityOffer if i % 2 else AvailabilityRequest
+                start = base + timedelta(hours=i)
+                try:
+                    with Session() as db:
+                        db.add(model(user_id=user_id, start_at=start, end_at=start + timedelta(minutes=30)))
+                        db.commit()
+                except Exception:
+                    errors[0] += 1
+
+        def reader() -> None:
+            while not done.is_set():
+                with Session() as db:
+                    db.execute(select(AvailabilityOffer.id).order_by(AvailabilityOffer.start_at.desc()).limit(20)).all()
+                reads[0] += 1
+
+        workers = [threading.Thread(target=writer, args=(n,)) for n in range(threads)]
+        r = threading.Thread(target=reader)
+        t0 = time.perf_counter()
+        r.start()
+        for t in workers:
+            t.start()
+        for t in workers:
+            t.join()
+        elapsed = time.perf_counter() - t0
+        done.set()
+        r.join()
+        eng.dispose()
+        return elapsed, errors[0], reads[0]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--writes", type=int, default=300, help="inserts per thread")
+    args = parser.parse_args()
+
+    total = args.threads * args.writes
+    for label, pragmas in (("rollback journal", None), ("WAL + pragmas", sqlite_pragmas())):
+        elapsed, errors, reads = _run(pragmas, args.threads, args.writes)
+        print(
+            f"{label:17s} {(total - errors) / elapsed:8.0f} writes/s "
+            f"({errors} failed, {reads / elapsed:6.0f} reads/s alongside)"
+        )
+
+
+if __name__ == "__main__":
+    main()
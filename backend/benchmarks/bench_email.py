@@ -0,0 +1,55 @@
+"""Measure email throughput against an in-process SMTP sink.
+
+Run from backend/:
+
+    python -m benchmarks.bench_email --messages 2000
+
+Compares one SMTP session per message (the old send path) with the pooled
+transport sending batches over persistent sessions.
+"""
+from __future__ import annotations
+import argparse
+import smtplib
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.services.email import SMTPPool, build_message
+from benchmarks.smtp_sink import SMTPSink
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--pool-size", type=int, default=4)
+    parser.add_argument("--batch", type=int, default=100)
+    args = parser.parse_args()
+
+    messages = [build_message(f"user{i}@example.com", "Bench", "Hello") for i in range(args.messages)]
+
+    with SMTPSink() as sink:
+        def one_session_per_message(msg):
+            with smtplib.SMTP("127.0.0.1", sink.port, timeout=3) as s:
+                s.send_message(msg)
+
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.pool_size) as pool:
+            list(pool.map(one_session_per_message, messages))
+        elapsed = time.perf_counter() - t0
+        print(f"session per message: {len(messages) / elapsed:8.0f} msg/s ({sink.connections} connections)")
+
+        before = sink.connections
+        transport = SMTPPool("127.0.0.1", sink.port, size=args.pool_size, max_messages=10**9)
+        batches = [messages[i:i + args.batch] for i in range(0, len(messages), args.batch)]
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.pool_size) as pool:
+            errors = [e for result in pool.map(transport.send_many, batches) for e in result if e]
+        elapsed = time.perf_counter() - t0
+        transport.close()
+        print(
+            f"pooled send_many:    {len(messages) / elapsed:8.0f} msg/s "
+            f"({sink.connections - before} connections, {len(errors)} errors)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Benchmark containment lookups on the in-process interval index.
+
+Run from backend/:
+
+    python -m benchmarks.bench_matching --slots 1000000 --queries 2000
+
+A linear scan over the same data is timed on a small sample of queries as the
+baseline the index replaces.
+"""
+from __future__ import annotations
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+from app.services.matching import IntervalIndex
+
+
+def _random_slots(n: int, horizon_days: int, seed: int) -> list[tuple[int, str, datetime, datetime]]:
+    rnd = random.Random(seed)
+    base = datetime(2030, 1, 1)
+    horizon = horizon_days * 24 * 60
+    rows = []
+    for i in range(n):
+        start = base + timedelta(minutes=rnd.randrange(horizon))
+        end = start + timedelta(minutes=rnd.choice((30, 60, 90, 120, 180, 240)))
+        rows.append((i, str(rnd.randrange(10**8)).zfill(8), start, end))
+    return rows
+
+
+def _time(fn, queries) -> tuple[float, int]:
+    found = 0
+    t0 = time.perf_counter()
+    for q in queries:
+        found += len(fn(*q))
+    return time.perf_counter() - t0, found
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--slots", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=2_000)
+    parser.add_argument("--baseline-queries", type=int, default=20)
+    parser.add_argument("--horizon-days", type=int, default=90)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rows = _random_slots(args.slots, args.horizon_days, args.seed)
+    index = IntervalIndex()
+    t0 = time.perf_counter()
+    index.load(rows)
+    print(f"load {len(index):,} slots: {time.perf_counter() - t0:.2f}s")
+
+    probes = _random_slots(args.queries, args.horizon_days, args.seed + 1)
+    queries = [(start, end, user_id) for _, user_id, start, end in probes]
+
+    for name, fn in (("within", index.within), ("containing", index.containing)):
+        elapsed, found = _time(fn, queries)
+        print(f"{name:<11} {len(queries):,} queries: {elapsed * 1e6 / len(queries):8.1f} us/query ({found:,} matches)")
+
+    sample = queries[: args.baseline_queries]
+
+    def linear_within(start, end, user_id):
+        return [i for i, u, s, e in rows if s >= start and e <= end and u != user_id]
+
+    def linear_containing(start, end, user_id):
+        return [i for i, u, s, e in rows if s <= start and e >= end and u != user_id]
+
+    for name, fn in (("within", linear_within), ("containing", linear_containing)):
+        elapsed, _ = _time(fn, sample)
+        print(f"{name:<11} linear scan baseline:  {elapsed * 1e6 / len(sample):8.1f} us/query")
+
+
+if __name__ == "__main__":
+    main()
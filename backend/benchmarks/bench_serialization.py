@@ -0,0 +1,87 @@
+"""Measure list-endpoint serialization cost per 1,000 rows.
+
+Run from backend/:
+
+    python -m benchmarks.bench_serialization --rows 1000 --repeat 200
+
+Serves the same in-memory page of slot rows through three minimal routes and
+times full request handling (no database):
+
+- ``dict``: rows built with ``isoformat()``, ``response_model=dict`` and the
+  stdlib JSON response (what the list endpoints used to do)
+- ``model``: rows validated against ``SlotPage`` and encoded with orjson
+- ``page_response``: ``SlotPage`` only documents the schema; rows go straight
+  to orjson (what the list endpoints do now)
+
+An empty route is timed too and subtracted, leaving the serialization cost.
+"""
+from __future__ import annotations
+import argparse
+import gzip
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.testclient import TestClient
+
+from app.pagination import page_response
+from app.schemas import SlotPage
+
+
+def _app(rows: list) -> FastAPI:
+    meta = {"total": len(rows), "page_size": len(rows), "page": 1, "next_cursor": None}
+    app = FastAPI()
+
+    @app.get("/empty", response_class=JSONResponse)
+    def empty():
+        return {}
+
+    @app.get("/dict", response_model=dict, response_class=JSONResponse)
+    def as_dict():
+        return {"items": [{"id": r.id, "start_at": r.start_at.isoformat(), "end_at": r.end_at.isoformat()} for r in rows], **meta}
+
+    @app.get("/model", response_model=SlotPage, response_class=ORJSONResponse)
+    def as_model():
+        return {"items": [{"id": r.id, "start_at": r.start_at, "end_at": r.end_at} for r in rows], **meta}
+
+    @app.get("/page_response", response_model=SlotPage)
+    def as_page_response():
+        return page_response([{"id": r.id, "start_at": r.start_at, "end_at": r.end_at} for r in rows], meta)
+
+    return app
+
+
+def _time(client: TestClient, path: str, repeat: int) -> tuple[float, bytes]:
+    body = client.get(path).content  # warm up
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        client.get(path)
+    return (time.perf_counter() - t0) / repeat, body
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    base = datetime(2030, 1, 1, 8, 0)
+    rows = [
+        SimpleNamespace(id=i, start_at=base + timedelta(hours=i), end_at=base + timedelta(hours=i, minutes=45))
+        for i in range(args.rows)
+    ]
+    with TestClient(_app(rows)) as client:
+        overhead, _ = _time(client, "/empty", args.repeat)
+        per = 1000 / args.rows
+        for path in ("/dict", "/model", "/page_response"):
+            elapsed, body = _time(client, path, args.repeat)
+            print(
+                f"{path[1:]:14s} {(elapsed - overhead) * 1000 * per:7.2f} ms / 1,000 rows "
+                f"({len(body)} bytes, {len(gzip.compress(body, 6))} gzipped)"
+            )
+
+
+if __name__ == "__main__":
+    main()
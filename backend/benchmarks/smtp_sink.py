@@ -0,0 +1,71 @@
+"""Minimal in-process SMTP server that accepts and counts messages."""
+from __future__ import annotations
+import socketserver
+import threading
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def _reply(self, line: str) -> None:
+        self.wfile.write(line.encode() + b"\r\n")
+
+    def handle(self) -> None:
+        self.server.sink._connected()
+        self._reply("220 sink ready")
+        in_data = False
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            if in_data:
+                if line in (b".\r\n", b".\n"):
+                    in_data = False
+                    self.server.sink._received()
+                    self._reply("250 OK")
+                continue
+            cmd = line[:4].upper()
+            if cmd in (b"EHLO", b"HELO"):
+                self._reply("250 sink")
+            elif cmd in (b"MAIL", b"RCPT", b"RSET", b"NOOP"):
+                self._reply("250 OK")
+            elif cmd == b"DATA":
+                in_data = True
+                self._reply("354 End data with <CR><LF>.<CR><LF>")
+            elif cmd == b"QUIT":
+                self._reply("221 Bye")
+                return
+            else:
+                self._reply("502 Command not implemented")
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class SMTPSink:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0) -> None:
+        self._server = _Server((host, port), _Handler)
+        self._server.sink = self
+        self._lock = threading.Lock()
+        self.messages = 0
+        self.connections = 0
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    def _connected(self) -> None:
+        with self._lock:
+            self.connections += 1
+
+    def _received(self) -> None:
+        with self._lock:
+            self.messages += 1
+
+    def __enter__(self) -> "SMTPSink":
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,85 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, insert, select
+
+from app.db import SessionLocal
+from app.jobs import archive
+from app.main import create_app
+from app.models import (
+    AvailabilityOffer,
+    AvailabilityOfferArchive,
+    AvailabilityRequest,
+    AvailabilityRequestArchive,
+    Base,
+    User,
+)
+
+
+def _plan(conn, stmt) -> str:
+    sql = str(stmt.compile(conn, compile_kwargs={"literal_binds": True}))
+    return " ".join(row[3] for row in conn.exec_driver_sql("EXPLAIN QUERY PLAN " + sql))
+
+
+def test_archive_moves_expired_slots_in_batches():
+    create_app()
+    now = datetime.utcnow()
+    db = SessionLocal()
+    try:
+        db.execute(insert(User), [{"id": "71000000", "email": "archive@example.com", "password_hash": "x"}])
+        for model in (AvailabilityOffer, AvailabilityRequest):
+            db.execute(insert(model), [
+                {"user_id": "71000000", "start_at": now - timedelta(days=4 + i), "end_at": now - timedelta(days=3 + i)}
+                for i in range(3)
+            ] + [
+                # Ended recently (within the grace period) and still ahead
+                {"user_id": "71000000", "start_at": now - timedelta(hours=3), "end_at": now - timedelta(hours=2)},
+                {"user_id": "71000000", "start_at": now + timedelta(days=1), "end_at": now + timedelta(days=1, hours=1)},
+            ])
+        db.commit()
+        expired = {
+            model: set(db.scalars(select(model.id).where(model.user_id == "71000000", model.end_at < now - timedelta(days=1))))
+            for model in (AvailabilityOffer, AvailabilityRequest)
+        }
+    finally:
+        db.close()
+
+    counts = archive.run(after_hours=24, dry_run=True)
+    assert counts["availability_offers"] >= 3 and counts["availability_requests"] >= 3
+    # Batches of one: each row moves in its own transaction
+    moved = archive.run(after_hours=24, batch_size=1)
+    assert moved == counts
+    assert archive.run(after_hours=24) == {"availability_offers": 0, "availability_requests": 0}
+
+    db = SessionLocal()
+    try:
+        for (model, archive_model), ids in zip(archive.TABLES, expired.values()):
+            left = db.scalars(select(model.end_at).where(model.user_id == "71000000")).all()
+            assert len(left) == 2 and all(end > now - timedelta(days=1) for end in left)
+            rows = db.query(archive_model).filter(archive_model.user_id == "71000000").all()
+            assert {r.slot_id for r in rows} == ids
+            assert all(r.archived_at is not None and r.created_at is not None for r in rows)
+    finally:
+        db.close()
+
+
+def test_overlap_checks_and_archival_use_end_at_indexes():
+    # Fresh schema: the plans depend on the indexes declared on the models
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    now = datetime.utcnow()
+    with engine.connect() as conn:
+        for model, index in ((AvailabilityOffer, "ix_availability_offers_user_end"),
+                             (AvailabilityRequest, "ix_availability_requests_user_end")):
+            # The overlap query of _create_offer/_create_request: only the user's unfinished slots are visited
+            overlap = (
+                select(model)
+                .where(model.user_id == "u", model.start_at < now + timedelta(hours=1), model.end_at > now)
+                .order_by(model.end_at)
+                .limit(1)
+            )
+            assert index in _plan(conn, overlap)
+        for model, index in ((AvailabilityOffer, "ix_availability_offers_end_start"),
+                             (AvailabilityRequest, "ix_availability_requests_end")):
+            expired = select(model.id).where(model.end_at <= now).order_by(model.end_at).limit(10)
+            plan = _plan(conn, expired)
+            assert index in plan and "TEMP B-TREE" not in plan
@@ -0,0 +1,144 @@
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.core.config import settings
+from app.db import SessionLocal, request_engine
+from app.main import create_app
+from app.models import AvailabilityOffer, Notification
+from app.services.recurrence import occurrences
+
+
+def test_weekly_and_daily_occurrences():
+    monday = datetime(2030, 1, 7, 8)
+    weekdays = list(occurrences(monday, weekdays=[0, 1, 2, 3, 4], count=7))
+    assert [d.weekday() for d in weekdays] == [0, 1, 2, 3, 4, 0, 1]
+    assert all(d.hour == 8 for d in weekdays)
+
+    fortnightly = list(occurrences(monday, interval=2, until=monday + timedelta(weeks=5)))
+    assert fortnightly == [monday, monday + timedelta(weeks=2), monday + timedelta(weeks=4)]
+
+    # Daily with BYDAY filters to weekends; dtstart itself doesn't match
+    weekend = list(occurrences(monday, freq="daily", weekdays=[5, 6], count=3))
+    assert [d.weekday() for d in weekend] == [5, 6, 5]
+
+    # Skipping ahead gives the same occurrences as expanding from the start
+    after = monday + timedelta(weeks=52, hours=3)
+    unbounded = occurrences(monday, weekdays=[1, 3])
+    expected = [d for d, _ in zip(unbounded, range(200)) if d >= after][:4]
+    assert list(zip(occurrences(monday, weekdays=[1, 3], after=after), range(4))) == list(zip(expected, range(4)))
+
+
+def _login(client: TestClient, email: str) -> dict:
+    client.post("/auth/register", json={"email": email, "password": "password123"})
+    token = client.post("/auth/login", data={"username": email, "password": "password123"}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _next_monday(hour: int) -> datetime:
+    today = datetime.utcnow().replace(hour=hour, minute=0, second=0, microsecond=0)
+    return today + timedelta(days=7 - today.weekday())
+
+
+def _iso(d: datetime) -> str:
+    return d.isoformat()
+
+
+def test_recurring_offers_are_created_in_one_batch():
+    client = TestClient(create_app())
+    hdr = _login(client, "walker@example.com")
+    start = _next_monday(8)
+    rule = {"start_at": _iso(start), "end_at": _iso(start + timedelta(hours=1)), "weekdays": [0, 1, 2, 3, 4], "count": 10}
+    r = client.post("/availability/offers/batch", json={"recurrence": rule}, headers=hdr)
+    assert r.status_code == 200
+    assert len(r.json()["ids"]) == 10
+    items = client.get("/availability/offers/mine?page_size=20&sort=start_at", headers=hdr).json()["items"]
+    assert [datetime.fromisoformat(i["start_at"]).weekday() for i in items] == [0, 1, 2, 3, 4] * 2
+
+    # Any overlap with existing offers rejects the whole batch
+    clash = {"slots": [
+        {"start_at": _iso(start + timedelta(days=20)), "end_at": _iso(start + timedelta(days=20, hours=1))},
+        {"start_at": _iso(start + timedelta(minutes=30)), "end_at": _iso(start + timedelta(hours=2))},
+    ]}
+    r = client.post("/availability/offers/batch", json=clash, headers=hdr)
+    assert r.status_code == 400 and r.json()["detail"] == "Overlapping offer exists"
+    assert client.get("/availability/offers/mine", headers=hdr).json()["total"] == 10
+
+
+def test_batch_validation():
+    client = TestClient(create_app())
+    hdr = _login(client, "strict@example.com")
+    start = _next_monday(8)
+    one = {"start_at": _iso(start), "end_at": _iso(start + timedelta(hours=1))}
+    overlapping = {"start_at": _iso(start + timedelta(minutes=30)), "end_at": _iso(start + timedelta(hours=2))}
+    past = {"start_at": _iso(start - timedelta(days=30)), "end_at": _iso(start - timedelta(days=30, hours=-1))}
+
+    def post(body):
+        return client.post("/availability/requests/batch", json=body, headers=hdr)
+
+    assert post({"slots": [one, overlapping]}).json()["detail"] == "Slots in the batch overlap"
+    assert post({"slots": [one, past]}).json()["detail"] == "Time range must be in the future"
+    assert post({}).status_code == 400
+    assert post({"slots": [one], "recurrence": {**one, "count": 2}}).status_code == 400
+    assert post({"recurrence": one}).json()["detail"] == "Recurrence needs until or count"
+    assert post({"recurrence": {**one, "weekdays": [7], "count": 2}}).status_code == 422
+    # Gaps past a year are rejected up front instead of overflowing the date arithmetic
+    huge = {**one, "interval": 10**9, "count": 2}
+    assert post({"recurrence": huge}).status_code == 422
+    assert client.post("/availability/offers/rules", json=huge, headers=hdr).status_code == 422
+    assert post({"recurrence": {**one, "freq": "daily", "interval": 366, "count": 2}}).status_code == 200
+    too_many = settings.availability_batch_max_slots + 1
+    assert post({"recurrence": {**one, "freq": "daily", "count": too_many}}).status_code == 400
+
+
+@pytest.mark.parametrize("index_enabled", [False, True])
+def test_batch_matches_once_for_the_whole_set(monkeypatch, index_enabled):
+    monkeypatch.setattr(settings, "matching_index_enabled", index_enabled)
+    client = TestClient(create_app())
+    start = _next_monday(8)
+    # Requests on five Mondays (inside the 8-10 offers) and one at noon (outside)
+    for week in (0, 1, 2, 10, 11):
+        day = start + timedelta(weeks=week)
+        hdr = _login(client, f"owner{week}@example.com")
+        slot = {"start_at": _iso(day + timedelta(minutes=30)), "end_at": _iso(day + timedelta(hours=1, minutes=30))}
+        assert client.post("/availability/requests", json=slot, headers=hdr).status_code == 200
+    hdr = _login(client, "late@example.com")
+    noon = {"start_at": _iso(start + timedelta(hours=4)), "end_at": _iso(start + timedelta(hours=5))}
+    assert client.post("/availability/requests", json=noon, headers=hdr).status_code == 200
+
+    walker = _login(client, "batchwalker@example.com")
+    client.get("/dogs/me", headers=walker)  # cache the principal
+    statements = []
+
+    def before(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    def post_offers(weeks: int, offset: timedelta) -> list[int]:
+        rule = {"start_at": _iso(start + offset), "end_at": _iso(start + offset + timedelta(hours=2)), "count": weeks}
+        statements.clear()
+        event.listen(request_engine(), "before_cursor_execute", before)
+        try:
+            r = client.post("/availability/offers/batch", json={"recurrence": rule}, headers=walker)
+        finally:
+            event.remove(request_engine(), "before_cursor_execute", before)
+        assert r.status_code == 200
+        return r.json()["ids"]
+
+    assert len(post_offers(4, timedelta(0))) == 4
+    first = len(statements)
+    db = SessionLocal()
+    try:
+        assert db.query(Notification).filter(Notification.message.like("Une offre%")).count() == 3
+    finally:
+        db.close()
+    # A batch ten times bigger runs the same statements
+    assert len(post_offers(40, timedelta(weeks=4))) == 40
+    assert len(statements) == first
+    db = SessionLocal()
+    try:
+        assert db.query(AvailabilityOffer).count() == 44
+        assert db.query(Notification).filter(Notification.message.like("Une offre%")).count() == 5
+    finally:
+        db.close()
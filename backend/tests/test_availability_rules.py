@@ -0,0 +1,231 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.db import SessionLocal
+from app.jobs import rematch
+from app.main import create_app
+from app.models import AvailabilityOffer, AvailabilityRule, Notification
+from app.services import recurrence
+
+
+def test_rule_windows_and_last_end():
+    monday = datetime(2030, 1, 7, 8)
+    rule = SimpleNamespace(
+        start_at=monday, end_at=monday + timedelta(hours=1), freq="weekly", interval=1,
+        weekdays="0,2,4", until=None, count=None,
+    )
+    # Only occurrences overlapping the window, even far from dtstart
+    window_start = monday + timedelta(weeks=100, days=2, minutes=30)
+    got = list(recurrence.windows(rule, window_start, window_start + timedelta(days=3)))
+    assert got == [
+        (monday + timedelta(weeks=100, days=2), monday + timedelta(weeks=100, days=2, hours=1)),
+        (monday + timedelta(weeks=100, days=4), monday + timedelta(weeks=100, days=4, hours=1)),
+    ]
+    assert recurrence.last_end(rule) is None
+    rule.count = 4  # Mon, Wed, Fri, Mon
+    assert recurrence.last_end(rule) == monday + timedelta(weeks=1, hours=1)
+    # Daily every 7 days on a weekday other than dtstart's never occurs
+    assert list(recurrence.occurrences(monday, freq="daily", interval=7, weekdays=[1])) == []
+
+
+def _rule(start: datetime, freq: str = "weekly", interval: int = 1, weekdays: str = "", count: int | None = None):
+    rule = SimpleNamespace(
+        start_at=start, end_at=start + timedelta(hours=1), freq=freq, interval=interval,
+        weekdays=weekdays, until=None, count=count,
+    )
+    rule.ends_at = recurrence.last_end(rule)
+    return rule
+
+
+def test_rule_overlap_checks_one_full_cycle():
+    monday = datetime(2030, 1, 7, 8)
+    assert not recurrence.overlaps(_rule(monday), _rule(monday + timedelta(days=1)))
+    # Alternate Mondays never meet, every Monday meets both
+    assert not recurrence.overlaps(_rule(monday, interval=2), _rule(monday + timedelta(weeks=1), interval=2))
+    assert recurrence.overlaps(_rule(monday), _rule(monday + timedelta(weeks=1), interval=2))
+    # Every 5 days from a Tuesday first lands on a Monday 20 days later
+    tuesday = monday + timedelta(days=1, minutes=30)
+    assert recurrence.overlaps(_rule(monday), _rule(tuesday, freq="daily", interval=5))
+    assert not recurrence.overlaps(_rule(monday), _rule(tuesday, freq="daily", interval=5, count=4))
+    # Large coprime periods: decided from the start offsets, without walking the lcm
+    assert recurrence.overlaps(_rule(monday, interval=1000), _rule(monday + timedelta(minutes=30), interval=1001))
+    assert not recurrence.overlaps(_rule(monday, interval=1000), _rule(tuesday, interval=1001))
+    assert recurrence.overlaps(_rule(monday, freq="daily", interval=997), _rule(tuesday, freq="daily", interval=1009))
+
+
+def _login(client: TestClient, email: str) -> dict:
+    client.post("/auth/register", json={"email": email, "password": "password123"})
+    token = client.post("/auth/login", data={"username": email, "password": "password123"}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _next_monday(hour: int) -> datetime:
+    today = datetime.utcnow().replace(hour=hour, minute=0, second=0, microsecond=0)
+    return today + timedelta(days=7 - today.weekday())
+
+
+def _slot(start: datetime, end: datetime) -> dict:
+    return {"start_at": start.isoformat(), "end_at": end.isoformat()}
+
+
+def _notifications(prefix: str) -> int:
+    db = SessionLocal()
+    try:
+        return db.query(Notification).filter(Notification.message.like(f"{prefix}%")).count()
+    finally:
+        db.close()
+
+
+def test_rules_match_like_one_off_slots_without_storing_occurrences():
+    client = TestClient(create_app())
+    monday = _next_monday(8)
+    walker = _login(client, "rulewalker@example.com")
+    rule = {**_slot(monday, monday + timedelta(hours=2)), "weekdays": [0, 1, 2, 3, 4]}
+    r = client.post("/availability/offers/rules", json=rule, headers=walker)
+    assert r.status_code == 200
+
+    # A one-off request on a Wednesday months ahead matches the open-ended rule
+    owner = _login(client, "ruleowner@example.com")
+    wednesday = monday + timedelta(weeks=20, days=2)
+    r = client.post("/availability/requests", json=_slot(wednesday + timedelta(minutes=30), wednesday + timedelta(hours=1)), headers=owner)
+    assert r.status_code == 200
+    assert _notifications("Une demande correspond") == 1
+    # ...but not on a Saturday
+    saturday = monday + timedelta(weeks=20, days=5)
+    client.post("/availability/requests", json=_slot(saturday, saturday + timedelta(hours=1)), headers=owner)
+    assert _notifications("Une demande correspond") == 1
+
+    # A request rule is matched against offer rules within the horizon: Tuesdays in the next 28 days
+    other = _login(client, "tuesdays@example.com")
+    tuesday = monday + timedelta(days=1)
+    r = client.post("/availability/requests/rules", json={**_slot(tuesday, tuesday + timedelta(hours=1)), "count": 3}, headers=other)
+    assert r.status_code == 200
+    assert _notifications("Une demande correspond") == 4
+
+    db = SessionLocal()
+    try:
+        assert db.query(AvailabilityOffer).count() == 0
+        assert db.query(AvailabilityRule).count() == 2
+    finally:
+        db.close()
+
+
+def test_offer_rule_notifies_existing_requests_in_horizon():
+    client = TestClient(create_app())
+    monday = _next_monday(8)
+    owner = _login(client, "early@example.com")
+    for week in (1, 10):  # only the first is within the 28 day horizon
+        day = monday + timedelta(weeks=week)
+        client.post("/availability/requests", json=_slot(day, day + timedelta(hours=1)), headers=owner)
+    walker = _login(client, "mondays@example.com")
+    r = client.post("/availability/offers/rules", json=_slot(monday, monday + timedelta(hours=1)), headers=walker)
+    assert r.status_code == 200
+    assert _notifications("Une offre correspond") == 1
+
+
+def test_daily_rematch_matches_days_entering_the_horizon(monkeypatch):
+    monkeypatch.setattr(settings, "availability_rule_horizon_days", 14)
+    client = TestClient(create_app())
+    monday = _next_monday(8)
+    owner = _login(client, "horizon@example.com")
+    later = monday + timedelta(weeks=2, minutes=15)  # 15 to 21 days ahead
+    client.post("/availability/requests", json=_slot(later, later + timedelta(minutes=30)), headers=owner)
+    walker = _login(client, "horizonwalker@example.com")
+    client.post("/availability/offers/rules", json=_slot(monday, monday + timedelta(hours=1)), headers=walker)
+    message = f"Une offre correspond à votre demande du {later}"
+    assert _notifications(message) == 0
+
+    # Two weeks on, that Monday has entered the horizon: the daily run picks it up once
+    monkeypatch.setattr(settings, "availability_rule_horizon_days", 28)
+    assert rematch.run(horizon_days=14, dry_run=True) >= 1
+    assert rematch.run(horizon_days=14) >= 1
+    assert _notifications(message) == 1
+    assert rematch.run(horizon_days=14) == 0
+    assert _notifications(message) == 1
+
+
+def test_mine_lists_rule_occurrences_with_one_off_slots(monkeypatch):
+    monkeypatch.setattr(settings, "availability_rule_horizon_days", 14)
+    client = TestClient(create_app())
+    hdr = _login(client, "lister@example.com")
+    monday = _next_monday(8)
+    client.post("/availability/offers", json=_slot(monday + timedelta(days=2, hours=4), monday + timedelta(days=2, hours=5)), headers=hdr)
+    rule = {**_slot(monday, monday + timedelta(hours=1)), "freq": "daily", "weekdays": [0, 2, 4]}
+    rule_id = client.post("/availability/offers/rules", json=rule, headers=hdr).json()["id"]
+    assert client.get("/availability/rules/mine", headers=hdr).json()["items"][0]["weekdays"] == [0, 2, 4]
+
+    now = datetime.utcnow()
+    expected = sum(1 for s, _ in recurrence.windows(
+        SimpleNamespace(start_at=monday, end_at=monday + timedelta(hours=1), freq="daily", interval=1, weekdays="0,2,4", until=None, count=None),
+        now, now + timedelta(days=14),
+    )) + 1
+    first = client.get("/availability/offers/mine?page_size=3&sort=start_at", headers=hdr).json()
+    assert first["total"] == expected
+    assert [i["rule_id"] for i in first["items"]] == [rule_id, rule_id, None]
+    assert first["items"][0]["id"] is None
+
+    # Keyset and offset paging walk the same merged sequence
+    seen, cursor = list(first["items"]), first["next_cursor"]
+    while cursor:
+        page = client.get(f"/availability/offers/mine?page_size=3&sort=start_at&cursor={cursor}", headers=hdr).json()
+        seen += page["items"]
+        cursor = page["next_cursor"]
+    assert len(seen) == expected
+    assert [i["start_at"] for i in seen] == sorted(i["start_at"] for i in seen)
+    second = client.get("/availability/offers/mine?page=2&page_size=3&sort=start_at", headers=hdr).json()
+    assert second["items"] == seen[3:6]
+
+    assert client.delete(f"/availability/rules/{rule_id}", headers=hdr).status_code == 204
+    assert client.get("/availability/offers/mine", headers=hdr).json()["total"] == 1
+
+
+def test_rule_validation():
+    client = TestClient(create_app())
+    hdr = _login(client, "badrule@example.com")
+    monday = _next_monday(8)
+    long = _slot(monday, monday + timedelta(days=1, hours=1))
+    assert client.post("/availability/offers/rules", json=long, headers=hdr).status_code == 400
+    never = {**_slot(monday, monday + timedelta(hours=1)), "freq": "daily", "interval": 7, "weekdays": [3]}
+    assert client.post("/availability/offers/rules", json=never, headers=hdr).json()["detail"] == "Recurrence has no occurrences"
+    other = _login(client, "notmine@example.com")
+    rule_id = client.post("/availability/offers/rules", json=_slot(monday, monday + timedelta(hours=1)), headers=hdr).json()["id"]
+    assert client.delete(f"/availability/rules/{rule_id}", headers=other).status_code == 404
+
+
+def test_rules_and_one_off_slots_cannot_overlap(monkeypatch):
+    monkeypatch.setattr(settings, "availability_rule_horizon_days", 14)
+    client = TestClient(create_app())
+    hdr = _login(client, "noclash@example.com")
+    monday = _next_monday(8)
+    # Far beyond the horizon: overlap checks cover the rule's whole lifetime
+    far = monday + timedelta(weeks=20, minutes=30)
+    assert client.post("/availability/offers", json=_slot(far, far + timedelta(hours=1)), headers=hdr).status_code == 200
+    r = client.post("/availability/offers/rules", json=_slot(monday, monday + timedelta(hours=1)), headers=hdr)
+    assert (r.status_code, r.json()["detail"]) == (400, "Overlapping offer exists")
+    # Different kind, or occurrences ending before the slot, are fine
+    assert client.post("/availability/requests/rules", json=_slot(monday, monday + timedelta(hours=1)), headers=hdr).status_code == 200
+    until = {**_slot(monday, monday + timedelta(hours=1)), "until": (far - timedelta(days=1)).isoformat()}
+    assert client.post("/availability/offers/rules", json=until, headers=hdr).status_code == 200
+
+    # Slots and batches against existing rules
+    tuesday = monday + timedelta(days=1)
+    assert client.post("/availability/offers/rules", json=_slot(tuesday, tuesday + timedelta(hours=2)), headers=hdr).status_code == 200
+    later = tuesday + timedelta(weeks=30, hours=1)
+    r = client.post("/availability/offers", json=_slot(later, later + timedelta(hours=2)), headers=hdr)
+    assert (r.status_code, r.json()["detail"]) == (400, "Overlapping offer exists")
+    batch = {"slots": [_slot(later + timedelta(days=1), later + timedelta(days=1, hours=1)), _slot(later, later + timedelta(hours=2))]}
+    assert client.post("/availability/offers/batch", json=batch, headers=hdr).json()["detail"] == "Overlapping offer exists"
+
+    # Rule against rule: every other Tuesday meets every Tuesday
+    biweekly = {**_slot(tuesday + timedelta(weeks=1, hours=1), tuesday + timedelta(weeks=1, hours=3)), "interval": 2}
+    r = client.post("/availability/offers/rules", json=biweekly, headers=hdr)
+    assert (r.status_code, r.json()["detail"]) == (400, "Overlapping offer exists")
+    # Sparse rules with coprime intervals answer at once either way
+    sparse = {**_slot(monday + timedelta(days=3), monday + timedelta(days=3, hours=1)), "interval": 365}
+    assert client.post("/availability/offers/rules", json=sparse, headers=hdr).status_code == 200
+    sparse = {**_slot(monday + timedelta(days=3, minutes=30), monday + timedelta(days=3, hours=2)), "interval": 366}
+    r = client.post("/availability/offers/rules", json=sparse, headers=hdr)
+    assert (r.status_code, r.json()["detail"]) == (400, "Overlapping offer exists")
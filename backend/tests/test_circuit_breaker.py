@@ -0,0 +1,100 @@
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from fastapi.testclient import TestClient
+from app.main import create_app
+from app.db import SessionLocal
+from app.models import EmailOutbox
+from app.services import email
+from app.services.circuit import CircuitBreaker, CircuitOpenError
+from app.workers import outbox as outbox_worker
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_breaker_opens_half_opens_and_closes():
+    clock = FakeClock()
+    breaker = CircuitBreaker("t", failure_threshold=2, reset_timeout=10, clock=clock)
+
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+    assert breaker.retry_in() == 10
+
+    clock.now = 10
+    assert breaker.allow()  # single half-open probe
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    clock.now = 20
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    snap = breaker.snapshot()
+    assert snap["times_opened"] == 2
+    assert snap["rejected"] == 2
+    assert snap["failures"] == 3 and snap["successes"] == 1
+
+
+def test_open_circuit_fails_fast_and_outbox_defers(monkeypatch):
+    client = TestClient(create_app())
+    client.post("/auth/register", json={"email": "breaker@example.com", "password": "password123"})
+
+    calls = []
+    monkeypatch.setattr(email, "breaker", CircuitBreaker("smtp", failure_threshold=1, reset_timeout=60))
+
+    class DownTransport:
+        def send_many(self, messages):
+            calls.append(len(messages))
+            return [ConnectionRefusedError("down")] * len(messages)
+
+    monkeypatch.setattr(email, "get_transport", lambda: DownTransport())
+    assert isinstance(email.send_many([("a@example.com", "s", "b")])[0], ConnectionRefusedError)
+    errors = email.send_many([("a@example.com", "s", "b")] * 3)
+    assert all(isinstance(e, CircuitOpenError) for e in errors)
+    assert calls == [1]
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        assert outbox_worker.drain_once(pool) == 1
+    assert calls == [1]
+    db = SessionLocal()
+    try:
+        row = db.query(EmailOutbox).one()
+        # Deferred, not counted as a delivery attempt
+        assert (row.status, row.attempts) == ("pending", 0)
+    finally:
+        db.close()
+
+
+def test_probe_that_raises_does_not_wedge_the_breaker(monkeypatch):
+    clock = FakeClock()
+    breaker = CircuitBreaker("smtp", failure_threshold=1, reset_timeout=10, clock=clock)
+    monkeypatch.setattr(email, "breaker", breaker)
+    breaker.record_failure()
+
+    def broken_transport():
+        raise RuntimeError("pool misconfigured")
+
+    clock.now = 10
+    monkeypatch.setattr(email, "get_transport", broken_transport)
+    with pytest.raises(RuntimeError):
+        email.send_many([("a@example.com", "s", "b")])
+    # The probe's failure was recorded: open again, and half-open after the timeout
+    assert breaker.state == CircuitBreaker.OPEN
+    clock.now = 20
+    assert breaker.allow()
+
+    # A probe whose caller never reports back is given up after another reset_timeout
+    assert not breaker.allow()
+    clock.now = 30
+    assert breaker.allow()
@@ -0,0 +1,28 @@
+import pytest
+from sqlalchemy import create_engine
+from app.db import async_url, engine, install_sqlite_pragmas
+
+
+def test_async_url_swaps_in_async_drivers():
+    assert async_url("sqlite:///./miguafi.db") == "sqlite+aiosqlite:///./miguafi.db"
+    assert async_url("postgresql://u:p@db:5432/app") == "postgresql+asyncpg://u:p@db:5432/app"
+    assert async_url("postgresql+psycopg2://u:p@db/app") == "postgresql+asyncpg://u:p@db/app"
+
+
+def test_async_url_rejects_unknown_backends():
+    with pytest.raises(RuntimeError):
+        async_url("mysql://u:p@db/app")
+
+
+def test_sqlite_connections_get_wal_and_pragmas(tmp_path):
+    eng = create_engine(f"sqlite:///{tmp_path / 'p.db'}")
+    install_sqlite_pragmas(eng, {"journal_mode": "WAL", "synchronous": "NORMAL", "busy_timeout": 1234})
+    with eng.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+        assert conn.exec_driver_sql("PRAGMA synchronous").scalar() == 1
+        assert conn.exec_driver_sql("PRAGMA busy_timeout").scalar() == 1234
+    eng.dispose()
+
+    # The app's own engine is configured from settings
+    with engine.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
@@ -0,0 +1,127 @@
+import hashlib
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.jobs import sweep_uploads
+from app.main import create_app
+from app.services import storage as storage_mod
+
+
+def _owner(client, email, dog_name):
+    client.post("/auth/register", json={"email": email, "password": "password123"})
+    token = client.post("/auth/login", data={"username": email, "password": "password123"}).json()["access_token"]
+    hdr = {"Authorization": f"Bearer {token}"}
+    dog_id = client.post("/dogs/", json={"name": dog_name}, headers=hdr).json()["id"]
+    return hdr, dog_id
+
+
+def _ask(client, hdr, dog_id, data, content_type="image/png"):
+    body = {"content_type": content_type, "size": len(data), "sha256": hashlib.sha256(data).hexdigest(), "filename": "p.png"}
+    return client.post(f"/dogs/{dog_id}/photo/upload-url", json=body, headers=hdr)
+
+
+def test_local_direct_upload_then_confirm(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "storage_backend", "local")
+    monkeypatch.setattr(settings, "storage_local_dir", str(tmp_path))
+    storage_mod.reset_storage()
+    client = TestClient(create_app())
+    hdr, dog_id = _owner(client, "direct@example.com", "DIRE01")
+    data = b"\x89PNG" + os.urandom(2048)
+
+    r = _ask(client, hdr, dog_id, data)
+    assert r.status_code == 200
+    key, upload = r.json()["key"], r.json()["upload"]
+    assert key == f"{hashlib.sha256(data).hexdigest()}.png"
+    assert upload["method"] == "PUT" and upload["url"].startswith("/uploads/")
+    # The signed URL needs no bearer token
+    assert client.put(upload["url"], content=data, headers=upload["headers"]).status_code == 204
+
+    r = client.post(f"/dogs/{dog_id}/photo/confirm", json={"key": key}, headers=hdr)
+    assert r.status_code == 200
+    assert r.json()["photo_url"] == f"/static/uploads/{key}"
+    assert (tmp_path / key).read_bytes() == data
+
+    # Same bytes again: already stored, nothing to upload
+    assert _ask(client, hdr, dog_id, data).json() == {"key": key, "upload": None}
+    storage_mod.reset_storage()
+
+
+def test_local_direct_upload_rejects_mismatched_content(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "storage_backend", "local")
+    monkeypatch.setattr(settings, "storage_local_dir", str(tmp_path))
+    storage_mod.reset_storage()
+    client = TestClient(create_app())
+    hdr, dog_id = _owner(client, "liar@example.com", "LIAR02")
+    data = b"\x89PNG" + b"a" * 100
+
+    upload = _ask(client, hdr, dog_id, data).json()["upload"]
+    r = client.put(upload["url"], content=b"\x89PNG" + b"b" * 100, headers=upload["headers"])
+    assert r.status_code == 400
+    # Stored under its real hash, never attached: left to the sweep
+    assert len(list(tmp_path.iterdir())) == 1
+    assert sweep_uploads.run(older_than=0) >= 1
+    assert list(tmp_path.iterdir()) == []
+    # Bigger than announced, or a forged token
+    assert client.put(upload["url"], content=data + b"x", headers=upload["headers"]).status_code == 400
+    assert client.put("/uploads/not-a-token", content=data, headers=upload["headers"]).status_code == 403
+    # Nothing was stored, so there is nothing to confirm
+    key = f"{hashlib.sha256(data).hexdigest()}.png"
+    assert client.post(f"/dogs/{dog_id}/photo/confirm", json={"key": key}, headers=hdr).status_code == 400
+    assert client.post(f"/dogs/{dog_id}/photo/confirm", json={"key": "../secret"}, headers=hdr).status_code == 400
+    storage_mod.reset_storage()
+
+
+def test_upload_url_checks_owner_type_and_size(monkeypatch):
+    client = TestClient(create_app())
+    hdr, dog_id = _owner(client, "checks@example.com", "CHEK03")
+    other, _ = _owner(client, "other@example.com", "OTHR04")
+    assert _ask(client, other, dog_id, b"x").status_code == 403
+    assert _ask(client, hdr, dog_id, b"x", content_type="text/plain").status_code == 400
+    monkeypatch.setattr(settings, "upload_max_bytes", 10)
+    assert _ask(client, hdr, dog_id, b"x" * 11).status_code == 400
+
+
+def test_s3_presigned_upload_goes_straight_to_the_bucket(monkeypatch):
+    pytest.importorskip("moto.server")
+    import boto3
+    import httpx
+    from moto.server import ThreadedMotoServer
+
+    server = ThreadedMotoServer(port=0)
+    server.start()
+    try:
+        host, port = server.get_host_and_port()
+        endpoint = f"http://{host}:{port}"
+        for name, value in {
+            "storage_backend": "s3",
+            "s3_endpoint_url": endpoint,
+            "s3_public_base_url": None,
+            "s3_access_key": "test",
+            "s3_secret_key": "test",
+            "s3_region": "us-east-1",
+            "s3_bucket": "photos",
+        }.items():
+            monkeypatch.setattr(settings, name, value)
+        boto3.client(
+            "s3", endpoint_url=endpoint, aws_access_key_id="test", aws_secret_access_key="test", region_name="us-east-1"
+        ).create_bucket(Bucket="photos")
+        storage_mod.reset_storage()
+
+        client = TestClient(create_app())
+        hdr, dog_id = _owner(client, "s3direct@example.com", "BUCK05")
+        data = b"\x89PNG" + os.urandom(4096)
+        body = _ask(client, hdr, dog_id, data).json()
+        key, upload = body["key"], body["upload"]
+        assert key.startswith("dogs/") and upload["url"].startswith(endpoint)
+        assert "x-amz-checksum-sha256" in upload["headers"]
+        assert httpx.put(upload["url"], content=data, headers=upload["headers"]).status_code == 200
+
+        r = client.post(f"/dogs/{dog_id}/photo/confirm", json={"key": key}, headers=hdr)
+        assert r.status_code == 200
+        assert r.json()["photo_url"].endswith(f"/photos/{key}")
+    finally:
+        storage_mod.reset_storage()
+        server.stop()
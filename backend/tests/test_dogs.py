@@ -106,8 +106,8 @@ def test_upload_photo_with_s3_mock(monkeypatch):
     from app.services import storage as storage_mod
 
     class FakeS3(storage_mod.StorageService):
-        def save(self, fileobj, filename, content_type=None) -> str:
-            return "http://minio/miguafi/dogs/fake-key.png"
+        def save(self, fileobj, filename, content_type=None, max_bytes=None, on_key=None):
+            return storage_mod.StoredFile("http://minio/miguafi/dogs/fake-key.png", "dogs/fake-key.png", 0, "")
 
     monkeypatch.setattr(storage_mod, "get_storage", lambda: FakeS3())
 
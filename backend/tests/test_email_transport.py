@@ -0,0 +1,28 @@
+from app.services.email import SMTPPool, build_message
+from benchmarks.smtp_sink import SMTPSink
+
+
+def test_send_many_reuses_pooled_sessions():
+    with SMTPSink() as sink:
+        pool = SMTPPool("127.0.0.1", sink.port, size=2, max_messages=100)
+        msgs = [build_message(f"u{i}@example.com", "Hi", "Body") for i in range(10)]
+        assert pool.send_many(msgs[:5]) == [None] * 5
+        assert pool.send_many(msgs[5:]) == [None] * 5
+        pool.close()
+    assert sink.messages == 10
+    assert sink.connections == 1
+
+
+def test_send_many_recycles_and_reports_connect_errors():
+    with SMTPSink() as sink:
+        pool = SMTPPool("127.0.0.1", sink.port, size=1, max_messages=3)
+        msgs = [build_message("u@example.com", "Hi", "Body") for _ in range(7)]
+        assert pool.send_many(msgs) == [None] * 7
+        pool.close()
+        port = sink.port
+    assert sink.connections == 3
+
+    # Sink is gone: every message fails fast with the connect error
+    pool = SMTPPool("127.0.0.1", port, size=1, timeout=0.5)
+    errors = pool.send_many(msgs[:3])
+    assert len(errors) == 3 and all(isinstance(e, OSError) for e in errors)
@@ -0,0 +1,87 @@
+from datetime import datetime, timedelta
+from fastapi.testclient import TestClient
+from app.main import create_app
+from app.services import geo
+
+LYON = (45.764, 4.8357)
+VILLEURBANNE = (45.7719, 4.8902)
+PARIS = (48.8566, 2.3522)
+
+
+def test_haversine_and_covering_cells():
+    d = geo.haversine_km(*LYON, *PARIS)
+    assert 390 < d < 395
+    cells = geo.cells_within(*LYON, radius_km=25, cell_km=10)
+    assert geo.cell_for(*VILLEURBANNE, cell_km=10) in cells
+    assert geo.cell_for(*PARIS, cell_km=10) not in cells
+    # A point just inside the radius in a neighbouring cell is still covered
+    north = (LYON[0] + 24 / geo.KM_PER_DEG_LAT, LYON[1])
+    assert geo.cell_for(*north, cell_km=10) in cells
+
+
+def reg_login(client: TestClient, email: str, loc) -> str:
+    lat, lng = loc
+    r = client.post("/auth/register", json={"email": email, "password": "password123", "location_lat": lat, "location_lng": lng})
+    assert r.status_code == 200
+    r = client.post("/auth/login", data={"username": email, "password": "password123"})
+    return r.json()["access_token"]
+
+
+def test_offer_only_notifies_nearby_requesters():
+    client = TestClient(create_app())
+    walker = reg_login(client, "walker@example.com", LYON)
+    near = reg_login(client, "near@example.com", VILLEURBANNE)
+    far = reg_login(client, "far@example.com", PARIS)
+
+    now = datetime.utcnow()
+    req = {"start_at": (now + timedelta(hours=2)).isoformat(), "end_at": (now + timedelta(hours=3)).isoformat()}
+    for token in (near, far):
+        r = client.post("/availability/requests", json=req, headers={"Authorization": f"Bearer {token}"})
+        assert r.status_code == 200
+
+    offer = {"start_at": (now + timedelta(hours=1)).isoformat(), "end_at": (now + timedelta(hours=4)).isoformat()}
+    r = client.post("/availability/offers", json=offer, headers={"Authorization": f"Bearer {walker}"})
+    assert r.status_code == 200
+
+    totals = {}
+    for name, token in (("near", near), ("far", far)):
+        r = client.get("/notifications/me", headers={"Authorization": f"Bearer {token}"})
+        totals[name] = r.json()["total"]
+    assert totals == {"near": 1, "far": 0}
+
+    # Moving the far user next door brings them into range
+    r = client.put("/users/me", json={"location_lat": LYON[0], "location_lng": LYON[1]}, headers={"Authorization": f"Bearer {far}"})
+    assert r.status_code == 200
+    later = {"start_at": (now + timedelta(hours=5)).isoformat(), "end_at": (now + timedelta(hours=8)).isoformat()}
+    client.post("/availability/offers", json=later, headers={"Authorization": f"Bearer {walker}"})
+    req2 = {"start_at": (now + timedelta(hours=6)).isoformat(), "end_at": (now + timedelta(hours=7)).isoformat()}
+    client.post("/availability/requests", json=req2, headers={"Authorization": f"Bearer {far}"})
+    r = client.get("/notifications/me", headers={"Authorization": f"Bearer {walker}"})
+    assert r.json()["total"] == 1
+
+
+def reg_login_unlocated(client: TestClient, email: str) -> str:
+    client.post("/auth/register", json={"email": email, "password": "password123"})
+    return client.post("/auth/login", data={"username": email, "password": "password123"}).json()["access_token"]
+
+
+def test_pairs_without_a_location_match_whichever_side_posts_last():
+    client = TestClient(create_app())
+    now = datetime.utcnow()
+    offer = {"start_at": (now + timedelta(hours=1)).isoformat(), "end_at": (now + timedelta(hours=4)).isoformat()}
+    req = {"start_at": (now + timedelta(hours=2)).isoformat(), "end_at": (now + timedelta(hours=3)).isoformat()}
+
+    totals = []
+    for order in ("located_first", "unlocated_first"):
+        located = reg_login(client, f"located-{order}@example.com", LYON)
+        unlocated = reg_login_unlocated(client, f"unlocated-{order}@example.com")
+        # The located user offers, the other requests; only the posting order differs
+        posts = [("/availability/offers", offer, located), ("/availability/requests", req, unlocated)]
+        if order == "unlocated_first":
+            posts.reverse()
+        for path, body, token in posts:
+            assert client.post(path, json=body, headers={"Authorization": f"Bearer {token}"}).status_code == 200
+        # Whoever posted first hears about the match
+        first = posts[0][2]
+        totals.append(client.get("/notifications/me", headers={"Authorization": f"Bearer {first}"}).json()["total"])
+    assert totals == [1, 1]
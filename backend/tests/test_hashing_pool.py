@@ -0,0 +1,114 @@
+import asyncio
+import threading
+import time
+from fastapi.testclient import TestClient
+from app.main import create_app
+from app.services import hashing
+from app.services.hashing import HashingBusy, HashingPool
+
+
+def test_pool_hashes_in_worker_processes_and_reports_timing():
+    pool = HashingPool(workers=1, max_pending=2, timeout=30)
+    try:
+        hashed = pool.run(hashing.hash_in_worker, "password123", 1000)
+        assert hashed.startswith("$pbkdf2-sha256$1000$")
+        assert pool.run(hashing.verify_in_worker, "password123", hashed)
+        assert not pool.run(hashing.verify_in_worker, "wrong", hashed)
+    finally:
+        pool.shutdown()
+    stats = pool.stats()
+    assert stats["calls"] == 3 and stats["in_flight"] == 0 and stats["max_ms"] > 0
+
+
+def test_run_async_awaits_worker_and_shares_admission():
+    pool = HashingPool(workers=1, max_pending=1, timeout=30)
+    try:
+        hashed = asyncio.run(pool.run_async(hashing.hash_in_worker, "password123", 1000))
+        assert asyncio.run(pool.run_async(hashing.verify_in_worker, "password123", hashed))
+        assert pool._admission.acquire(blocking=False)
+        try:
+            asyncio.run(pool.run_async(hashing.verify_in_worker, "password123", hashed))
+            assert False, "expected HashingBusy"
+        except HashingBusy:
+            pass
+    finally:
+        pool.shutdown()
+    assert pool.stats()["calls"] == 2 and pool.stats()["rejected"] == 1
+
+
+def test_pool_rejects_when_admission_is_full():
+    pool = HashingPool(workers=0, max_pending=1, timeout=30)
+    started, release = threading.Event(), threading.Event()
+
+    def slow():
+        started.set()
+        release.wait(5)
+        return "done"
+
+    t = threading.Thread(target=pool.run, args=(slow,))
+    t.start()
+    started.wait(5)
+    try:
+        pool.run(slow)
+        assert False, "expected HashingBusy"
+    except HashingBusy:
+        pass
+    release.set()
+    t.join()
+    assert pool.stats()["rejected"] == 1
+
+
+def test_login_returns_503_with_retry_after_when_saturated(monkeypatch):
+    client = TestClient(create_app())
+    client.post("/auth/register", json={"email": "busy@example.com", "password": "password123"})
+
+    full = HashingPool(workers=0, max_pending=1, timeout=30)
+    assert full._admission.acquire(blocking=False)
+    monkeypatch.setattr(hashing, "pool", full)
+    r = client.post("/auth/login", data={"username": "busy@example.com", "password": "password123"})
+    assert r.status_code == 503
+    assert r.headers["Retry-After"] == "1"
+    # Cheap endpoints are unaffected
+    assert client.get("/health").status_code == 200
+
+
+def _sleep_in_worker(seconds: float) -> float:
+    time.sleep(seconds)
+    return seconds
+
+
+def test_timed_out_jobs_keep_their_slot_until_they_finish():
+    pool = HashingPool(workers=1, max_pending=2, timeout=30)
+    try:
+        # Start the spawned worker first so only the sleep counts against the timeout
+        pool.run(_sleep_in_worker, 0)
+        pool.timeout = 0.2
+        try:
+            pool.run(_sleep_in_worker, 1.5)
+            assert False, "expected HashingBusy"
+        except HashingBusy:
+            pass
+        # Still running in the worker: it holds one of the two slots
+        assert pool.stats()["in_flight"] == 1
+        # Times out queued behind it; already handed to the worker process, so it can't
+        # be cancelled and keeps the second slot until it has run
+        try:
+            pool.run(_sleep_in_worker, 0)
+            assert False, "expected HashingBusy"
+        except HashingBusy:
+            pass
+        assert pool.stats()["in_flight"] == 2
+        # Abandoned jobs still fill the queue: the next caller is refused at admission
+        try:
+            pool.run(_sleep_in_worker, 0)
+            assert False, "expected HashingBusy"
+        except HashingBusy:
+            pass
+        deadline = time.monotonic() + 5
+        while pool.stats()["in_flight"] and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert pool.stats()["in_flight"] == 0
+    finally:
+        pool.shutdown()
+    stats = pool.stats()
+    assert stats["timeouts"] == 2 and stats["rejected"] == 1
@@ -0,0 +1,81 @@
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.main import create_app
+from app.workers import images as images_worker
+
+Image = pytest.importorskip("PIL.Image")
+
+
+def png_bytes(width: int, height: int) -> bytes:
+    buf = io.BytesIO()
+    Image.new("RGB", (width, height), (200, 120, 40)).save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def stored_path(url: str) -> str:
+    return os.path.join(settings.storage_local_dir, url.rsplit("/", 1)[1])
+
+
+def test_photo_upload_gets_bounded_webp_variants():
+    client = TestClient(create_app())
+    client.post("/auth/register", json={"email": "pics@example.com", "password": "password123"})
+    token = client.post("/auth/login", data={"username": "pics@example.com", "password": "password123"}).json()["access_token"]
+    hdr = {"Authorization": f"Bearer {token}"}
+    dog_id = client.post("/dogs/", json={"name": "PIXEL12"}, headers=hdr).json()["id"]
+
+    r = client.post(f"/dogs/{dog_id}/photo", files={"file": ("big.png", png_bytes(2400, 1200), "image/png")}, headers=hdr)
+    assert r.status_code == 200
+    # The upload response only carries the original; variants come from the worker
+    assert r.json()["photo_thumb_url"] is None
+    assert client.get("/dogs/me", headers=hdr).json()[0]["photo_thumb_url"] is None
+    with images_worker._pool(1) as pool:
+        while images_worker.drain_once(pool):
+            pass
+
+    dog = client.get("/dogs/me", headers=hdr).json()[0]
+    with Image.open(stored_path(dog["photo_thumb_url"])) as thumb:
+        assert thumb.format == "WEBP" and max(thumb.size) == settings.image_thumbnail_px
+    with Image.open(stored_path(dog["photo_webp_url"])) as full:
+        assert full.format == "WEBP" and full.size == (settings.image_max_px, settings.image_max_px // 2)
+
+    # Pointing photo_url at another upload drops the now-stale variants
+    r = client.put(f"/dogs/{dog_id}", json={"photo_url": dog["photo_webp_url"]}, headers=hdr)
+    assert r.json()["photo_thumb_url"] is None and r.json()["photo_webp_url"] is None
+
+
+def test_jobs_for_a_replaced_photo_attach_nothing_and_failures_back_off():
+    from app.db import SessionLocal
+    from app.models import Dog, ImageJob
+    from app.services import image_jobs, storage
+
+    create_app()
+    stored = storage.get_storage().save(io.BytesIO(png_bytes(50, 50)), "a.png")
+    db = SessionLocal()
+    dog = Dog(name="STALE10", photo_url="/static/uploads/newer.png")
+    db.add(dog)
+    db.flush()
+    image_jobs.enqueue_variants(db, dog.id, stored.key, stored.url)
+    broken = Dog(name="BROKE11", photo_url="/static/uploads/missing.png")
+    db.add(broken)
+    db.flush()
+    image_jobs.enqueue_variants(db, broken.id, "missing.png", broken.photo_url)
+    db.commit()
+    stale_job, broken_job = db.query(ImageJob).order_by(ImageJob.id.desc()).limit(2).all()[::-1]
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        while images_worker.drain_once(pool):
+            pass
+    db.expire_all()
+    assert db.get(Dog, dog.id).photo_thumb_url is None
+    assert db.get(ImageJob, stale_job.id).status == "done"
+    # Unreadable upload: retried later rather than dropped
+    job = db.get(ImageJob, broken_job.id)
+    assert (job.status, job.attempts) == ("pending", 1) and job.last_error
+    assert db.get(Dog, broken.id).photo_thumb_url is None
+    db.close()
@@ -0,0 +1,51 @@
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+
+from app.main import create_app
+
+
+def _client_and_hdr(email: str):
+    client = TestClient(create_app())
+    client.post("/auth/register", json={"email": email, "password": "password123"})
+    token = client.post("/auth/login", data={"username": email, "password": "password123"}).json()["access_token"]
+    return client, {"Authorization": f"Bearer {token}"}
+
+
+def test_large_pages_are_gzipped_and_keep_iso_datetimes():
+    client, hdr = _client_and_hdr("gzip@example.com")
+    start = (datetime.utcnow() + timedelta(days=1)).replace(microsecond=0)
+    slots = []
+    for i in range(25):
+        s = start + timedelta(hours=2 * i)
+        slots.append((s, s + timedelta(hours=1)))
+        r = client.post("/availability/offers", json={"start_at": s.isoformat(), "end_at": (s + timedelta(hours=1)).isoformat()}, headers=hdr)
+        assert r.status_code == 200
+
+    r = client.get("/availability/offers/mine?page_size=25&sort=start_at", headers={**hdr, "Accept-Encoding": "gzip"})
+    assert r.status_code == 200
+    assert r.headers["content-encoding"] == "gzip"
+    body = r.json()
+    assert body["total"] == 25 and body["page"] == 1 and body["next_cursor"] is None
+    assert [(i["start_at"], i["end_at"]) for i in body["items"]] == [(s.isoformat(), e.isoformat()) for s, e in slots]
+
+    # Small payloads go out as-is
+    r = client.get("/notifications/me/unread-count", headers={**hdr, "Accept-Encoding": "gzip"})
+    assert "content-encoding" not in r.headers
+
+
+def test_page_models_are_documented():
+    client = TestClient(create_app())
+    schema = client.get("/openapi.json").json()
+    ok = schema["paths"]["/availability/offers/mine"]["get"]["responses"]["200"]["content"]["application/json"]["schema"]
+    assert ok["$ref"].endswith("/SlotPage")
+    assert "NotificationOut" in schema["components"]["schemas"]
+
+
+def test_uploaded_photos_are_never_gzipped():
+    client, hdr = _client_and_hdr("nogzip@example.com")
+    dog_id = client.post("/dogs/", json={"name": "ZIPP07"}, headers=hdr).json()["id"]
+    files = {"file": ("p.png", b"\x89PNG" + b"0" * 4096, "image/png")}
+    url = client.post(f"/dogs/{dog_id}/photo", files=files, headers=hdr).json()["photo_url"]
+    r = client.get(url, headers={"Accept-Encoding": "gzip"})
+    assert r.status_code == 200 and "content-encoding" not in r.headers
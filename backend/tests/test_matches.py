@@ -0,0 +1,73 @@
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+
+from app.db import SessionLocal
+from app.main import create_app
+from app.models import Match, Notification, User
+from app.services import matches
+from app.services.matching import Window
+
+
+def _login(client: TestClient, email: str) -> dict:
+    client.post("/auth/register", json={"email": email, "password": "password123"})
+    token = client.post("/auth/login", data={"username": email, "password": "password123"}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _slot(start: datetime, end: datetime) -> dict:
+    return {"start_at": start.isoformat(), "end_at": end.isoformat()}
+
+
+def _count(model) -> int:
+    db = SessionLocal()
+    try:
+        return db.query(model).count()
+    finally:
+        db.close()
+
+
+def test_pairs_are_notified_once_and_listed_for_both_sides():
+    client = TestClient(create_app())
+    start = (datetime.utcnow() + timedelta(days=1)).replace(microsecond=0)
+    requester = _login(client, "needs@example.com")
+    walker = _login(client, "gives@example.com")
+    req_id = client.post("/availability/requests", json=_slot(start + timedelta(hours=1), start + timedelta(hours=2)), headers=requester).json()["id"]
+    offer = _slot(start, start + timedelta(hours=3))
+    offer_id = client.post("/availability/offers", json=offer, headers=walker).json()["id"]
+    assert (_count(Match), _count(Notification)) == (1, 1)
+
+    mine = client.get("/availability/matches/mine", headers=requester).json()
+    assert mine["total"] == 1
+    item = mine["items"][0]
+    assert item["role"] == "request"
+    assert (item["offer"]["id"], item["request"]["id"]) == (offer_id, req_id)
+    assert item["offer"]["start_at"] == start.isoformat()
+    assert client.get("/availability/matches/mine", headers=walker).json()["items"][0]["role"] == "offer"
+
+    # Deleting the offer hides the match; re-posting the same window relinks it without a second notification
+    assert client.delete(f"/availability/offers/{offer_id}", headers=walker).status_code == 204
+    assert client.get("/availability/matches/mine", headers=requester).json()["total"] == 0
+    new_id = client.post("/availability/offers", json=offer, headers=walker).json()["id"]
+    assert (_count(Match), _count(Notification)) == (1, 1)
+    assert client.get("/availability/matches/mine", headers=requester).json()["items"][0]["offer"]["id"] == new_id
+
+
+def test_record_returns_only_new_pairs_including_rule_occurrences():
+    client = TestClient(create_app())
+    _login(client, "pair1@example.com")
+    _login(client, "pair2@example.com")
+    db = SessionLocal()
+    try:
+        a, b = [u.id for u in db.query(User).order_by(User.email).all()]
+        start = datetime(2030, 1, 7, 8)
+        offer = Window(a, start, start + timedelta(hours=2), rule_id=1)
+        request = Window(b, start, start + timedelta(hours=1), rule_id=2)
+        later = Window(b, start + timedelta(days=7), start + timedelta(days=7, hours=1), rule_id=2)
+        assert matches.record(db, [(offer, request), (offer, request)]) == [(offer, request)]
+        assert matches.record(db, [(offer, request), (offer, later)]) == [(offer, later)]
+        db.commit()
+        row = db.query(Match).filter(Match.request_start_at == start).one()
+        assert (row.offer_id, row.offer_rule_id, row.request_rule_id) == (None, 1, 2)
+    finally:
+        db.close()
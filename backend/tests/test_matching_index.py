@@ -0,0 +1,102 @@
+from datetime import datetime, timedelta
+from fastapi.testclient import TestClient
+from app.main import create_app
+from app.core.config import settings
+from app.services import matching
+from app.services.matching import IntervalIndex
+
+
+def test_interval_index_within_and_containing():
+    base = datetime(2030, 1, 1, 8)
+    index = IntervalIndex()
+    index.load([
+        (1, "u1", base, base + timedelta(hours=4)),
+        (2, "u2", base + timedelta(hours=1), base + timedelta(hours=2)),
+        (3, "u3", base + timedelta(hours=3), base + timedelta(hours=6)),
+    ])
+
+    assert sorted(index.within(base, base + timedelta(hours=4))) == [1, 2]
+    assert index.within(base, base + timedelta(hours=4), exclude_user="u1") == [2]
+    assert sorted(index.containing(base + timedelta(hours=1), base + timedelta(hours=2))) == [1, 2]
+    assert index.containing(base + timedelta(hours=3), base + timedelta(hours=5)) == [3]
+
+    index.remove(1, "u1", base, base + timedelta(hours=4))
+    assert index.containing(base + timedelta(hours=1), base + timedelta(hours=2)) == [2]
+
+    index.add(4, "u4", base - timedelta(hours=2), base + timedelta(hours=8))
+    assert sorted(index.containing(base + timedelta(hours=3), base + timedelta(hours=5))) == [3, 4]
+
+    index.prune(base + timedelta(hours=5))
+    assert len(index) == 2
+
+
+def test_interval_index_lookup_bound_shrinks_with_removals_and_pruning():
+    base = datetime(2030, 1, 1, 8)
+    index = IntervalIndex()
+    index.load([(1, "u1", base, base + timedelta(hours=1)), (2, "u2", base, base + timedelta(hours=2))])
+    index.add(3, "u3", base, base + timedelta(days=7))
+    assert index.max_span == timedelta(days=7)
+    index.remove(3, "u3", base, base + timedelta(days=7))
+    assert index.max_span == timedelta(hours=2)
+    index.add(4, "u4", base - timedelta(days=6), base + timedelta(hours=1, minutes=30))
+    index.prune(base + timedelta(hours=1, minutes=30))
+    assert len(index) == 1 and index.max_span == timedelta(hours=2)
+
+
+def test_loaded_indexes_drop_ended_windows_a_step_per_lookup(monkeypatch):
+    base = datetime.utcnow()
+    matching.reset_indexes()
+    monkeypatch.setattr(matching, "_loaded", True)
+    monkeypatch.setattr(matching, "_PRUNE_STEP", 2)
+    matching.offer_index.load([(i, "u1", base - timedelta(hours=2), base - timedelta(hours=1)) for i in range(3)])
+    matching.offer_index.add(3, "u1", base - timedelta(hours=2), base + timedelta(hours=1))
+    matching._ensure_loaded(None)
+    assert len(matching.offer_index) == 2  # one step: the rest is left for the next lookup
+    matching._ensure_loaded(None)
+    assert len(matching.offer_index) == 1
+    assert matching.offer_index.containing(base, base) == [3]
+    matching.reset_indexes()
+
+
+def test_interval_index_prune_skips_windows_already_removed():
+    base = datetime(2030, 1, 1, 8)
+    index = IntervalIndex()
+    index.add(1, "u1", base, base + timedelta(hours=1))
+    index.remove(1, "u1", base, base + timedelta(hours=1))
+    index.add(1, "u1", base, base + timedelta(hours=1))
+    index.add(2, "u2", base, base + timedelta(hours=3))
+    assert index.prune(base + timedelta(hours=2)) == 2
+    assert len(index) == 1 and index.max_span == timedelta(hours=3)
+
+
+def reg_login(client: TestClient, email: str) -> str:
+    r = client.post("/auth/register", json={"email": email, "password": "password123"})
+    assert r.status_code == 200
+    r = client.post("/auth/login", data={"username": email, "password": "password123"})
+    return r.json()["access_token"]
+
+
+def test_matching_with_index_enabled_tracks_create_and_delete(monkeypatch):
+    monkeypatch.setattr(settings, "matching_index_enabled", True)
+    client = TestClient(create_app())
+    t1 = reg_login(client, "idx1@example.com")
+    t2 = reg_login(client, "idx2@example.com")
+
+    now = datetime.utcnow()
+    offer = {"start_at": (now + timedelta(hours=1)).isoformat(), "end_at": (now + timedelta(hours=4)).isoformat()}
+    req = {"start_at": (now + timedelta(hours=2)).isoformat(), "end_at": (now + timedelta(hours=3)).isoformat()}
+
+    r = client.post("/availability/offers", json=offer, headers={"Authorization": f"Bearer {t1}"})
+    assert r.status_code == 200
+    offer_id = r.json()["id"]
+    assert len(matching.offer_index) == 1
+
+    r = client.post("/availability/requests", json=req, headers={"Authorization": f"Bearer {t2}"})
+    assert r.status_code == 200
+    r = client.get("/notifications/me", headers={"Authorization": f"Bearer {t1}"})
+    assert r.json()["total"] == 1
+
+    r = client.delete(f"/availability/offers/{offer_id}", headers={"Authorization": f"Bearer {t1}"})
+    assert r.status_code == 204
+    assert len(matching.offer_index) == 0
+    matching.reset_indexes()
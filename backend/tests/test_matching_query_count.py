@@ -0,0 +1,58 @@
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from fastapi.testclient import TestClient
+from sqlalchemy import event, insert
+from app.main import create_app
+from app.db import SessionLocal, request_engine
+from app.models import AvailabilityRequest, Notification, User
+
+
+@contextmanager
+def count_statements():
+    counter = {"n": 0}
+
+    def before(conn, cursor, statement, parameters, context, executemany):
+        counter["n"] += 1
+
+    event.listen(request_engine(), "before_cursor_execute", before)
+    try:
+        yield counter
+    finally:
+        event.remove(request_engine(), "before_cursor_execute", before)
+
+
+def seed_requests(n: int, prefix: str, start: datetime, end: datetime) -> None:
+    db = SessionLocal()
+    try:
+        users = [{"id": f"{prefix}{i:06d}", "email": f"{prefix}{i}@example.com", "password_hash": "x"} for i in range(n)]
+        db.execute(insert(User), users)
+        db.execute(insert(AvailabilityRequest), [{"user_id": u["id"], "start_at": start, "end_at": end} for u in users])
+        db.commit()
+    finally:
+        db.close()
+
+
+def offer_fanout_statements(n: int) -> int:
+    client = TestClient(create_app())
+    client.post("/auth/register", json={"email": "fan@example.com", "password": "password123"})
+    token = client.post("/auth/login", data={"username": "fan@example.com", "password": "password123"}).json()["access_token"]
+
+    now = datetime.utcnow()
+    seed_requests(n, "9", now + timedelta(hours=2), now + timedelta(hours=3))
+    offer = {"start_at": (now + timedelta(hours=1)).isoformat(), "end_at": (now + timedelta(hours=4)).isoformat()}
+    with count_statements() as counter:
+        r = client.post("/availability/offers", json=offer, headers={"Authorization": f"Bearer {token}"})
+    assert r.status_code == 200
+
+    db = SessionLocal()
+    try:
+        assert db.query(Notification).count() == n
+    finally:
+        db.close()
+    return counter["n"]
+
+
+def test_matching_fanout_uses_constant_statement_count():
+    small = offer_fanout_statements(10)
+    large = offer_fanout_statements(1000)
+    assert large == small
@@ -0,0 +1,99 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, event, insert, select
+from sqlalchemy.orm import Session
+
+from app.db import SessionLocal
+from app.jobs import purge_notifications
+from app.main import create_app
+from app.models import Base, Notification, User
+from app.pagination import encode_cursor
+from app.routers.notifications import _mark_all_read, _notification_page
+
+
+def test_purge_deletes_only_old_read_notifications():
+    create_app()
+    now = datetime.utcnow()
+    db = SessionLocal()
+    try:
+        db.execute(insert(User), [{"id": "72000000", "email": "purge@example.com", "password_hash": "x", "unread_count": 2}])
+        db.execute(insert(Notification), [
+            {"user_id": "72000000", "message": f"old read {i}", "is_read": True, "created_at": now - timedelta(days=40 + i)}
+            for i in range(3)
+        ] + [
+            {"user_id": "72000000", "message": "old unread", "is_read": False, "created_at": now - timedelta(days=60)},
+            {"user_id": "72000000", "message": "new unread", "is_read": False, "created_at": now},
+            {"user_id": "72000000", "message": "new read", "is_read": True, "created_at": now - timedelta(days=5)},
+        ])
+        db.commit()
+    finally:
+        db.close()
+
+    found = purge_notifications.run(days=30, dry_run=True)
+    assert found >= 3
+    # Batches of two: the last one comes back short and ends the run
+    assert purge_notifications.run(days=30, batch_size=2) == found
+    assert purge_notifications.run(days=30) == 0
+
+    db = SessionLocal()
+    try:
+        left = db.scalars(select(Notification.message).where(Notification.user_id == "72000000").order_by(Notification.id))
+        assert list(left) == ["old unread", "new unread", "new read"]
+        assert db.get(User, "72000000").unread_count == 2
+    finally:
+        db.close()
+
+
+def _plans(engine, run) -> list[str]:
+    """EXPLAIN QUERY PLAN of every SELECT/UPDATE issued by ``run(session)``."""
+    statements = []
+
+    def before(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().startswith(("SELECT", "UPDATE")):
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", before)
+    try:
+        with Session(engine) as db:
+            run(db)
+    finally:
+        event.remove(engine, "before_cursor_execute", before)
+    with engine.connect() as conn:
+        return [
+            " ".join(row[3] for row in conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters))
+            for statement, parameters in statements
+        ]
+
+
+def test_notification_queries_use_composite_and_partial_indexes():
+    # Fresh schema: the plans depend on the indexes declared on the models
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        conn.execute(insert(User), [{"id": f"u{i}", "email": f"u{i}@example.com", "password_hash": "x"} for i in range(10)])
+        # Typical mix: most notifications have been read. ANALYZE gives SQLite the
+        # statistics Postgres keeps on its own; without them equal-cost indexes tie
+        conn.execute(insert(Notification), [
+            {"user_id": f"u{i % 10}", "message": "m", "is_read": i % 10 != 0, "created_at": now - timedelta(hours=i)}
+            for i in range(1000)
+        ])
+        conn.exec_driver_sql("ANALYZE")
+
+    listing, total = _plans(engine, lambda db: _notification_page(db, "u1", 1, 20, False, None, True))
+    assert "ix_notifications_user_created" in listing and "TEMP B-TREE" not in listing
+    assert "ix_notifications_user_created" in total
+
+    listing, total = _plans(engine, lambda db: _notification_page(db, "u1", 1, 20, True, None, True))
+    assert "ix_notifications_user_unread" in listing and "TEMP B-TREE" not in listing
+    assert "ix_notifications_user_unread" in total
+
+    cursor = encode_cursor(datetime(2030, 1, 1), 1)
+    [listing] = _plans(engine, lambda db: _notification_page(db, "u1", 1, 20, True, cursor, False))
+    assert "ix_notifications_user_unread" in listing and "TEMP B-TREE" not in listing
+
+    plans = _plans(engine, lambda db: _mark_all_read(db, "u1"))
+    assert "ix_notifications_user_unread" in plans[0]
+
+    [purge] = _plans(engine, lambda db: purge_notifications.purge_batch(db, now - timedelta(days=30), 10))
+    assert "ix_notifications_read_created" in purge and "TEMP B-TREE" not in purge
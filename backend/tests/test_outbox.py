@@ -0,0 +1,100 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from fastapi.testclient import TestClient
+from sqlalchemy import event, insert
+from app.main import create_app
+from app.db import SessionLocal, engine
+from app.models import EmailOutbox
+from app.workers import outbox as outbox_worker
+
+
+def reg_login(client: TestClient, email: str) -> str:
+    r = client.post("/auth/register", json={"email": email, "password": "password123"})
+    assert r.status_code == 200
+    r = client.post("/auth/login", data={"username": email, "password": "password123"})
+    return r.json()["access_token"]
+
+
+def outbox_rows():
+    db = SessionLocal()
+    try:
+        return [(r.to_email, r.status, r.attempts) for r in db.query(EmailOutbox).order_by(EmailOutbox.id)]
+    finally:
+        db.close()
+
+
+def test_match_enqueues_email_and_worker_delivers(monkeypatch):
+    client = TestClient(create_app())
+    t1 = reg_login(client, "box1@example.com")
+    t2 = reg_login(client, "box2@example.com")
+
+    now = datetime.utcnow()
+    offer = {"start_at": (now + timedelta(hours=1)).isoformat(), "end_at": (now + timedelta(hours=4)).isoformat()}
+    req = {"start_at": (now + timedelta(hours=2)).isoformat(), "end_at": (now + timedelta(hours=3)).isoformat()}
+    client.post("/availability/offers", json=offer, headers={"Authorization": f"Bearer {t1}"})
+    client.post("/availability/requests", json=req, headers={"Authorization": f"Bearer {t2}"})
+
+    # Two welcome emails plus one match email, none sent yet
+    rows = outbox_rows()
+    assert [r[0] for r in rows] == ["box1@example.com", "box2@example.com", "box1@example.com"]
+    assert all(r[1] == "pending" for r in rows)
+
+    sent = []
+    def record(messages):
+        sent.extend(m[0] for m in messages)
+        return [None] * len(messages)
+
+    monkeypatch.setattr(outbox_worker.email, "send_many", record)
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        assert outbox_worker.drain_once(pool) == 3
+        assert outbox_worker.drain_once(pool) == 0
+    assert sorted(sent) == ["box1@example.com", "box1@example.com", "box2@example.com"]
+    assert all(r[1] == "sent" for r in outbox_rows())
+
+
+def test_failed_delivery_is_retried_with_backoff(monkeypatch):
+    client = TestClient(create_app())
+    reg_login(client, "retry@example.com")
+
+    def fail(messages):
+        raise ConnectionRefusedError("smtp down")
+
+    monkeypatch.setattr(outbox_worker.email, "send_many", fail)
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        assert outbox_worker.drain_once(pool) == 1
+        # Rescheduled in the future, so nothing is due right now
+        assert outbox_worker.drain_once(pool) == 0
+    assert outbox_rows() == [("retry@example.com", "pending", 1)]
+
+
+def test_drain_issues_a_fixed_number_of_statements_per_batch(monkeypatch):
+    create_app()
+    db = SessionLocal()
+    try:
+        db.execute(insert(EmailOutbox), [
+            {"to_email": f"bulk{i}@example.com", "subject": "s", "body": "b", "next_attempt_at": datetime.utcnow()}
+            for i in range(40)
+        ])
+        db.commit()
+    finally:
+        db.close()
+
+    def half_fail(messages):
+        return [None if i % 2 else ConnectionRefusedError("down") for i in range(len(messages))]
+
+    monkeypatch.setattr(outbox_worker.email, "send_many", half_fail)
+    statements = []
+
+    def before(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before)
+    try:
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            assert outbox_worker.drain_once(pool, batch_size=40) == 40
+    finally:
+        event.remove(engine, "before_cursor_execute", before)
+    # Claim SELECT, lease UPDATE, one executemany UPDATE of the results: no per-row reloads
+    assert len([s for s in statements if s.lstrip().startswith(("SELECT", "UPDATE"))]) == 3
+    rows = [r for r in outbox_rows() if r[0].startswith("bulk")]
+    assert sorted({(status, attempts) for _, status, attempts in rows}) == [("pending", 1), ("sent", 0)]
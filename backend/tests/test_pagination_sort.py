@@ -72,3 +72,67 @@ def test_requests_pagination_and_sort():
     r = client.get("/availability/requests/mine?page=3&page_size=1&sort=start_at", headers=auth_hdr(token))
     last = r.json()["items"][0]["start_at"]
     assert first < last
+
+
+def test_offers_cursor_pagination_without_total():
+    app = create_app()
+    client = TestClient(app)
+    token = reg_login(client, "cursor@example.com")
+
+    now = datetime.utcnow()
+    for i in range(5):
+        start = now + timedelta(hours=1 + i)
+        end = start + timedelta(hours=1)
+        r = client.post("/availability/offers", json={"start_at": start.isoformat(), "end_at": end.isoformat()}, headers=auth_hdr(token))
+        assert r.status_code == 200
+
+    seen = []
+    r = client.get("/availability/offers/mine?page_size=2&sort=start_at&include_total=false", headers=auth_hdr(token))
+    data = r.json()
+    assert data["total"] is None
+    seen += [i["start_at"] for i in data["items"]]
+    while data["next_cursor"]:
+        r = client.get(
+            f"/availability/offers/mine?page_size=2&sort=start_at&include_total=false&cursor={data['next_cursor']}",
+            headers=auth_hdr(token),
+        )
+        data = r.json()
+        seen += [i["start_at"] for i in data["items"]]
+    assert len(seen) == 5
+    assert seen == sorted(seen)
+
+    r = client.get("/availability/offers/mine?cursor=not-a-cursor", headers=auth_hdr(token))
+    assert r.status_code == 400
+
+
+def test_notifications_cursor_pagination():
+    app = create_app()
+    client = TestClient(app)
+    walker = reg_login(client, "cwalker@example.com")
+    owner = reg_login(client, "cowner@example.com")
+
+    now = datetime.utcnow()
+    for i in range(3):
+        start = now + timedelta(hours=2 * i + 1)
+        r = client.post(
+            "/availability/requests",
+            json={"start_at": start.isoformat(), "end_at": (start + timedelta(hours=1)).isoformat()},
+            headers=auth_hdr(owner),
+        )
+        assert r.status_code == 200
+    # One long offer matches all three requests at once (same created_at, ordered by id)
+    r = client.post(
+        "/availability/offers",
+        json={"start_at": (now + timedelta(minutes=30)).isoformat(), "end_at": (now + timedelta(hours=8)).isoformat()},
+        headers=auth_hdr(walker),
+    )
+    assert r.status_code == 200
+
+    r = client.get("/notifications/me?page_size=2", headers=auth_hdr(owner))
+    first = r.json()
+    assert first["total"] == 3 and len(first["items"]) == 2
+    r = client.get(f"/notifications/me?page_size=2&cursor={first['next_cursor']}", headers=auth_hdr(owner))
+    second = r.json()
+    assert len(second["items"]) == 1 and second["next_cursor"] is None
+    ids = [n["id"] for n in first["items"] + second["items"]]
+    assert ids == sorted(ids, reverse=True)
@@ -0,0 +1,99 @@
+import os
+
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.jobs import sweep_uploads
+from app.main import create_app
+
+
+def login(client: TestClient, email: str) -> dict[str, str]:
+    client.post("/auth/register", json={"email": email, "password": "password123"})
+    token = client.post("/auth/login", data={"username": email, "password": "password123"}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def upload(client: TestClient, hdr: dict, dog_id: int, payload: bytes) -> str:
+    r = client.post(f"/dogs/{dog_id}/photo", files={"file": ("p.png", payload, "image/png")}, headers=hdr)
+    assert r.status_code == 200
+    return r.json()["photo_url"]
+
+
+def stored(url: str) -> bool:
+    return os.path.exists(os.path.join(settings.storage_local_dir, url.rsplit("/", 1)[1]))
+
+
+def test_shared_photo_is_collected_with_its_last_dog(monkeypatch):
+    monkeypatch.setattr(settings, "image_variants_enabled", False)
+    monkeypatch.setattr(settings, "upload_grace_seconds", 0)
+    client = TestClient(create_app())
+    a, b = login(client, "coa@example.com"), login(client, "cob@example.com")
+    dog_a = client.post("/dogs/", json={"name": "TWIN01"}, headers=a).json()["id"]
+    dog_b = client.post("/dogs/", json={"name": "TWIN02"}, headers=b).json()["id"]
+
+    payload = b"\x89PNG" + os.urandom(64)
+    url = upload(client, a, dog_a, payload)
+    assert upload(client, b, dog_b, payload) == url
+
+    assert client.delete(f"/dogs/{dog_a}", headers=a).status_code == 204
+    assert stored(url)
+    assert client.delete(f"/dogs/{dog_b}", headers=b).status_code == 204
+    assert not stored(url)
+
+
+def test_replacing_a_photo_collects_the_old_one(monkeypatch):
+    monkeypatch.setattr(settings, "image_variants_enabled", False)
+    monkeypatch.setattr(settings, "upload_grace_seconds", 0)
+    client = TestClient(create_app())
+    hdr = login(client, "swap@example.com")
+    dog_id = client.post("/dogs/", json={"name": "SWAP01"}, headers=hdr).json()["id"]
+
+    old = upload(client, hdr, dog_id, b"\x89PNG" + os.urandom(64))
+    new = upload(client, hdr, dog_id, b"\x89PNG" + os.urandom(64))
+    assert stored(new) and not stored(old)
+
+
+def test_fresh_uploads_survive_release_until_swept(monkeypatch):
+    monkeypatch.setattr(settings, "image_variants_enabled", False)
+    client = TestClient(create_app())
+    hdr = login(client, "grace@example.com")
+    dog_id = client.post("/dogs/", json={"name": "GRACE01"}, headers=hdr).json()["id"]
+
+    # Within the grace period another upload may be about to acquire the key
+    old = upload(client, hdr, dog_id, b"\x89PNG" + os.urandom(64))
+    new = upload(client, hdr, dog_id, b"\x89PNG" + os.urandom(64))
+    assert stored(new) and stored(old)
+
+    assert sweep_uploads.run() == 0
+    assert sweep_uploads.run(older_than=0, dry_run=True) >= 1
+    assert sweep_uploads.run(older_than=0) >= 1
+    assert stored(new) and not stored(old)
+
+
+def test_photo_urls_outside_issued_uploads_are_never_counted_or_deleted(tmp_path, monkeypatch):
+    from app.services import blobs, storage as storage_mod
+
+    monkeypatch.setattr(settings, "storage_backend", "local")
+    monkeypatch.setattr(settings, "storage_local_dir", str(tmp_path / "uploads"))
+    monkeypatch.setattr(settings, "upload_grace_seconds", 0)
+    storage_mod.reset_storage()
+    victim = tmp_path / "victim.txt"
+    victim.write_text("keep me")
+    traversal = "/static/uploads/../victim.txt"
+
+    client = TestClient(create_app())
+    hdr = login(client, "traversal@example.com")
+    r = client.post("/dogs/", json={"name": "EVIL01", "photo_url": traversal}, headers=hdr)
+    assert (r.status_code, r.json()["detail"]) == (400, "Invalid photo URL")
+    dog_id = client.post("/dogs/", json={"name": "EVIL02"}, headers=hdr).json()["id"]
+    assert client.put(f"/dogs/{dog_id}", json={"photo_url": traversal}, headers=hdr).status_code == 400
+    assert client.put(f"/dogs/{dog_id}", json={"photo_url": "https://example.com/dog.jpg"}, headers=hdr).status_code == 400
+
+    storage = storage_mod.get_storage()
+    assert storage.key_for(traversal) is None
+    assert storage.key_for("/static/uploads/" + "a" * 64 + ".png") == "a" * 64 + ".png"
+    # Even a key already in blobs (stored before keys were checked) is not deleted
+    blobs.purge(["../victim.txt"])
+    assert client.delete(f"/dogs/{dog_id}", headers=hdr).status_code == 204
+    assert victim.read_text() == "keep me"
+    storage_mod.reset_storage()
@@ -0,0 +1,55 @@
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from app.main import create_app
+from app.db import request_engine
+from app.services.principal_cache import Principal, PrincipalCache, principal_cache
+
+
+def test_cache_ttl_lru_and_invalidation():
+    now = [1000.0]
+    cache = PrincipalCache(maxsize=2, ttl=30, clock=lambda: now[0])
+    alice = Principal("00000001", "a@example.com", None, None)
+    bob = Principal("00000002", "b@example.com", None, None)
+
+    cache.put("t1", alice, token_exp=1010)
+    cache.put("t2", bob)
+    assert cache.get("t1") is alice
+    cache.put("t3", alice)  # evicts t2, the least recently used
+    assert cache.get("t2") is None
+
+    now[0] = 1011  # past t1's own exp, still within ttl
+    assert cache.get("t1") is None
+    assert cache.get("t3") is alice
+
+    cache.invalidate_user(alice.id)
+    assert cache.get("t3") is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["evictions"], stats["invalidations"]) == (2, 1, 1)
+
+
+def test_authenticated_requests_skip_user_lookup_when_cached():
+    client = TestClient(create_app())
+    client.post("/auth/register", json={"email": "cached@example.com", "password": "password123"})
+    token = client.post("/auth/login", data={"username": "cached@example.com", "password": "password123"}).json()["access_token"]
+    hdr = {"Authorization": f"Bearer {token}"}
+
+    statements = []
+
+    def before(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    assert client.get("/dogs/me", headers=hdr).status_code == 200
+    event.listen(request_engine(), "before_cursor_execute", before)
+    try:
+        assert client.get("/dogs/me", headers=hdr).status_code == 200
+    finally:
+        event.remove(request_engine(), "before_cursor_execute", before)
+    assert not any("FROM users" in s for s in statements)
+    assert principal_cache.stats()["hits"] >= 1
+
+    # Profile updates drop the cached principal so the new location is used
+    r = client.put("/users/me", json={"location_lat": 45.76, "location_lng": 4.83}, headers=hdr)
+    assert r.status_code == 200
+    assert principal_cache.get(token) is None
+    client.get("/dogs/me", headers=hdr)
+    assert principal_cache.get(token).location_lat == 45.76
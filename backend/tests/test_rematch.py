@@ -0,0 +1,79 @@
+import random
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+
+from app.core.config import settings
+from app.db import SessionLocal
+from app.jobs import rematch
+from app.jobs.rematch import Slot
+from app.main import create_app
+from app.models import AvailabilityOffer, AvailabilityRequest, Notification, User
+
+
+def _random_slots(n: int, base: datetime, rng: random.Random) -> list[Slot]:
+    slots = []
+    for i in range(n):
+        start = base + timedelta(minutes=15 * rng.randrange(2000))
+        slots.append(Slot(start, start + timedelta(minutes=15 * rng.randint(1, 16)), f"u{rng.randrange(20)}", i, base))
+    return slots
+
+
+def _brute_force(offers, requests):
+    return {
+        (o.id, r.id) for o in offers for r in requests
+        if o.start_at <= r.start_at and r.end_at <= o.end_at and o.user_id != r.user_id
+    }
+
+
+def test_sweep_and_partitions_match_brute_force():
+    rng = random.Random(7)
+    base = datetime(2030, 1, 1)
+    offers, requests = _random_slots(400, base, rng), _random_slots(600, base, rng)
+    expected = _brute_force(offers, requests)
+    assert expected
+    assert {(o.id, r.id) for o, r in rematch.sweep(offers, requests)} == expected
+    parts = rematch.partition(offers, requests, 4)
+    assert len(parts) == 4 and sum(len(p[1]) for p in parts) == len(requests)
+    assert {(o.id, r.id) for part in parts for o, r in rematch.sweep(*part)} == expected
+    # Same result through the process pool
+    assert {(o.id, r.id) for o, r in rematch.find_matches(offers, requests, workers=2)} == expected
+
+
+def test_rematch_notifies_pairs_missed_at_insert_time(monkeypatch):
+    monkeypatch.setattr(settings, "match_radius_km", 0)
+    create_app()
+    start = datetime.utcnow() + timedelta(days=1)
+    old, new = datetime.utcnow() - timedelta(days=2), datetime.utcnow()
+    db = SessionLocal()
+    try:
+        db.execute(insert(User), [
+            {"id": f"7000000{i}", "email": f"rematch{i}@example.com", "password_hash": "x"} for i in range(3)
+        ])
+        # Written directly (as a bulk import would): no matching ran
+        db.execute(insert(AvailabilityOffer), [
+            {"user_id": "70000000", "start_at": start, "end_at": start + timedelta(hours=3), "created_at": new},
+            {"user_id": "70000000", "start_at": start - timedelta(days=3), "end_at": start - timedelta(days=2)},
+        ])
+        db.execute(insert(AvailabilityRequest), [
+            {"user_id": "70000001", "start_at": start + timedelta(hours=1), "end_at": start + timedelta(hours=2), "created_at": old},
+            {"user_id": "70000002", "start_at": start + timedelta(hours=2), "end_at": start + timedelta(hours=4), "created_at": old},
+            {"user_id": "70000000", "start_at": start, "end_at": start + timedelta(hours=1), "created_at": old},
+        ])
+        db.commit()
+    finally:
+        db.close()
+
+    assert rematch.run(dry_run=True) == 1
+    assert rematch.run(since=new + timedelta(seconds=1)) == 0
+    assert rematch.run(since=new) == 1
+    # Already recorded: re-running notifies nobody again
+    assert rematch.run() == 0
+    db = SessionLocal()
+    try:
+        notes = db.query(Notification).all()
+        # The offer is the newer slot, so the waiting requester hears about it
+        assert [(n.user_id, n.message.startswith("Une offre correspond")) for n in notes] == [("70000001", True)]
+        assert db.get(User, "70000001").unread_count == 1
+    finally:
+        db.close()
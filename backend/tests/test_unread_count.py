@@ -0,0 +1,54 @@
+from datetime import datetime, timedelta
+from fastapi.testclient import TestClient
+from app.main import create_app
+
+
+def reg_login(client: TestClient, email: str) -> str:
+    r = client.post("/auth/register", json={"email": email, "password": "password123"})
+    assert r.status_code == 200
+    r = client.post("/auth/login", data={"username": email, "password": "password123"})
+    return r.json()["access_token"]
+
+
+def auth_hdr(token: str):
+    return {"Authorization": f"Bearer {token}"}
+
+
+def unread(client: TestClient, token: str) -> int:
+    r = client.get("/notifications/me/unread-count", headers=auth_hdr(token))
+    assert r.status_code == 200
+    return r.json()["unread_count"]
+
+
+def test_unread_counter_tracks_create_read_and_read_all():
+    client = TestClient(create_app())
+    walker = reg_login(client, "badge1@example.com")
+    owner = reg_login(client, "badge2@example.com")
+    assert unread(client, owner) == 0
+
+    now = datetime.utcnow()
+    for i in range(3):
+        start = now + timedelta(hours=2 * i + 1)
+        client.post(
+            "/availability/requests",
+            json={"start_at": start.isoformat(), "end_at": (start + timedelta(hours=1)).isoformat()},
+            headers=auth_hdr(owner),
+        )
+    client.post(
+        "/availability/offers",
+        json={"start_at": (now + timedelta(minutes=30)).isoformat(), "end_at": (now + timedelta(hours=8)).isoformat()},
+        headers=auth_hdr(walker),
+    )
+    assert unread(client, owner) == 3
+
+    first_id = client.get("/notifications/me", headers=auth_hdr(owner)).json()["items"][0]["id"]
+    # Marking twice, or someone else's notification, must not drift the counter
+    assert client.put(f"/notifications/{first_id}/read", headers=auth_hdr(owner)).json() == {"status": "ok"}
+    client.put(f"/notifications/{first_id}/read", headers=auth_hdr(owner))
+    assert client.put(f"/notifications/{first_id}/read", headers=auth_hdr(walker)).json() == {"status": "ignored"}
+    assert unread(client, owner) == 2
+
+    client.post("/notifications/me/read-all", headers=auth_hdr(owner))
+    assert unread(client, owner) == 0
+    r = client.get("/notifications/me?unread_only=true", headers=auth_hdr(owner))
+    assert r.json()["total"] == 0
@@ -0,0 +1,39 @@
+import hashlib
+import io
+
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.main import create_app
+from app.services import storage
+
+
+def test_uploads_are_served_immutable_with_strong_etag_and_ranges():
+    client = TestClient(create_app())
+    payload = b"\x89PNG" + bytes(range(256))
+    url = storage.get_storage().save(io.BytesIO(payload), "p.png").url
+    etag = f'"{hashlib.sha256(payload).hexdigest()}"'
+
+    r = client.get(url)
+    assert r.status_code == 200 and r.content == payload
+    assert r.headers["etag"] == etag
+    assert "immutable" in r.headers["cache-control"] and "max-age=31536000" in r.headers["cache-control"]
+
+    r = client.get(url, headers={"If-None-Match": etag})
+    assert r.status_code == 304 and r.content == b""
+    assert "immutable" in r.headers["cache-control"]
+
+    r = client.get(url, headers={"Range": "bytes=4-13"})
+    assert r.status_code == 206
+    assert r.content == payload[4:14]
+    assert r.headers["content-range"] == f"bytes 4-13/{len(payload)}"
+
+
+def test_accel_redirect_hands_the_body_to_the_proxy(monkeypatch):
+    client = TestClient(create_app())
+    stored = storage.get_storage().save(io.BytesIO(b"\x89PNG accel"), "p.png")
+    monkeypatch.setattr(settings, "uploads_accel_redirect_prefix", "/protected-uploads/")
+    r = client.get(stored.url)
+    assert r.status_code == 200 and r.content == b""
+    assert r.headers["x-accel-redirect"] == f"/protected-uploads/{stored.key}"
+    assert r.headers["content-type"] == "image/png"
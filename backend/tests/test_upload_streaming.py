@@ -0,0 +1,93 @@
+import hashlib
+import io
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.main import create_app
+from app.services.storage import LocalStorage, UploadTooLarge
+
+
+class TrackingReader(io.BytesIO):
+    def __init__(self, data: bytes) -> None:
+        super().__init__(data)
+        self.largest_read = 0
+
+    def read(self, size=-1):
+        chunk = super().read(size)
+        self.largest_read = max(self.largest_read, len(chunk))
+        return chunk
+
+
+def test_local_save_streams_in_chunks_and_hashes(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "upload_chunk_size", 4096)
+    data = os.urandom(3 * 1024 * 1024 + 17)
+    src = TrackingReader(data)
+    stored = LocalStorage(str(tmp_path)).save(src, "big.jpg", max_bytes=4 * 1024 * 1024)
+    assert src.largest_read <= 4096
+    assert stored.size == len(data)
+    assert stored.sha256 == hashlib.sha256(data).hexdigest()
+    assert stored.url == f"/static/uploads/{stored.key}" and stored.key.endswith(".jpg")
+    assert (tmp_path / stored.key).read_bytes() == data
+
+
+def test_local_save_rejects_oversized_stream_without_leaving_files(tmp_path):
+    storage = LocalStorage(str(tmp_path))
+    with pytest.raises(UploadTooLarge):
+        storage.save(io.BytesIO(b"x" * 1001), "a.png", max_bytes=1000)
+    assert list(tmp_path.iterdir()) == []
+    # Exactly at the limit is fine
+    assert storage.save(io.BytesIO(b"x" * 1000), "a.png", max_bytes=1000).size == 1000
+
+
+def test_photo_upload_over_limit_is_rejected(monkeypatch):
+    client = TestClient(create_app())
+    client.post("/auth/register", json={"email": "big@example.com", "password": "password123"})
+    token = client.post("/auth/login", data={"username": "big@example.com", "password": "password123"}).json()["access_token"]
+    hdr = {"Authorization": f"Bearer {token}"}
+    dog_id = client.post("/dogs/", json={"name": "HUGE10"}, headers=hdr).json()["id"]
+
+    monkeypatch.setattr(settings, "upload_max_bytes", 2 * 1024 * 1024)
+    files = {"file": ("photo.png", b"\x89PNG" + b"0" * (2 * 1024 * 1024), "image/png")}
+    r = client.post(f"/dogs/{dog_id}/photo", files=files, headers=hdr)
+    assert r.status_code == 400
+    assert r.json()["detail"] == "Image too large (max 2MB)"
+    assert client.get("/dogs/me", headers=hdr).json()[0]["photo_url"] is None
+
+
+def test_storage_is_shared_and_rebuilt_on_settings_reload(tmp_path, monkeypatch):
+    from app.core.config import reload_settings
+    from app.services import storage as storage_mod
+
+    first = storage_mod.get_storage()
+    assert storage_mod.get_storage() is first
+
+    monkeypatch.setenv("STORAGE_LOCAL_DIR", str(tmp_path / "other"))
+    try:
+        reload_settings()
+        rebuilt = storage_mod.get_storage()
+        assert rebuilt is not first and rebuilt.base_dir == str(tmp_path / "other")
+    finally:
+        monkeypatch.delenv("STORAGE_LOCAL_DIR")
+        reload_settings()
+    assert storage_mod.get_storage().base_dir == settings.storage_local_dir
+
+
+def test_s3_client_uses_pooled_keepalive_config(monkeypatch):
+    from app.services.storage import S3Storage
+
+    monkeypatch.setattr(settings, "s3_max_pool_connections", 32)
+    s3 = S3Storage("http://minio:9000", "key", "secret", "us-east-1", "bucket")
+    cfg = s3.s3.meta.config
+    assert cfg.max_pool_connections == 32 and cfg.tcp_keepalive is True
+
+
+def test_identical_uploads_share_one_object(tmp_path):
+    storage = LocalStorage(str(tmp_path))
+    a = storage.save(io.BytesIO(b"same photo"), "a.PNG")
+    b = storage.save(io.BytesIO(b"same photo"), "b.png")
+    assert a.key == b.key == f"{hashlib.sha256(b'same photo').hexdigest()}.png"
+    assert [p.name for p in tmp_path.iterdir()] == [a.key]
+    assert storage.key_for(a.url) == a.key and storage.key_for("https://example.com/x.png") is None
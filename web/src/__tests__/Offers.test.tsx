@@ -60,4 +60,19 @@ describe('Offers page', () => {
     fireEvent.click(deleteBtn)
     await waitFor(() => expect(apiMod.apiDeleteVoid).toHaveBeenCalled())
   })
+
+  it('deletes the rule behind a recurring occurrence', async () => {
+    ;(apiMod.apiGet as any).mockResolvedValueOnce({ items: [
+      { id: null, rule_id: 7, start_at: new Date('2025-10-16T10:00:00Z').toISOString(), end_at: new Date('2025-10-16T11:00:00Z').toISOString() },
+      { id: null, rule_id: 7, start_at: new Date('2025-10-17T10:00:00Z').toISOString(), end_at: new Date('2025-10-17T11:00:00Z').toISOString() },
+    ], total: 2, page: 1, page_size: 10 })
+    render(
+      <Providers>
+        <Offers />
+      </Providers>
+    )
+    const [deleteBtn] = await screen.findAllByText('Supprimer la récurrence')
+    fireEvent.click(deleteBtn)
+    await waitFor(() => expect((apiMod.apiDeleteVoid as any).mock.calls[0][0]).toBe('/availability/rules/7'))
+  })
 })
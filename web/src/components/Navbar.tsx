@@ -6,6 +6,7 @@ import { apiGet } from '../services/api'
 const Navbar: React.FC = () => {
   const { token, logout } = useAuth()
   const [email, setEmail] = useState<string>('')
+  const [unread, setUnread] = useState<number>(0)
 
   useEffect(() => {
     let ignore = false
@@ -13,6 +14,9 @@ const Navbar: React.FC = () => {
       apiGet<any>('/users/me', token).then(u => {
         if (!ignore) setEmail(u.email)
       }).catch(() => {})
+      apiGet<{ unread_count: number }>('/notifications/me/unread-count', token).then(d => {
+        if (!ignore) setUnread(d.unread_count)
+      }).catch(() => {})
     }
     return () => { ignore = true }
   }, [token])
@@ -22,7 +26,7 @@ const Navbar: React.FC = () => {
       <Link to="/profile" style={{ color: 'white', marginRight: 12 }}>Profil</Link>
       <Link to="/offers" style={{ color: 'white', marginRight: 12 }}>Offres</Link>
       <Link to="/requests" style={{ color: 'white', marginRight: 12 }}>Demandes</Link>
-      <Link to="/notifications" style={{ color: 'white', marginRight: 12 }}>Notifications</Link>
+      <Link to="/notifications" style={{ color: 'white', marginRight: 12 }}>Notifications{unread > 0 && ` (${unread})`}</Link>
   <Link to="/dogs" style={{ color: 'white', marginRight: 12 }}>Chiens</Link>
 
       <span style={{ float: 'right' }}>
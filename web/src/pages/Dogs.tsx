@@ -7,6 +7,7 @@ type Dog = {
   id: number
   name: string
   photo_url?: string | null
+  photo_thumb_url?: string | null
   created_at: string
 }
 
@@ -100,7 +101,7 @@ const Dogs: React.FC = () => {
             <div key={dog.id} className="list-item">
               <div style={{ display: 'flex', alignItems: 'center', gap: 12, flexWrap: 'wrap' }}>
                 {dog.photo_url ? (
-                  <img src={dog.photo_url} alt={dog.name} style={{ width: 64, height: 64, objectFit: 'cover', borderRadius: 6 }} />
+                  <img src={dog.photo_thumb_url || dog.photo_url} alt={dog.name} style={{ width: 64, height: 64, objectFit: 'cover', borderRadius: 6 }} />
                 ) : (
                   <div style={{ width: 64, height: 64, background: '#eee', display: 'inline-block', borderRadius: 6 }} />
                 )}
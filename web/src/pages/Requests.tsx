@@ -34,9 +34,15 @@ const Requests: React.FC = () => {
 
   useEffect(() => { loadMine() }, [token, page, sort])
 
-  async function remove(id: number) {
-    await apiDeleteVoid(`/availability/requests/${id}`, token!)
-    push('Demande supprimée', { type: 'success' })
+  async function remove(item: { id: number | null; rule_id?: number | null }) {
+    // Occurrences of a recurring rule have no id of their own: removing one removes the rule
+    if (item.id == null) {
+      await apiDeleteVoid(`/availability/rules/${item.rule_id}`, token!)
+      push('Récurrence supprimée', { type: 'success' })
+    } else {
+      await apiDeleteVoid(`/availability/requests/${item.id}`, token!)
+      push('Demande supprimée', { type: 'success' })
+    }
     loadMine()
   }
 
@@ -58,9 +64,9 @@ const Requests: React.FC = () => {
       </div>
       <ul>
         {mine.map(o => (
-          <li key={o.id} className="list-item">
-            <span>{new Date(o.start_at).toLocaleString()} → {new Date(o.end_at).toLocaleString()}</span>
-            <button onClick={() => remove(o.id)} className="danger">Supprimer</button>
+          <li key={o.id ?? `rule-${o.rule_id}-${o.start_at}`} className="list-item">
+            <span>{new Date(o.start_at).toLocaleString()} → {new Date(o.end_at).toLocaleString()}{o.id == null ? ' (récurrent)' : ''}</span>
+            <button onClick={() => remove(o)} className="danger">{o.id == null ? 'Supprimer la récurrence' : 'Supprimer'}</button>
           </li>
         ))}
       </ul>